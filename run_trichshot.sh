@@ -8,7 +8,7 @@ echo "==========================================="
 
 # Parse command line arguments
 REBUILD=false
-PERFORMANCE_MODE="balanced"
+PERFORMANCE_MODE="auto"
 VERBOSE=false
 
 while [[ $# -gt 0 ]]; do
@@ -29,7 +29,7 @@ while [[ $# -gt 0 ]]; do
             echo "Usage: $0 [OPTIONS]"
             echo "Options:"
             echo "  --rebuild           Force rebuild of Docker image"
-            echo "  --performance-mode  Set performance mode (low|balanced|high)"
+            echo "  --performance-mode  Set performance mode (auto|low|balanced|high, default: auto)"
             echo "  --verbose           Enable verbose output"
             echo "  --help              Show this help message"
             exit 0
@@ -44,10 +44,10 @@ done
 
 # Validate performance mode
 case $PERFORMANCE_MODE in
-    low|balanced|high)
+    auto|low|balanced|high)
         ;;
     *)
-        echo "Error: Invalid performance mode '$PERFORMANCE_MODE'. Use: low, balanced, or high"
+        echo "Error: Invalid performance mode '$PERFORMANCE_MODE'. Use: auto, low, balanced, or high"
         exit 1
         ;;
 esac
@@ -186,6 +186,20 @@ echo
 
 # Performance mode configuration
 case $PERFORMANCE_MODE in
+    auto)
+        # Calibrated on the first run, then loaded from the per-host cache
+        CALIBRATION_DIR="$HOME/.cache/trichshot"
+        mkdir -p "$CALIBRATION_DIR"
+        # Run as the host user so the container can write the mounted cache;
+        # otherwise saving fails and calibration reruns on every launch
+        EXTRA_ENV="--user $(id -u):$(id -g) -v $CALIBRATION_DIR:/calibration --env TRICHSHOT_CALIBRATION_FILE=/calibration/profile-$(hostname).json"
+        echo "⚡ Performance Mode: AUTO (default)"
+        if [ -f "$CALIBRATION_DIR/profile-$(hostname).json" ]; then
+            echo "   Using the calibrated profile in $CALIBRATION_DIR"
+        else
+            echo "   First run: calibrating resolution, frame skip and model complexity"
+        fi
+        ;;
     low)
         EXTRA_ENV="--env TRICHSHOT_DEFAULT_FPS=10 --env TRICHSHOT_DEFAULT_RESOLUTION=320x240 --env TRICHSHOT_DEFAULT_SKIP=3"
         echo "⚡ Performance Mode: LOW"
@@ -193,7 +207,7 @@ case $PERFORMANCE_MODE in
         ;;
     balanced)
         EXTRA_ENV="--env TRICHSHOT_DEFAULT_FPS=15 --env TRICHSHOT_DEFAULT_RESOLUTION=640x480 --env TRICHSHOT_DEFAULT_SKIP=2"
-        echo "⚡ Performance Mode: BALANCED (default)"
+        echo "⚡ Performance Mode: BALANCED"
         echo "   Default settings: 640x480 @ 15 FPS, frame skip: 2"
         ;;
     high)
@@ -215,7 +229,7 @@ case $PERFORMANCE_MODE in
     low)
         RESOURCE_LIMITS="--memory=512m --cpus=1.0"
         ;;
-    balanced)
+    auto|balanced)
         RESOURCE_LIMITS="--memory=1g --cpus=2.0"
         ;;
     high)
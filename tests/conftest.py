@@ -0,0 +1,24 @@
+import os
+import sys
+
+# trichshot.py is a single script at the repository root, not an installed package
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pytest
+
+
+@pytest.fixture
+def app(monkeypatch, tmp_path):
+    """Headless TrichShotApp with defaults, no calibration cache and the
+    model-free heuristic detector (tests swap in their own)"""
+    import trichshot
+
+    for variable in list(os.environ):
+        if variable.startswith('TRICHSHOT_'):
+            monkeypatch.delenv(variable)
+    monkeypatch.setenv('TRICHSHOT_CALIBRATION_FILE', str(tmp_path / 'profile.json'))
+    monkeypatch.setenv('TRICHSHOT_INFERENCE', 'heuristic')
+    monkeypatch.setenv('TRICHSHOT_MOTION_GATE', '0')
+    app = trichshot.TrichShotApp(gui=False)
+    yield app
+    app.close_detectors()
@@ -0,0 +1,96 @@
+import numpy as np
+
+from trichshot import AlertStateMachine, match_hands
+
+CENTER = np.array([[0.5, 0.3]], dtype=np.float32)
+NO_CENTERS = np.empty((0, 2), dtype=np.float32)
+NO_SCORES = np.empty(0, dtype=np.float32)
+
+
+def feed(machine, scores, start=0.0, dt=0.1, center=CENTER):
+    """Feed one hand's per-frame scores and return the alert state after each frame"""
+    states = []
+    for i, score in enumerate(scores):
+        states.append(machine.update(center, np.array([score], dtype=np.float32), start + i * dt))
+    return states
+
+
+def test_match_hands_assigns_nearest_slot_first():
+    slots = np.array([[0.2, 0.2], [0.8, 0.8]], dtype=np.float32)
+    centers = np.array([[0.75, 0.8], [0.25, 0.2]], dtype=np.float32)
+    assert match_hands(centers, slots).tolist() == [1, 0]
+
+
+def test_match_hands_prefers_occupied_slots_and_reports_overflow():
+    slots = np.array([[np.nan, np.nan], [0.5, 0.5]], dtype=np.float32)
+    assert match_hands(np.array([[0.1, 0.1]], dtype=np.float32), slots).tolist() == [1]
+
+    one_slot = np.array([[0.5, 0.5]], dtype=np.float32)
+    centers = np.array([[0.9, 0.9], [0.5, 0.5]], dtype=np.float32)
+    assert match_hands(centers, one_slot).tolist() == [-1, 0]
+    assert match_hands(NO_CENTERS, one_slot).tolist() == []
+
+
+def test_enters_after_n_of_m_hot_frames():
+    machine = AlertStateMachine(max_hands=1, votes=3, window=5)
+    assert feed(machine, [0.9, 0.9, 0.9]) == [False, False, True]
+
+    machine = AlertStateMachine(max_hands=1, votes=3, window=5)
+    assert feed(machine, [0.9, 0.0, 0.9, 0.0, 0.9]) == [False, False, False, False, True]
+
+
+def test_isolated_hot_frames_never_alert():
+    machine = AlertStateMachine(max_hands=1, votes=3, window=5)
+    assert not any(feed(machine, [0.9, 0.0, 0.0, 0.0, 0.9, 0.0, 0.0, 0.0] * 3))
+    assert machine.transitions == 0
+
+
+def test_exit_threshold_holds_an_active_alert():
+    machine = AlertStateMachine(max_hands=1, enter_threshold=0.7, exit_threshold=0.4,
+                                votes=3, window=5, min_on_time=0.0)
+    feed(machine, [0.9, 0.9, 0.9])
+    # Between the two thresholds: too low to start an alert, enough to keep one
+    assert all(feed(machine, [0.5] * 10, start=1.0))
+    assert feed(machine, [0.0, 0.0, 0.0], start=3.0) == [True, True, False]
+    assert machine.transitions == 2
+
+
+def test_min_on_time_delays_exit():
+    machine = AlertStateMachine(max_hands=1, votes=3, window=5, min_on_time=0.5)
+    feed(machine, [0.9, 0.9, 0.9], dt=0.01)  # Alert starts at t=0.02
+    assert all(feed(machine, [0.0] * 5, start=0.03, dt=0.01))
+    assert feed(machine, [0.0], start=0.6) == [False]
+
+
+def test_slot_is_freed_for_a_new_hand_once_the_old_one_left():
+    machine = AlertStateMachine(max_hands=1, votes=3, window=5)
+    feed(machine, [0.0, 0.0], center=np.array([[0.2, 0.2]], dtype=np.float32))
+    assert not np.isnan(machine.centers[0]).any()
+
+    machine.update(NO_CENTERS, NO_SCORES, 1.0)
+    assert np.isnan(machine.centers[0]).all()
+
+    # A hand elsewhere takes the free slot and can alert
+    far = np.array([[0.8, 0.8]], dtype=np.float32)
+    assert feed(machine, [0.9, 0.9, 0.9], start=2.0, center=far)[-1]
+    assert np.allclose(machine.centers[0], far[0])
+
+
+def test_second_hand_beyond_max_hands_is_ignored():
+    machine = AlertStateMachine(max_hands=1, votes=3, window=5)
+    centers = np.array([[0.2, 0.2], [0.8, 0.8]], dtype=np.float32)
+    for i in range(5):
+        # The first hand keeps its slot; the hot second hand has none
+        machine.update(centers, np.array([0.0, 0.9], dtype=np.float32), i * 0.1)
+    assert not machine.alerting
+
+
+def test_replay_is_deterministic():
+    rng = np.random.default_rng(7)
+    scores = rng.random(200)
+    runs = []
+    for _ in range(2):
+        machine = AlertStateMachine(max_hands=1)
+        runs.append((feed(machine, scores, dt=1 / 30), machine.transitions))
+    assert runs[0] == runs[1]
+    assert runs[0][1] > 0
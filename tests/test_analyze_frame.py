@@ -0,0 +1,57 @@
+import numpy as np
+
+from trichshot import HandDetector
+
+FRAME = np.zeros((48, 64, 3), dtype=np.uint8)
+
+
+def hand_in_zone():
+    """One hand spanning y 0.6-0.9, across the default 0.75 zone line"""
+    landmarks = np.full((1, 21, 3), 0.5, dtype=np.float32)
+    landmarks[0, :, 1] = np.linspace(0.6, 0.9, 21)
+    return landmarks
+
+
+class SlowAsyncDetector(HandDetector):
+    """Answers once every `period` calls, like a backend slower than capture"""
+
+    is_async = True
+
+    def __init__(self, period: int):
+        self.period = period
+        self.calls = 0
+
+    def detect(self, frame, timestamp, context=None):
+        self.calls += 1
+        if self.calls % self.period:
+            return None
+        return context, hand_in_zone(), np.ones(1, dtype=np.float32)
+
+
+def run(app, frames):
+    return [app.analyze_frame(FRAME, i / 30)[0] for i in range(frames)]
+
+
+def test_one_async_result_is_one_vote(app):
+    app.detector = SlowAsyncDetector(period=10)
+    app.reset_detection_state()
+    hands = run(app, 25)  # Two results, each followed by nine repeats
+    assert len(hands[-1]) == 1  # The last result is still shown
+    assert not app.alert_state.alerting
+
+    run(app, 10)  # The third result completes the 3-of-5 vote
+    assert app.alert_state.alerting
+
+
+def test_skipped_frames_do_not_vote(app):
+    class EveryFrame(SlowAsyncDetector):
+        is_async = False
+
+    app.detector = EveryFrame(period=1)
+    app.capture_profile.frame_skip = 4
+    app.reset_detection_state()
+    run(app, 8)  # Inference on frames 0 and 4 only
+    assert app.detector.calls == 2
+    assert not app.alert_state.alerting
+    run(app, 1)
+    assert app.alert_state.alerting
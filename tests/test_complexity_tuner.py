@@ -0,0 +1,50 @@
+from trichshot import ComplexityTuner
+
+
+class FakeDetector:
+    """Stands in for MediaPipeHandsDetector: reconfigure() only marks a
+    graph as pending until the test swaps it in"""
+
+    def __init__(self):
+        self.options = {'model_complexity': 1, 'max_num_hands': 2}
+        self.switching = False
+        self.swaps = 0
+
+    def reconfigure(self, **changes):
+        if self.switching:
+            return False
+        self.pending = changes
+        self.switching = True
+        return True
+
+    def swap(self):
+        self.options.update(self.pending)
+        self.switching = False
+        self.swaps += 1
+
+
+def test_window_restarts_when_the_new_graph_is_swapped_in():
+    detector = FakeDetector()
+    tuner = ComplexityTuner(detector, budget_ms=10.0, window=5)
+    for i in range(5):
+        tuner.record(20.0, i)
+    assert tuner.levels[tuner.level] == (0, 2)
+    assert detector.pending == {'model_complexity': 0, 'max_num_hands': 2}
+
+    # Still on the old graph while the new one builds: no decision yet
+    for i in range(5, 10):
+        tuner.record(20.0, i)
+    assert tuner.switches == 1
+
+    detector.swap()
+    tuner.record(1.0, 10)
+    assert list(tuner.latencies) == [1.0]
+
+
+def test_no_second_switch_before_the_swap():
+    detector = FakeDetector()
+    tuner = ComplexityTuner(detector, budget_ms=10.0, window=3)
+    for i in range(20):
+        tuner.record(50.0, i)
+    assert tuner.switches == 1
+    assert tuner.level == 1
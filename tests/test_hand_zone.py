@@ -0,0 +1,65 @@
+import numpy as np
+
+from trichshot import FINGERTIPS, HandZoneEvaluation
+
+
+def hand(x1, y1, x2, y2, tips_y=None):
+    """(21, 3) landmarks spanning the box (x1, y1)-(x2, y2); fingertips at tips_y"""
+    landmarks = np.zeros((21, 3), dtype=np.float32)
+    landmarks[:, 0] = np.linspace(x1, x2, 21)
+    landmarks[:, 1] = np.linspace(y1, y2, 21)
+    if tips_y is not None:
+        landmarks[FINGERTIPS, 1] = tips_y
+    return landmarks
+
+
+def test_rules_per_hand():
+    hands = np.stack([
+        hand(0.1, 0.2, 0.3, 0.5),                          # Overlaps the zone
+        hand(0.4, 0.7, 0.6, 0.9),                          # Below it
+        hand(0.6, 0.1, 0.8, 0.6, tips_y=[0.35, 0.35, 0.35, 0.1, 0.1]),
+    ])
+    evaluation = HandZoneEvaluation(hands, 0.3, 0.4)
+
+    np.testing.assert_allclose(evaluation.bbox[0], (0.1, 0.2, 0.3, 0.5), atol=1e-6)
+    assert evaluation.in_zone.tolist() == [True, False, True]
+    assert evaluation.any_in_zone
+    assert evaluation.fingertips_in_zone[2] == 3
+    np.testing.assert_allclose(evaluation.distance, (0.0, 0.3, 0.0), atol=1e-6)
+    np.testing.assert_allclose(evaluation.centers[1], (0.5, 0.8), atol=1e-6)
+    assert evaluation.scores.tolist() == [1.0, 0.0, 1.0]
+
+
+def test_zone_bounds_in_either_order():
+    hands = hand(0.4, 0.1, 0.6, 0.2)[np.newaxis]
+    for top, bottom in ((0.5, 0.7), (0.7, 0.5)):
+        evaluation = HandZoneEvaluation(hands, top, bottom)
+        np.testing.assert_allclose(evaluation.distance, (0.3,), atol=1e-6)
+
+
+def test_left_and_right_bounds():
+    hands = np.stack([
+        hand(0.1, 0.3, 0.2, 0.5, tips_y=0.4),  # Left of the zone
+        hand(0.4, 0.3, 0.5, 0.5, tips_y=0.4),  # Inside
+        hand(0.7, 0.3, 0.8, 0.5, tips_y=0.4),  # Right of the zone
+    ])
+    evaluation = HandZoneEvaluation(hands, 0.2, 0.6, left=0.3, right=0.6)
+    assert evaluation.in_zone.tolist() == [False, True, False]
+    assert evaluation.fingertips_in_zone.tolist() == [0, 5, 0]
+    # distance is vertical only
+    np.testing.assert_allclose(evaluation.distance, (0.0, 0.0, 0.0), atol=1e-6)
+
+
+def test_risk_replaces_zone_scores():
+    evaluation = HandZoneEvaluation(hand(0.1, 0.2, 0.3, 0.5)[np.newaxis], 0.3, 0.4)
+    evaluation.risk = np.array([0.25], dtype=np.float32)
+    assert evaluation.scores.tolist() == [0.25]
+
+
+def test_no_hands():
+    evaluation = HandZoneEvaluation(np.empty((0, 21, 3), dtype=np.float32), 0.3, 0.4)
+    assert evaluation.in_zone.shape == (0,)
+    assert evaluation.fingertips_in_zone.shape == (0,)
+    assert evaluation.distance.shape == (0,)
+    assert evaluation.centers.shape == (0, 2)
+    assert not evaluation.any_in_zone
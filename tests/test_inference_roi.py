@@ -0,0 +1,85 @@
+import numpy as np
+import pytest
+
+from trichshot import HandDetector
+
+FRAME = np.zeros((100, 80, 3), dtype=np.uint8)
+
+
+def crop_landmarks(y):
+    """One hand with every landmark at (0.5, y, 0.1) in crop coordinates"""
+    return np.full((1, 21, 3), (0.5, y, 0.1), dtype=np.float32)
+
+
+class StubDetector(HandDetector):
+    """Returns known crop-normalized landmarks and records the crops it got.
+
+    With lag=1 it answers every call with the previous call's context, like
+    an asynchronous backend whose result belongs to an earlier frame.
+    """
+
+    def __init__(self, y, lag=0):
+        self.y = y
+        self.lag = lag
+        self.is_async = lag > 0
+        self.crop_heights = []
+        self.contexts = []
+
+    def detect(self, frame, timestamp, context=None):
+        self.crop_heights.append(frame.shape[0])
+        self.contexts.append(context)
+        if len(self.contexts) <= self.lag:
+            return None
+        return self.contexts[-1 - self.lag], crop_landmarks(self.y), np.ones(1, dtype=np.float32)
+
+
+@pytest.fixture
+def roi_app(app):
+    app.roi_enabled = True
+    app.roi_margin = 0.2
+    app.tuner = None
+    return app
+
+
+@pytest.mark.parametrize('zone, rows', [
+    ((0.5, 0.5), (30, 70)),
+    ((0.6, 0.4), (20, 80)),   # Bounds in either order
+    ((0.05, 0.1), (0, 30)),   # Clamped at the top
+    ((0.9, 0.95), (70, 100)),  # Clamped at the bottom
+])
+def test_roi_rows(roi_app, zone, rows):
+    assert roi_app.get_inference_roi(100, zone) == rows
+
+
+def test_roi_is_never_empty(roi_app):
+    roi_app.roi_margin = 0.0
+    assert roi_app.get_inference_roi(100, (0.5, 0.5)) == (50, 51)
+    assert roi_app.get_inference_roi(100, (1.0, 1.0)) == (99, 100)
+
+
+def test_sync_landmarks_map_back_to_the_full_frame(roi_app):
+    roi_app.detector = StubDetector(y=0.25)
+    hands = roi_app.detect_hands(FRAME, 0.0, (0.5, 0.5, 0.0, 1.0))
+    assert roi_app.detector.crop_heights == [40]
+    # Rows 30-70: crop y 0.25 is frame row 40
+    np.testing.assert_allclose(hands[0, :, 1], 0.4, atol=1e-6)
+    np.testing.assert_allclose(hands[0, :, 0], 0.5)
+    np.testing.assert_allclose(hands[0, :, 2], 0.1)
+
+
+def test_async_landmarks_use_the_roi_of_their_own_frame(roi_app):
+    roi_app.detector = StubDetector(y=0.5, lag=1)
+    assert roi_app.detect_hands(FRAME, 0.0, (0.5, 0.5, 0.0, 1.0)) is None
+
+    # The zone moved, but the result still belongs to the first crop (rows 30-70)
+    hands = roi_app.detect_hands(FRAME, 0.1, (0.1, 0.1, 0.0, 1.0))
+    assert roi_app.detector.crop_heights == [40, 30]
+    np.testing.assert_allclose(hands[0, :, 1], 0.5, atol=1e-6)
+
+
+def test_full_frame_landmarks_are_unchanged_without_roi(app):
+    app.tuner = None
+    app.detector = StubDetector(y=0.25)
+    hands = app.detect_hands(FRAME, 0.0, (0.5, 0.5, 0.0, 1.0))
+    assert app.detector.crop_heights == [100]
+    np.testing.assert_allclose(hands[0, :, 1], 0.25)
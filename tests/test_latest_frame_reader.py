@@ -0,0 +1,130 @@
+import queue
+import time
+
+import numpy as np
+import pytest
+
+from trichshot import FrameSource, LatestFrameReader
+
+
+class SteppedSource(FrameSource):
+    """Delivers one frame per emit(), filled with its frame number, into the
+    buffer the reader passes in; fail() makes the next read fail"""
+
+    def __init__(self):
+        super().__init__(max_speed=True)
+        self.pending = queue.Queue()
+        self.reader = None
+
+    def emit(self, value):
+        captured = self.reader.frames_captured
+        self.pending.put(value)
+        wait_for(lambda: self.reader.frames_captured > captured)
+
+    def fail(self):
+        self.pending.put(None)
+        wait_for(lambda: self.reader.failed)
+
+    def read_frame(self, image=None):
+        while True:
+            try:
+                value = self.pending.get(timeout=0.01)
+                break
+            except queue.Empty:
+                if not self.reader.running:
+                    return False, None, 0.0
+        if value is None:
+            return False, None, 0.0
+        if image is None:
+            image = np.empty((4, 4, 3), dtype=np.uint8)
+        image[:] = value
+        return True, image, value / self.fps
+
+
+def wait_for(condition, timeout=2.0):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline, "capture thread did not catch up"
+        time.sleep(0.001)
+
+
+@pytest.fixture
+def start_reader():
+    readers = []
+
+    def start(hold=1):
+        source = SteppedSource()
+        reader = LatestFrameReader(source, hold=hold)
+        source.reader = reader
+        reader.start()
+        readers.append(reader)
+        return source, reader
+
+    yield start
+    for reader in readers:
+        reader.stop()
+
+
+def read_value(reader):
+    ret, frame, _ = reader.read(timeout=1.0)
+    assert ret
+    return frame
+
+
+@pytest.mark.parametrize('hold', [1, 2, 3])
+def test_read_frame_survives_until_hold_more_reads(start_reader, hold):
+    source, reader = start_reader(hold)
+    value = 1
+    source.emit(value)
+    first = read_value(reader)
+
+    for _ in range(hold - 1):
+        # Each read is followed by a burst of captures into recycled buffers
+        for _ in range(5):
+            value += 1
+            source.emit(value)
+        read_value(reader)
+        assert (first == 1).all()
+
+    for _ in range(5):
+        value += 1
+        source.emit(value)
+    assert (first == 1).all()
+
+
+def test_overwritten_unread_frames_count_as_dropped(start_reader):
+    source, reader = start_reader()
+    for value in (1, 2, 3):
+        source.emit(value)
+    assert reader.frames_dropped == 2
+
+    frame = read_value(reader)
+    assert (frame == 3).all()
+    source.emit(4)
+    assert reader.frames_dropped == 2  # 3 was read before 4 replaced it
+    assert reader.stats()['captured'] == 4
+    assert reader.stats()['delivered'] == 1
+
+
+def test_no_frame_is_delivered_twice(start_reader):
+    source, reader = start_reader()
+    source.emit(1)
+    read_value(reader)
+    assert reader.read(timeout=0.05) == (False, None, 0.0)
+
+
+def test_read_fails_after_source_failure(start_reader):
+    source, reader = start_reader()
+    source.emit(1)
+    read_value(reader)
+    source.fail()
+    assert not reader.running
+    assert reader.read(timeout=0.5) == (False, None, 0.0)
+
+
+def test_read_fails_after_stop(start_reader):
+    source, reader = start_reader()
+    source.emit(1)
+    read_value(reader)
+    reader.stop()
+    assert reader.read(timeout=0.5) == (False, None, 0.0)
@@ -0,0 +1,58 @@
+import numpy as np
+import pytest
+
+from trichshot import FINGERTIPS, ProximityScorer
+
+FACE = np.array([[0.5, 0.5]], dtype=np.float32)
+FACE_SIZE = 0.2  # Face height as a fraction of the frame height
+
+
+def hand_at(x, y):
+    """(1, 21, 3) landmarks with every point, fingertips included, at (x, y)"""
+    return np.full((1, 21, 3), (x, y, 0.0), dtype=np.float32)
+
+
+@pytest.fixture
+def scorer():
+    return ProximityScorer(touch_distance=0.15, reach_distance=1.0)
+
+
+@pytest.mark.parametrize('offset, expected', [
+    (0.0, 1.0),                    # On the face
+    (0.15 * FACE_SIZE, 1.0),       # Touch distance
+    (0.575 * FACE_SIZE, 0.5),      # Halfway to reach distance
+    (1.0 * FACE_SIZE, 0.0),        # Reach distance
+    (1.5 * FACE_SIZE, 0.0),        # Beyond reach
+])
+def test_risk_is_clamped_between_touch_and_reach(scorer, offset, expected):
+    risk, distance = scorer.score(hand_at(0.5, 0.5 + offset), FACE, FACE_SIZE, 1.0)
+    assert risk[0] == pytest.approx(expected, abs=1e-5)
+    assert distance[0] == pytest.approx(offset / FACE_SIZE, abs=1e-5)
+
+
+def test_aspect_makes_x_distances_comparable(scorer):
+    # 0.05 of a 2:1 frame's width is as far as 0.1 of its height
+    landmarks = hand_at(0.55, 0.5)
+    _, wide = scorer.score(landmarks, FACE, FACE_SIZE, 2.0)
+    _, square = scorer.score(landmarks, FACE, FACE_SIZE, 1.0)
+    assert wide[0] == pytest.approx(0.1 / FACE_SIZE, abs=1e-5)
+    assert square[0] == pytest.approx(0.05 / FACE_SIZE, abs=1e-5)
+
+
+def test_nearest_fingertip_and_face_point_count(scorer):
+    landmarks = hand_at(0.9, 0.9)
+    landmarks[0, FINGERTIPS[1], :2] = (0.2, 0.2)  # Only the index tip is near
+    face = np.array([[0.5, 0.5], [0.2, 0.2]], dtype=np.float32)
+    risk, distance = scorer.score(landmarks, face, FACE_SIZE, 1.0)
+    assert distance[0] == pytest.approx(0.0)
+    assert risk[0] == 1.0
+
+
+def test_one_row_per_hand(scorer):
+    hands = np.concatenate([hand_at(0.5, 0.5), hand_at(0.5, 0.9)])
+    risk, _ = scorer.score(hands, FACE, FACE_SIZE, 1.0)
+    assert risk.tolist() == [1.0, 0.0]
+
+    risk, distance = scorer.score(np.empty((0, 21, 3), dtype=np.float32), FACE, FACE_SIZE, 1.0)
+    assert risk.shape == (0,)
+    assert distance.shape == (0,)
@@ -0,0 +1,59 @@
+import numpy as np
+
+from trichshot import PullGestureClassifier
+
+ZONE = (0.0, 0.4, 0.0, 1.0)  # top, bottom, left, right
+HAND_SIZE = 0.1  # Wrist to middle knuckle
+
+
+def hand(x, y, pinched):
+    """Landmarks (1, 21, 3) with the thumb and index tips at (x, y)"""
+    landmarks = np.zeros((1, 21, 3), dtype=np.float32)
+    landmarks[0, :, 0] = x
+    landmarks[0, :, 1] = y + HAND_SIZE
+    landmarks[0, 0, :2] = (x, y + 2 * HAND_SIZE)  # Wrist
+    landmarks[0, 9, :2] = (x, y + HAND_SIZE)      # Middle finger knuckle
+    spread = 0.0 if pinched else HAND_SIZE
+    landmarks[0, 4, :2] = (x - spread / 2, y)     # Thumb tip
+    landmarks[0, 8, :2] = (x + spread / 2, y)     # Index tip
+    return landmarks
+
+
+def classify(path, pinched):
+    """Feed a hand along the y path and return the per-frame pulling flags"""
+    classifier = PullGestureClassifier(max_hands=1, window=15)
+    flags = []
+    for y in path:
+        landmarks = hand(0.5, y, pinched)
+        centers = landmarks[:, :, :2].mean(axis=1)
+        flags.append(bool(classifier.update(landmarks, centers, ZONE)[0]))
+    return flags, classifier
+
+
+def test_upward_pinch_near_the_scalp_is_a_pull():
+    flags, classifier = classify(np.linspace(0.5, 0.2, 10), pinched=True)
+    assert flags[-1]
+    assert not flags[0]
+    assert classifier.pulls_detected > 0
+
+
+def test_static_pinch_is_not_a_pull():
+    flags, _ = classify([0.3] * 15, pinched=True)
+    assert not any(flags)
+
+
+def test_open_hand_moving_up_is_not_a_pull():
+    flags, _ = classify(np.linspace(0.5, 0.2, 10), pinched=False)
+    assert not any(flags)
+
+
+def test_downward_pinch_is_not_a_pull():
+    flags, _ = classify(np.linspace(0.2, 0.5, 10), pinched=True)
+    assert not any(flags)
+
+
+def test_no_hands():
+    classifier = PullGestureClassifier(max_hands=2)
+    result = classifier.update(np.empty((0, 21, 3), dtype=np.float32),
+                               np.empty((0, 2), dtype=np.float32), ZONE)
+    assert result.shape == (0,)
@@ -0,0 +1,76 @@
+import pytest
+
+from trichshot import BufferPool, StageQueue
+
+SHAPE = (4, 4, 3)
+
+
+@pytest.mark.parametrize('policy', ['drop_oldest', 'drop_newest'])
+def test_dropped_buffers_return_to_the_pool(policy):
+    pool = BufferPool(2)
+    queue = StageQueue('render', 1, policy, on_drop=pool.release)
+
+    # No consumer: every put after the first overflows the queue
+    for _ in range(10):
+        buffer = pool.acquire(SHAPE)
+        assert buffer is not None
+        queue.put(buffer)
+    assert queue.dropped == 9
+
+    held = queue.get(timeout=0)
+    assert held is not None
+    assert queue.get(timeout=0) is None
+    pool.release(held)
+    assert pool.acquire(SHAPE) is not None
+    assert pool.acquire(SHAPE) is not None
+
+
+@pytest.mark.parametrize('policy', ['drop_oldest', 'drop_newest'])
+def test_pool_survives_a_consumer_between_gets(policy):
+    pool = BufferPool(2)
+    queue = StageQueue('render', 1, policy, on_drop=pool.release)
+
+    for _ in range(20):
+        # The consumer is idle (nothing held), so the producer can fill
+        # the queue and then overflow it with the spare buffer
+        queue.put(pool.acquire(SHAPE))
+        queue.put(pool.acquire(SHAPE))
+        shown = queue.get(timeout=0)
+        pool.release(shown)
+
+    assert queue.dropped == 20
+    assert len(pool.free) == 2
+
+
+def test_drop_policies_keep_the_expected_item():
+    newest = StageQueue('q', 1, 'drop_newest')
+    assert newest.put('a')
+    assert not newest.put('b')
+    assert newest.get(timeout=0) == 'a'
+
+    oldest = StageQueue('q', 1, 'drop_oldest')
+    assert oldest.put('a')
+    assert oldest.put('b')
+    assert oldest.get(timeout=0) == 'b'
+
+
+def test_closed_queue_hands_items_back():
+    dropped = []
+    queue = StageQueue('q', 1, 'block', on_drop=dropped.append)
+    queue.close()
+    assert not queue.put('a')
+    assert dropped == ['a']
+
+
+def test_from_env_overrides_policy_and_size(monkeypatch):
+    monkeypatch.setenv('TRICHSHOT_RENDER_QUEUE', 'drop_newest:3')
+    queue = StageQueue.from_env('render', 1, 'drop_oldest')
+    assert (queue.policy, queue.maxsize) == ('drop_newest', 3)
+
+
+@pytest.mark.parametrize('setting', ['dropoldest', '2', 'drop_newest:x', 'block:0'])
+def test_from_env_ignores_invalid_settings(monkeypatch, capsys, setting):
+    monkeypatch.setenv('TRICHSHOT_RENDER_QUEUE', setting)
+    queue = StageQueue.from_env('render', 1, 'drop_oldest')
+    assert (queue.policy, queue.maxsize) == ('drop_oldest', 1)
+    assert 'Ignoring invalid TRICHSHOT_RENDER_QUEUE' in capsys.readouterr().out
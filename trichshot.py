@@ -5,148 +5,3267 @@ A real-time hand detection system that warns when hands are near the face area.
 Featuring smart camera detection and external camera prioritization.
 """
 
+import time
+STARTED_AT = time.perf_counter()  # Reference point for the reported startup time
+
 import cv2
 import mediapipe as mp
 import numpy as np
-import tkinter as tk
-from tkinter import ttk
 import threading
-import time
+import multiprocessing
+from multiprocessing import shared_memory
+import tracemalloc
+import traceback
 import os
+import sys
+import copy
+import json
+import signal
+import socket
 import subprocess
+from collections import deque
+import ctypes
+import mmap
+import select
 from typing import Optional, Tuple, List, Dict
 
-class CameraDetector:
-    """Handles camera detection and prioritization"""
-    
-    @staticmethod
-    def get_camera_info(camera_index: int) -> Dict:
-        """Get detailed camera information"""
-        info = {
-            'index': camera_index,
-            'name': 'Unknown',
-            'is_external': False,
-            'resolution': None,
-            'working': False
+try:
+    import fcntl  # Linux/macOS only; the native V4L2 backend needs it
+except ImportError:
+    fcntl = None
+
+try:
+    import resource  # Unix only; peak RSS for the session report
+except ImportError:
+    resource = None
+
+# tkinter is imported by load_tk() only when the GUI is built, so headless
+# runs never load Tk
+tk = None
+ttk = None
+
+def load_tk():
+    """Import tkinter and ttk into the module namespace"""
+    global tk, ttk
+    if tk is None:
+        import tkinter
+        from tkinter import ttk as tkinter_ttk
+        tk, ttk = tkinter, tkinter_ttk
+
+def resource_usage() -> Dict:
+    """Current and peak resident set size of this process in MB"""
+    usage = {'rss_mb': float('nan'), 'peak_rss_mb': float('nan')}
+    try:
+        with open('/proc/self/statm') as f:
+            usage['rss_mb'] = int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE') / 2**20
+    except (OSError, ValueError):
+        pass
+    if resource:
+        # ru_maxrss is in KB on Linux, bytes on macOS
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        usage['peak_rss_mb'] = peak / (2**20 if sys.platform == 'darwin' else 2**10)
+    return usage
+
+# V4L2 ABI (linux/videodev2.h) for the native mmap capture backend
+V4L2_BUF_TYPE_VIDEO_CAPTURE = 1
+V4L2_MEMORY_MMAP = 1
+V4L2_FIELD_ANY = 0
+V4L2_CAP_VIDEO_CAPTURE = 0x00000001
+V4L2_CAP_STREAMING = 0x04000000
+V4L2_CAP_DEVICE_CAPS = 0x80000000
+V4L2_BUF_FLAG_TIMESTAMP_MASK = 0x0000e000
+V4L2_BUF_FLAG_TIMESTAMP_MONOTONIC = 0x00002000
+
+class _V4L2Capability(ctypes.Structure):
+    _fields_ = [
+        ('driver', ctypes.c_char * 16),
+        ('card', ctypes.c_char * 32),
+        ('bus_info', ctypes.c_char * 32),
+        ('version', ctypes.c_uint32),
+        ('capabilities', ctypes.c_uint32),
+        ('device_caps', ctypes.c_uint32),
+        ('reserved', ctypes.c_uint32 * 3),
+    ]
+
+class _V4L2PixFormat(ctypes.Structure):
+    _fields_ = [(name, ctypes.c_uint32) for name in (
+        'width', 'height', 'pixelformat', 'field', 'bytesperline', 'sizeimage',
+        'colorspace', 'priv', 'flags', 'ycbcr_enc', 'quantization', 'xfer_func'
+    )]
+
+class _V4L2FormatUnion(ctypes.Union):
+    # The kernel union contains pointers, so it is pointer-aligned
+    _fields_ = [('pix', _V4L2PixFormat), ('raw_data', ctypes.c_char * 200), ('_align', ctypes.c_void_p)]
+
+class _V4L2Format(ctypes.Structure):
+    _fields_ = [('type', ctypes.c_uint32), ('fmt', _V4L2FormatUnion)]
+
+class _V4L2Fract(ctypes.Structure):
+    _fields_ = [('numerator', ctypes.c_uint32), ('denominator', ctypes.c_uint32)]
+
+class _V4L2CaptureParm(ctypes.Structure):
+    _fields_ = [
+        ('capability', ctypes.c_uint32),
+        ('capturemode', ctypes.c_uint32),
+        ('timeperframe', _V4L2Fract),
+        ('extendedmode', ctypes.c_uint32),
+        ('readbuffers', ctypes.c_uint32),
+        ('reserved', ctypes.c_uint32 * 4),
+    ]
+
+class _V4L2StreamParmUnion(ctypes.Union):
+    _fields_ = [('capture', _V4L2CaptureParm), ('raw_data', ctypes.c_char * 200)]
+
+class _V4L2StreamParm(ctypes.Structure):
+    _fields_ = [('type', ctypes.c_uint32), ('parm', _V4L2StreamParmUnion)]
+
+class _V4L2RequestBuffers(ctypes.Structure):
+    _fields_ = [
+        ('count', ctypes.c_uint32),
+        ('type', ctypes.c_uint32),
+        ('memory', ctypes.c_uint32),
+        ('capabilities', ctypes.c_uint32),
+        ('flags', ctypes.c_uint8),
+        ('reserved', ctypes.c_uint8 * 3),
+    ]
+
+class _V4L2Timecode(ctypes.Structure):
+    _fields_ = [
+        ('type', ctypes.c_uint32),
+        ('flags', ctypes.c_uint32),
+        ('frames', ctypes.c_uint8),
+        ('seconds', ctypes.c_uint8),
+        ('minutes', ctypes.c_uint8),
+        ('hours', ctypes.c_uint8),
+        ('userbits', ctypes.c_uint8 * 4),
+    ]
+
+class _Timeval(ctypes.Structure):
+    _fields_ = [('tv_sec', ctypes.c_long), ('tv_usec', ctypes.c_long)]
+
+class _V4L2BufferM(ctypes.Union):
+    _fields_ = [
+        ('offset', ctypes.c_uint32),
+        ('userptr', ctypes.c_ulong),
+        ('planes', ctypes.c_void_p),
+        ('fd', ctypes.c_int32),
+    ]
+
+class _V4L2Buffer(ctypes.Structure):
+    _fields_ = [
+        ('index', ctypes.c_uint32),
+        ('type', ctypes.c_uint32),
+        ('bytesused', ctypes.c_uint32),
+        ('flags', ctypes.c_uint32),
+        ('field', ctypes.c_uint32),
+        ('timestamp', _Timeval),
+        ('timecode', _V4L2Timecode),
+        ('sequence', ctypes.c_uint32),
+        ('memory', ctypes.c_uint32),
+        ('m', _V4L2BufferM),
+        ('length', ctypes.c_uint32),
+        ('reserved2', ctypes.c_uint32),
+        ('request_fd', ctypes.c_int32),
+    ]
+
+def _v4l2_ioctl_code(direction: int, nr: int, struct_type) -> int:
+    """Build a VIDIOC_* request number (_IOC with type 'V')"""
+    return (direction << 30) | (ctypes.sizeof(struct_type) << 16) | (ord('V') << 8) | nr
+
+_IOC_WRITE = 1
+_IOC_READ = 2
+VIDIOC_QUERYCAP = _v4l2_ioctl_code(_IOC_READ, 0, _V4L2Capability)
+VIDIOC_G_FMT = _v4l2_ioctl_code(_IOC_READ | _IOC_WRITE, 4, _V4L2Format)
+VIDIOC_S_FMT = _v4l2_ioctl_code(_IOC_READ | _IOC_WRITE, 5, _V4L2Format)
+VIDIOC_REQBUFS = _v4l2_ioctl_code(_IOC_READ | _IOC_WRITE, 8, _V4L2RequestBuffers)
+VIDIOC_QUERYBUF = _v4l2_ioctl_code(_IOC_READ | _IOC_WRITE, 9, _V4L2Buffer)
+VIDIOC_QBUF = _v4l2_ioctl_code(_IOC_READ | _IOC_WRITE, 15, _V4L2Buffer)
+VIDIOC_DQBUF = _v4l2_ioctl_code(_IOC_READ | _IOC_WRITE, 17, _V4L2Buffer)
+VIDIOC_STREAMON = _v4l2_ioctl_code(_IOC_WRITE, 18, ctypes.c_int)
+VIDIOC_STREAMOFF = _v4l2_ioctl_code(_IOC_WRITE, 19, ctypes.c_int)
+VIDIOC_G_PARM = _v4l2_ioctl_code(_IOC_READ | _IOC_WRITE, 21, _V4L2StreamParm)
+VIDIOC_S_PARM = _v4l2_ioctl_code(_IOC_READ | _IOC_WRITE, 22, _V4L2StreamParm)
+
+class V4L2Capture:
+    """Native V4L2 capture backend using mmap'd driver buffers.
+
+    Exposes the subset of the cv2.VideoCapture API the app uses (isOpened,
+    read, get, set, release), so it can be swapped in per camera. Frames are
+    dequeued with VIDIOC_DQBUF after poll() on the device and wrapped as NumPy
+    views of the mmap'd buffers, so nothing is allocated or copied before the
+    single colour conversion into the caller's reused BGR buffer.
+    """
+
+    BUFFER_COUNT = 4
+    SUPPORTED_FOURCCS = ('YUYV', 'MJPG')
+
+    def __init__(self, camera_index: int, buffer_count: int = BUFFER_COUNT):
+        self.device = f'/dev/video{camera_index}'
+        self.buffer_count = buffer_count
+        self.fd = -1
+        self.poller = None
+        self.streaming = False
+        self.buffers = []  # (mmap, uint8 view) per driver buffer
+        self._lent = None  # v4l2_buffer handed out by read_raw(), requeued on next read
+
+        # Current format, refreshed from the driver after every change
+        self.width = 0
+        self.height = 0
+        self.bytesperline = 0
+        self.pixelformat = 0
+        self.fps = 0.0
+
+        # Driver timestamp (CLOCK_MONOTONIC seconds) and sequence of the last frame
+        self.frame_timestamp = None
+        self.frame_sequence = 0
+
+        if fcntl is None:
+            return
+        try:
+            self.fd = os.open(self.device, os.O_RDWR | os.O_NONBLOCK)
+            caps = _V4L2Capability()
+            fcntl.ioctl(self.fd, VIDIOC_QUERYCAP, caps)
+            device_caps = caps.device_caps if caps.capabilities & V4L2_CAP_DEVICE_CAPS else caps.capabilities
+            if not (device_caps & V4L2_CAP_VIDEO_CAPTURE and device_caps & V4L2_CAP_STREAMING):
+                raise OSError(f"{self.device} does not support streaming capture")
+            self.poller = select.poll()
+            self.poller.register(self.fd, select.POLLIN)
+            self._refresh_format()
+        except OSError as e:
+            print(f"V4L2 backend could not open {self.device}: {e}")
+            self.release()
+
+    @staticmethod
+    def is_supported(camera_index: int) -> bool:
+        """Check whether the device can be driven by the native backend"""
+        if fcntl is None or not os.path.exists(f'/dev/video{camera_index}'):
+            return False
+        cap = V4L2Capture(camera_index)
+        supported = cap.isOpened() and cap.fourcc in V4L2Capture.SUPPORTED_FOURCCS
+        cap.release()
+        return supported
+
+    @property
+    def fourcc(self) -> str:
+        return CameraDetector.decode_fourcc(self.pixelformat)
+
+    def isOpened(self) -> bool:
+        return self.fd >= 0
+
+    def _refresh_format(self):
+        """Read the current format and frame interval back from the driver"""
+        fmt = _V4L2Format(type=V4L2_BUF_TYPE_VIDEO_CAPTURE)
+        fcntl.ioctl(self.fd, VIDIOC_G_FMT, fmt)
+        self.width = fmt.fmt.pix.width
+        self.height = fmt.fmt.pix.height
+        self.bytesperline = fmt.fmt.pix.bytesperline
+        self.pixelformat = fmt.fmt.pix.pixelformat
+
+        parm = _V4L2StreamParm(type=V4L2_BUF_TYPE_VIDEO_CAPTURE)
+        try:
+            fcntl.ioctl(self.fd, VIDIOC_G_PARM, parm)
+            interval = parm.parm.capture.timeperframe
+            self.fps = interval.denominator / interval.numerator if interval.numerator else 0.0
+        except OSError:
+            self.fps = 0.0
+
+    def _set_format(self, width: int, height: int, pixelformat: int):
+        fmt = _V4L2Format(type=V4L2_BUF_TYPE_VIDEO_CAPTURE)
+        fmt.fmt.pix.width = width
+        fmt.fmt.pix.height = height
+        fmt.fmt.pix.pixelformat = pixelformat
+        fmt.fmt.pix.field = V4L2_FIELD_ANY
+        fcntl.ioctl(self.fd, VIDIOC_S_FMT, fmt)
+
+    def _set_fps(self, fps: float):
+        parm = _V4L2StreamParm(type=V4L2_BUF_TYPE_VIDEO_CAPTURE)
+        parm.parm.capture.timeperframe.numerator = 1000
+        parm.parm.capture.timeperframe.denominator = int(round(fps * 1000))
+        fcntl.ioctl(self.fd, VIDIOC_S_PARM, parm)
+
+    def set(self, prop: int, value: float) -> bool:
+        """Change width, height, FPS or FOURCC (restarts the stream if needed)"""
+        if not self.isOpened():
+            return False
+        # Buffers are sized for the current format, so drop them first
+        self._stop_streaming()
+        try:
+            if prop == cv2.CAP_PROP_FRAME_WIDTH:
+                self._set_format(int(value), self.height, self.pixelformat)
+            elif prop == cv2.CAP_PROP_FRAME_HEIGHT:
+                self._set_format(self.width, int(value), self.pixelformat)
+            elif prop == cv2.CAP_PROP_FOURCC:
+                self._set_format(self.width, self.height, int(value))
+            elif prop == cv2.CAP_PROP_FPS:
+                self._set_fps(value)
+            else:
+                return False
+            return True
+        except OSError as e:
+            print(f"V4L2 backend could not set property {prop} on {self.device}: {e}")
+            return False
+        finally:
+            self._refresh_format()
+
+    def get(self, prop: int) -> float:
+        if prop == cv2.CAP_PROP_FRAME_WIDTH:
+            return float(self.width)
+        if prop == cv2.CAP_PROP_FRAME_HEIGHT:
+            return float(self.height)
+        if prop == cv2.CAP_PROP_FPS:
+            return float(self.fps)
+        if prop == cv2.CAP_PROP_FOURCC:
+            return float(self.pixelformat)
+        if prop == cv2.CAP_PROP_BUFFERSIZE:
+            return float(self.buffer_count)
+        return 0.0
+
+    def _start_streaming(self):
+        """Request, map and queue the driver buffers, then start the stream"""
+        request = _V4L2RequestBuffers(count=self.buffer_count, type=V4L2_BUF_TYPE_VIDEO_CAPTURE,
+                                      memory=V4L2_MEMORY_MMAP)
+        fcntl.ioctl(self.fd, VIDIOC_REQBUFS, request)
+
+        for index in range(request.count):
+            buf = _V4L2Buffer(index=index, type=V4L2_BUF_TYPE_VIDEO_CAPTURE, memory=V4L2_MEMORY_MMAP)
+            fcntl.ioctl(self.fd, VIDIOC_QUERYBUF, buf)
+            mapped = mmap.mmap(self.fd, buf.length, mmap.MAP_SHARED,
+                               mmap.PROT_READ | mmap.PROT_WRITE, offset=buf.m.offset)
+            self.buffers.append((mapped, np.frombuffer(mapped, dtype=np.uint8)))
+            fcntl.ioctl(self.fd, VIDIOC_QBUF, buf)
+
+        fcntl.ioctl(self.fd, VIDIOC_STREAMON, ctypes.c_int(V4L2_BUF_TYPE_VIDEO_CAPTURE))
+        self.streaming = True
+
+    def _stop_streaming(self):
+        """Stop the stream and unmap the driver buffers"""
+        if not self.streaming:
+            return
+        self.streaming = False
+        self._lent = None
+        try:
+            fcntl.ioctl(self.fd, VIDIOC_STREAMOFF, ctypes.c_int(V4L2_BUF_TYPE_VIDEO_CAPTURE))
+        except OSError:
+            pass
+
+        while self.buffers:
+            mapped, view = self.buffers.pop()
+            del view  # Drop our export of the mapping so it can be closed
+            try:
+                mapped.close()
+            except BufferError:
+                pass  # A caller still holds a view; the mapping goes away with it
+
+        try:
+            fcntl.ioctl(self.fd, VIDIOC_REQBUFS, _V4L2RequestBuffers(
+                count=0, type=V4L2_BUF_TYPE_VIDEO_CAPTURE, memory=V4L2_MEMORY_MMAP))
+        except OSError:
+            pass
+
+    def _requeue(self):
+        """Give the buffer lent out by the previous read back to the driver"""
+        if self._lent is not None:
+            fcntl.ioctl(self.fd, VIDIOC_QBUF, self._lent)
+            self._lent = None
+
+    def read_raw(self, timeout: float = 1.0) -> Tuple[bool, Optional[np.ndarray], float]:
+        """Return (ok, raw_view, timestamp) without copying the frame.
+
+        raw_view is a view of the driver's mmap'd buffer in the native pixel
+        format; it stays valid until the next read.
+        """
+        if not self.isOpened():
+            return False, None, 0.0
+        try:
+            if not self.streaming:
+                self._start_streaming()
+            self._requeue()
+
+            if not self.poller.poll(int(timeout * 1000)):
+                return False, None, 0.0
+
+            buf = _V4L2Buffer(type=V4L2_BUF_TYPE_VIDEO_CAPTURE, memory=V4L2_MEMORY_MMAP)
+            fcntl.ioctl(self.fd, VIDIOC_DQBUF, buf)
+        except OSError as e:
+            print(f"V4L2 capture error on {self.device}: {e}")
+            return False, None, 0.0
+
+        self._lent = buf
+        if buf.flags & V4L2_BUF_FLAG_TIMESTAMP_MASK == V4L2_BUF_FLAG_TIMESTAMP_MONOTONIC:
+            self.frame_timestamp = buf.timestamp.tv_sec + buf.timestamp.tv_usec / 1e6
+        else:
+            self.frame_timestamp = time.monotonic()
+        self.frame_sequence = buf.sequence
+        return True, self.buffers[buf.index][1][:buf.bytesused], self.frame_timestamp
+
+    def read(self, image: Optional[np.ndarray] = None) -> Tuple[bool, Optional[np.ndarray]]:
+        """Return (ok, bgr_frame), converting into image when it has the right shape"""
+        ret, raw, _ = self.read_raw()
+        if not ret:
+            return False, None
+
+        try:
+            if self.fourcc == 'YUYV':
+                if image is None or image.shape != (self.height, self.width, 3):
+                    image = np.empty((self.height, self.width, 3), dtype=np.uint8)
+                # Strided view that skips any row padding, still without a copy
+                rows = raw[:self.height * self.bytesperline].reshape(self.height, self.bytesperline)
+                yuyv = rows[:, :self.width * 2].reshape(self.height, self.width, 2)
+                cv2.cvtColor(yuyv, cv2.COLOR_YUV2BGR_YUYV, dst=image)
+            elif self.fourcc == 'MJPG':
+                image = cv2.imdecode(raw, cv2.IMREAD_COLOR)
+            else:
+                print(f"V4L2 backend does not support pixel format {self.fourcc}")
+                return False, None
+        finally:
+            # The pixels have been converted, so the driver can refill the buffer now
+            self._requeue()
+
+        return image is not None, image
+
+    def release(self):
+        """Stop streaming and close the device"""
+        if self.fd < 0:
+            return
+        self._stop_streaming()
+        os.close(self.fd)
+        self.fd = -1
+        self.poller = None
+
+class CameraDetector:
+    """Handles camera detection and prioritization"""
+    
+    # Pixel formats worth benchmarking, in order of preference on ties
+    CANDIDATE_FOURCCS = ['MJPG', 'YUYV']
+    BENCHMARK_FRAMES = 20
+    
+    @staticmethod
+    def decode_fourcc(value: float) -> str:
+        """Convert a CAP_PROP_FOURCC value into its four-character code"""
+        code = int(value)
+        return ''.join(chr((code >> (8 * i)) & 0xFF) for i in range(4)).strip('\x00')
+    
+    @staticmethod
+    def list_pixel_formats(camera_index: int) -> List[str]:
+        """List the FOURCCs the camera advertises, falling back to the candidates"""
+        formats = []
+        try:
+            result = subprocess.run(
+                ['v4l2-ctl', '--device', f'/dev/video{camera_index}', '--list-formats'],
+                capture_output=True, text=True, timeout=5
+            )
+            if result.returncode == 0:
+                # Lines look like: [0]: 'YUYV' (YUYV 4:2:2)
+                for line in result.stdout.split('\n'):
+                    if "'" in line:
+                        fourcc = line.split("'")[1]
+                        if fourcc and fourcc not in formats:
+                            formats.append(fourcc)
+        except (subprocess.TimeoutExpired, FileNotFoundError):
+            pass
+        
+        candidates = [f for f in CameraDetector.CANDIDATE_FOURCCS if f in formats]
+        return candidates or list(CameraDetector.CANDIDATE_FOURCCS)
+    
+    @staticmethod
+    def benchmark_pixel_format(camera_index: int, fourcc: str,
+                               profile: Optional['CaptureProfile'] = None) -> Optional[Dict]:
+        """Measure sustained FPS and CPU cost per frame for one pixel format"""
+        cap = cv2.VideoCapture(camera_index)
+        try:
+            if not cap.isOpened():
+                return None
+            
+            if profile:
+                # Resolution and FPS from a copy of the profile: its own FOURCC
+                # (an earlier session's choice) must not replace the candidate,
+                # and its granted settings must not be overwritten
+                trial = copy.copy(profile)
+                trial.fourcc = fourcc
+                trial.apply(cap, quiet=True)
+            else:
+                cap.set(cv2.CAP_PROP_FOURCC, cv2.VideoWriter_fourcc(*fourcc))
+            
+            granted = CameraDetector.decode_fourcc(cap.get(cv2.CAP_PROP_FOURCC))
+            if granted != fourcc:
+                return None
+            
+            # Warm up: the first frames include stream start-up latency
+            for _ in range(3):
+                ret, frame = cap.read()
+                if not ret:
+                    return None
+            
+            frames = 0
+            wall_start = time.perf_counter()
+            cpu_start = time.process_time()
+            for _ in range(CameraDetector.BENCHMARK_FRAMES):
+                ret, frame = cap.read(frame)
+                if not ret:
+                    break
+                frames += 1
+            wall = time.perf_counter() - wall_start
+            cpu = time.process_time() - cpu_start
+            
+            if frames == 0 or wall <= 0:
+                return None
+            
+            fps = frames / wall
+            cpu_ms = max(cpu * 1000.0 / frames, 0.1)  # Clamp timer granularity
+            return {
+                'fourcc': fourcc,
+                'fps': fps,
+                'cpu_ms_per_frame': cpu_ms,
+                'score': fps / cpu_ms,  # Sustained FPS per CPU-millisecond
+                'resolution': (frame.shape[1], frame.shape[0]),
+            }
+        except cv2.error as e:
+            print(f"Error benchmarking {fourcc} on camera {camera_index}: {e}")
+            return None
+        finally:
+            cap.release()
+    
+    @staticmethod
+    def select_pixel_format(camera_index: int,
+                            profile: Optional['CaptureProfile'] = None) -> Tuple[Optional[str], List[Dict]]:
+        """Benchmark every supported format and return the most efficient one"""
+        forced = os.environ.get('TRICHSHOT_FOURCC', 'auto').upper()
+        if forced == 'OFF':
+            return None, []
+        if forced != 'AUTO':
+            if len(forced) == 4:
+                return forced, []
+            print(f"Ignoring invalid TRICHSHOT_FOURCC '{forced}' (expected 4 characters, auto or off)")
+        
+        results = []
+        for fourcc in CameraDetector.list_pixel_formats(camera_index):
+            result = CameraDetector.benchmark_pixel_format(camera_index, fourcc, profile)
+            if result:
+                results.append(result)
+        
+        if not results:
+            return None, []
+        
+        best = max(results, key=lambda r: r['score'])
+        return best['fourcc'], results
+    
+    @staticmethod
+    def select_backend(camera_index: int, fourcc: Optional[str]) -> str:
+        """Pick the capture backend (TRICHSHOT_CAPTURE_BACKEND=opencv|v4l2|auto)"""
+        requested = os.environ.get('TRICHSHOT_CAPTURE_BACKEND', 'opencv').lower()
+        if requested not in ('v4l2', 'auto'):
+            return 'opencv'
+        if fourcc and fourcc not in V4L2Capture.SUPPORTED_FOURCCS:
+            return 'opencv'
+        if V4L2Capture.is_supported(camera_index):
+            return 'v4l2'
+        if requested == 'v4l2':
+            print(f"Native V4L2 backend unavailable for camera {camera_index}, using OpenCV")
+        return 'opencv'
+    
+    @staticmethod
+    def open_capture(camera_index: int, backend: str = 'opencv'):
+        """Open a camera with the given backend ('opencv' or 'v4l2')"""
+        if backend == 'v4l2':
+            return V4L2Capture(camera_index)
+        return cv2.VideoCapture(camera_index)
+    
+    @staticmethod
+    def get_camera_info(camera_index: int, profile: Optional['CaptureProfile'] = None) -> Dict:
+        """Get detailed camera information"""
+        info = {
+            'index': camera_index,
+            'name': 'Unknown',
+            'is_external': False,
+            'resolution': None,
+            'working': False,
+            'fourcc': None,
+            'format_benchmarks': [],
+            'backend': 'opencv'
+        }
+        
+        try:
+            # Try to get camera name from v4l2
+            if os.path.exists(f'/dev/video{camera_index}'):
+                try:
+                    result = subprocess.run(
+                        ['v4l2-ctl', '--device', f'/dev/video{camera_index}', '--info'],
+                        capture_output=True, text=True, timeout=5
+                    )
+                    if result.returncode == 0:
+                        for line in result.stdout.split('\n'):
+                            if 'Card type' in line:
+                                info['name'] = line.split(':')[1].strip()
+                                break
+                except (subprocess.TimeoutExpired, FileNotFoundError):
+                    pass
+            
+            # Test camera functionality
+            cap = cv2.VideoCapture(camera_index)
+            if cap.isOpened():
+                ret, frame = cap.read()
+                if ret and frame is not None:
+                    info['working'] = True
+                    info['resolution'] = (int(cap.get(cv2.CAP_PROP_FRAME_WIDTH)), 
+                                        int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT)))
+                cap.release()
+            
+            # Pick the pixel format with the best throughput per CPU cost
+            if info['working']:
+                info['fourcc'], info['format_benchmarks'] = \
+                    CameraDetector.select_pixel_format(camera_index, profile)
+                info['backend'] = CameraDetector.select_backend(camera_index, info['fourcc'])
+                
+        except Exception as e:
+            print(f"Error checking camera {camera_index}: {e}")
+            
+        # Heuristics to determine if camera is external
+        name_lower = info['name'].lower()
+        external_indicators = [
+            'usb', 'logitech', 'microsoft', 'creative', 'webcam', 
+            'external', 'hd pro', 'c920', 'c922', 'c930', 'c270'
+        ]
+        integrated_indicators = [
+            'integrated', 'built-in', 'internal', 'laptop', 'chicony', 
+            'realtek', 'asus', 'hp truevision', 'lenovo', 'dell'
+        ]
+        
+        if any(indicator in name_lower for indicator in external_indicators):
+            info['is_external'] = True
+        elif any(indicator in name_lower for indicator in integrated_indicators):
+            info['is_external'] = False
+        else:
+            # If we can't determine from name, higher indices are more likely external
+            info['is_external'] = camera_index > 0
+            
+        return info
+    
+    @staticmethod
+    def find_available_cameras(profile: Optional['CaptureProfile'] = None) -> List[Dict]:
+        """Find all available cameras and return sorted by preference"""
+        cameras = []
+        
+        # Check common camera indices
+        for i in range(10):  # Check /dev/video0 through /dev/video9
+            if os.path.exists(f'/dev/video{i}'):
+                camera_info = CameraDetector.get_camera_info(i, profile)
+                if camera_info['working']:
+                    cameras.append(camera_info)
+        
+        # Sort cameras: external cameras first, then by index
+        cameras.sort(key=lambda x: (not x['is_external'], x['index']))
+        
+        return cameras
+    
+    @staticmethod
+    def get_preferred_camera() -> Optional[int]:
+        """Get the most preferred camera index"""
+        cameras = CameraDetector.find_available_cameras()
+        return cameras[0]['index'] if cameras else None
+
+class CaptureProfile:
+    """Capture resolution/FPS, inference frame skip, the sizes frames are
+    downscaled to for inference and for the preview, and the preview rate.
+
+    Defaults come from the TRICHSHOT_DEFAULT_* variables exported by
+    run_trichshot.sh --performance-mode; anything unset is left to the driver.
+    Inference and preview sizes (TRICHSHOT_INFERENCE_RESOLUTION,
+    TRICHSHOT_PREVIEW_RESOLUTION) default to the capture size. The preview
+    is capped at TRICHSHOT_PREVIEW_FPS (default 15, 0 for no cap)
+    independently of the detection rate. Without TRICHSHOT_DEFAULT_*
+    settings, the host's cached calibration (ProfileCalibrator) supplies
+    resolution, FPS, frame skip and model complexity.
+    """
+
+    def __init__(self, width: Optional[int] = None, height: Optional[int] = None,
+                 fps: Optional[float] = None, frame_skip: int = 1,
+                 fourcc: Optional[str] = None,
+                 inference_size: Optional[Tuple[int, int]] = None,
+                 preview_size: Optional[Tuple[int, int]] = None,
+                 preview_fps: float = 15.0, model_complexity: Optional[int] = None):
+        self.width = width
+        self.height = height
+        self.fps = fps
+        self.frame_skip = max(1, int(frame_skip))
+        self.fourcc = fourcc
+        self.inference_size = inference_size
+        self.preview_size = preview_size
+        self.preview_fps = max(0.0, preview_fps)
+        self.model_complexity = model_complexity  # None: the app's default
+        # What the driver actually granted, filled in by apply()
+        self.granted = {}
+
+    @staticmethod
+    def parse_resolution(variable: str) -> Optional[Tuple[int, int]]:
+        """Read a WxH environment variable"""
+        resolution = os.environ.get(variable)
+        if not resolution:
+            return None
+        try:
+            width, height = (int(v) for v in resolution.lower().split('x'))
+        except ValueError:
+            print(f"Ignoring invalid {variable} '{resolution}' (expected WxH)")
+            return None
+        return width, height
+
+    @classmethod
+    def from_env(cls) -> 'CaptureProfile':
+        """Build a profile from TRICHSHOT_DEFAULT_FPS/RESOLUTION/SKIP (or the
+        calibration cache), the TRICHSHOT_INFERENCE/PREVIEW_RESOLUTION sizes
+        and TRICHSHOT_PREVIEW_FPS"""
+        width, height = cls.parse_resolution('TRICHSHOT_DEFAULT_RESOLUTION') or (None, None)
+        fps = None
+        frame_skip = 1
+        model_complexity = None
+
+        fps_value = os.environ.get('TRICHSHOT_DEFAULT_FPS')
+        if fps_value:
+            try:
+                fps = float(fps_value)
+            except ValueError:
+                print(f"Ignoring invalid TRICHSHOT_DEFAULT_FPS '{fps_value}'")
+
+        skip_value = os.environ.get('TRICHSHOT_DEFAULT_SKIP')
+        if skip_value:
+            try:
+                frame_skip = int(skip_value)
+            except ValueError:
+                print(f"Ignoring invalid TRICHSHOT_DEFAULT_SKIP '{skip_value}'")
+
+        calibrated = None if ProfileCalibrator.overridden() else ProfileCalibrator.load()
+        if calibrated:
+            width, height = calibrated['width'], calibrated['height']
+            fps = calibrated['fps']
+            frame_skip = calibrated['frame_skip']
+            model_complexity = calibrated['model_complexity']
+            print(f"Using calibrated profile {width}x{height}@{fps:g}, frame skip {frame_skip}, "
+                  f"complexity {model_complexity} ({ProfileCalibrator.cache_path()})")
+
+        preview_fps = 15.0
+        preview_fps_value = os.environ.get('TRICHSHOT_PREVIEW_FPS')
+        if preview_fps_value:
+            try:
+                preview_fps = float(preview_fps_value)
+            except ValueError:
+                print(f"Ignoring invalid TRICHSHOT_PREVIEW_FPS '{preview_fps_value}'")
+
+        return cls(width, height, fps, frame_skip,
+                   inference_size=cls.parse_resolution('TRICHSHOT_INFERENCE_RESOLUTION'),
+                   preview_size=cls.parse_resolution('TRICHSHOT_PREVIEW_RESOLUTION'),
+                   preview_fps=preview_fps, model_complexity=model_complexity)
+
+    def apply(self, cap, quiet: bool = False) -> Dict:
+        """Request the profile from the driver and record what was granted"""
+        # The pixel format has to be set before the resolution on V4L2
+        if self.fourcc:
+            cap.set(cv2.CAP_PROP_FOURCC, cv2.VideoWriter_fourcc(*self.fourcc))
+        if self.width and self.height:
+            cap.set(cv2.CAP_PROP_FRAME_WIDTH, self.width)
+            cap.set(cv2.CAP_PROP_FRAME_HEIGHT, self.height)
+        if self.fps:
+            cap.set(cv2.CAP_PROP_FPS, self.fps)
+
+        self.granted = {
+            'width': int(cap.get(cv2.CAP_PROP_FRAME_WIDTH)),
+            'height': int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT)),
+            'fps': cap.get(cv2.CAP_PROP_FPS),
+            'fourcc': CameraDetector.decode_fourcc(cap.get(cv2.CAP_PROP_FOURCC)),
+        }
+
+        if quiet:
+            return self.granted
+        if self.fourcc and self.granted['fourcc'] != self.fourcc:
+            print(f"Requested pixel format {self.fourcc}, camera granted {self.granted['fourcc'] or 'unknown'}")
+        if self.width and self.height and (self.granted['width'], self.granted['height']) != (self.width, self.height):
+            print(f"Requested {self.width}x{self.height}, camera granted "
+                  f"{self.granted['width']}x{self.granted['height']}")
+        if self.fps and self.granted['fps'] and abs(self.granted['fps'] - self.fps) > 0.5:
+            print(f"Requested {self.fps:g} FPS, camera granted {self.granted['fps']:g} FPS")
+
+        return self.granted
+
+    def describe(self) -> str:
+        """Short human-readable summary of the granted settings"""
+        if not self.granted:
+            return "driver defaults"
+        fps = f"@{self.granted['fps']:g}" if self.granted['fps'] else ""
+        fourcc = f" {self.granted['fourcc']}" if self.granted['fourcc'] else ""
+        text = (f"{self.granted['width']}x{self.granted['height']}{fps}{fourcc}, "
+                f"inference every {self.frame_skip} frame(s)")
+        if self.inference_size:
+            text += f" at {self.inference_size[0]}x{self.inference_size[1]}"
+        return text
+
+class BufferRing:
+    """Round-robin set of preallocated frame buffers.
+
+    A buffer returned by next() is handed out again `count` calls later,
+    whether or not its user is done with it, so a ring is only safe for a
+    caller that finishes with each buffer within those calls on its own
+    thread (e.g. a synchronous cvtColor -> process()). Buffers shared with
+    another thread, behind a queue that can drop items, need BufferPool.
+    Buffers are only reallocated when the requested shape changes.
+    """
+
+    def __init__(self, count: int):
+        self.buffers = [None] * max(1, count)
+        self.index = 0
+
+    def next(self, shape: Tuple[int, ...], dtype=np.uint8) -> np.ndarray:
+        buffer = self.buffers[self.index]
+        if buffer is None or buffer.shape != shape or buffer.dtype != dtype:
+            buffer = self.buffers[self.index] = np.empty(shape, dtype=dtype)
+        self.index = (self.index + 1) % len(self.buffers)
+        return buffer
+
+class BufferPool:
+    """Preallocated frame buffers that are reused only after release().
+
+    For buffers handed from one thread to another: while every buffer is
+    out, acquire() returns None and the producer skips the frame instead of
+    overwriting one the consumer may still be reading.
+    """
+
+    def __init__(self, count: int):
+        self.lock = threading.Lock()
+        self.free = [None] * max(1, count)
+
+    def acquire(self, shape: Tuple[int, ...], dtype=np.uint8) -> Optional[np.ndarray]:
+        with self.lock:
+            if not self.free:
+                return None
+            buffer = self.free.pop()
+        if buffer is None or buffer.shape != shape or buffer.dtype != dtype:
+            buffer = np.empty(shape, dtype=dtype)
+        return buffer
+
+    def release(self, buffer: np.ndarray):
+        with self.lock:
+            self.free.append(buffer)
+
+class FrameScaler:
+    """Downscales frames to fit within a target size, into a reused buffer.
+
+    The aspect ratio is kept, so normalized landmarks found on the scaled
+    frame apply unchanged to the original. Frames that already fit are
+    passed through without a copy.
+    """
+
+    def __init__(self, size: Optional[Tuple[int, int]] = None):
+        self.size = size
+        self.buffer = None
+
+    def output_size(self, width: int, height: int) -> Tuple[int, int]:
+        """Size a width x height frame is scaled to"""
+        if not self.size:
+            return width, height
+        scale = min(self.size[0] / width, self.size[1] / height, 1.0)
+        return max(1, round(width * scale)), max(1, round(height * scale))
+
+    def scale(self, frame: np.ndarray) -> np.ndarray:
+        """Return frame downscaled into the buffer (valid until the next call)"""
+        height, width = frame.shape[:2]
+        size = self.output_size(width, height)
+        if size == (width, height):
+            return frame
+        shape = (size[1], size[0]) + frame.shape[2:]
+        if self.buffer is None or self.buffer.shape != shape:
+            self.buffer = np.empty(shape, dtype=frame.dtype)
+        cv2.resize(frame, size, dst=self.buffer, interpolation=cv2.INTER_AREA)
+        return self.buffer
+
+class FrameSource:
+    """Base class for everything that produces frames for the pipeline.
+
+    read_frame() returns (ok, frame, timestamp) and reuses the image buffer it
+    is given where possible. Offline sources number their timestamps from the
+    frame index (index / fps), so a replay always sees the same timeline; with
+    max_speed they also stop pacing to real time and deliver frames as fast as
+    they can be produced.
+    """
+
+    # Whether timestamps are on the time.monotonic() clock (live sources)
+    timestamp_is_monotonic = False
+
+    def __init__(self, fps: float = 30.0, max_speed: bool = False):
+        self.fps = fps if fps and fps > 0 else 30.0
+        self.max_speed = max_speed
+        self.frame_index = 0
+        self._start_time = None
+
+    def describe(self) -> str:
+        return self.__class__.__name__
+
+    def isOpened(self) -> bool:
+        return True
+
+    def _next_timestamp(self) -> float:
+        """Deterministic timestamp for the next frame, pacing to real time if needed"""
+        timestamp = self.frame_index / self.fps
+        self.frame_index += 1
+
+        if not self.max_speed:
+            now = time.monotonic()
+            if self._start_time is None:
+                self._start_time = now
+            delay = self._start_time + timestamp - now
+            if delay > 0:
+                time.sleep(delay)
+        return timestamp
+
+    def read_frame(self, image: Optional[np.ndarray] = None) -> Tuple[bool, Optional[np.ndarray], float]:
+        raise NotImplementedError
+
+    def release(self):
+        pass
+
+    @staticmethod
+    def from_spec(spec: str, max_speed: bool = False,
+                  profile: Optional[CaptureProfile] = None) -> 'FrameSource':
+        """Create a source from a spec string.
+
+        Accepts 'camera:N' (or just N), 'synthetic[:WxH[@FPS]]', a directory
+        of images or a video file path.
+        """
+        if spec.isdigit() or spec.startswith('camera:'):
+            return CameraFrameSource(int(spec.split(':')[-1]), profile=profile)
+        if spec.startswith('synthetic'):
+            width, height, fps = 640, 480, 30.0
+            if ':' in spec:
+                size = spec.split(':', 1)[1]
+                if '@' in size:
+                    size, fps_text = size.split('@')
+                    fps = float(fps_text)
+                width, height = (int(v) for v in size.lower().split('x'))
+            return SyntheticFrameSource(width, height, fps, max_speed=max_speed)
+        if os.path.isdir(spec):
+            return ImageSequenceFrameSource(spec, max_speed=max_speed)
+        if os.path.isfile(spec):
+            return VideoFileFrameSource(spec, max_speed=max_speed)
+        raise ValueError(f"Unknown frame source '{spec}'")
+
+class CameraFrameSource(FrameSource):
+    """Live camera through the OpenCV or native V4L2 backend"""
+
+    timestamp_is_monotonic = True
+
+    def __init__(self, camera_index: int, backend: str = 'opencv',
+                 profile: Optional[CaptureProfile] = None):
+        super().__init__()
+        self.camera_index = camera_index
+        self.backend = backend
+        self.cap = CameraDetector.open_capture(camera_index, backend)
+        if profile and self.cap.isOpened():
+            profile.apply(self.cap)
+        fps = self.cap.get(cv2.CAP_PROP_FPS) if self.cap.isOpened() else 0
+        self.fps = fps if fps > 0 else 30.0
+
+    def describe(self) -> str:
+        return f"camera {self.camera_index} ({self.backend})"
+
+    def isOpened(self) -> bool:
+        return self.cap.isOpened()
+
+    def read_frame(self, image: Optional[np.ndarray] = None) -> Tuple[bool, Optional[np.ndarray], float]:
+        ret, frame = self.cap.read(image)
+        # Prefer the driver's buffer timestamp (CLOCK_MONOTONIC) when the backend has one
+        timestamp = getattr(self.cap, 'frame_timestamp', None) or time.monotonic()
+        self.frame_index += 1
+        return ret and frame is not None, frame, timestamp
+
+    def release(self):
+        self.cap.release()
+
+class VideoFileFrameSource(FrameSource):
+    """Replays a recorded video file"""
+
+    def __init__(self, path: str, fps: Optional[float] = None, max_speed: bool = False):
+        self.path = path
+        self.cap = cv2.VideoCapture(path)
+        super().__init__(fps or self.cap.get(cv2.CAP_PROP_FPS), max_speed)
+
+    def describe(self) -> str:
+        return f"video {os.path.basename(self.path)}"
+
+    def isOpened(self) -> bool:
+        return self.cap.isOpened()
+
+    def read_frame(self, image: Optional[np.ndarray] = None) -> Tuple[bool, Optional[np.ndarray], float]:
+        ret, frame = self.cap.read(image)
+        if not ret or frame is None:
+            return False, None, 0.0
+        return True, frame, self._next_timestamp()
+
+    def release(self):
+        self.cap.release()
+
+class ImageSequenceFrameSource(FrameSource):
+    """Replays a directory of still images in file name order"""
+
+    IMAGE_EXTENSIONS = ('.png', '.jpg', '.jpeg', '.bmp')
+
+    def __init__(self, directory: str, fps: float = 30.0, max_speed: bool = False):
+        super().__init__(fps, max_speed)
+        self.directory = directory
+        self.paths = sorted(
+            os.path.join(directory, name) for name in os.listdir(directory)
+            if name.lower().endswith(self.IMAGE_EXTENSIONS)
+        )
+
+    def describe(self) -> str:
+        return f"{len(self.paths)} images in {self.directory}"
+
+    def isOpened(self) -> bool:
+        return bool(self.paths)
+
+    def read_frame(self, image: Optional[np.ndarray] = None) -> Tuple[bool, Optional[np.ndarray], float]:
+        if self.frame_index >= len(self.paths):
+            return False, None, 0.0
+        frame = cv2.imread(self.paths[self.frame_index], cv2.IMREAD_COLOR)
+        if frame is None:
+            print(f"Could not read image {self.paths[self.frame_index]}")
+            return False, None, 0.0
+        return True, frame, self._next_timestamp()
+
+class SyntheticFrameSource(FrameSource):
+    """Deterministic generated frames: a static scene with a skin-toned blob
+    that moves up into the danger zone and back down again."""
+
+    def __init__(self, width: int = 640, height: int = 480, fps: float = 30.0,
+                 frame_count: Optional[int] = None, period: float = 4.0,
+                 seed: int = 0, max_speed: bool = False):
+        super().__init__(fps, max_speed)
+        self.width = width
+        self.height = height
+        self.frame_count = frame_count
+        self.period = period
+
+        # Fixed, seeded background so every run renders identical frames
+        rng = np.random.default_rng(seed)
+        noise = rng.integers(0, 40, size=(height, width, 3), dtype=np.uint8)
+        self.background = cv2.GaussianBlur(noise, (0, 0), 3) + np.uint8(60)
+
+    def describe(self) -> str:
+        return f"synthetic {self.width}x{self.height}@{self.fps:g}"
+
+    def read_frame(self, image: Optional[np.ndarray] = None) -> Tuple[bool, Optional[np.ndarray], float]:
+        if self.frame_count is not None and self.frame_index >= self.frame_count:
+            return False, None, 0.0
+        if image is None or image.shape != self.background.shape:
+            image = np.empty_like(self.background)
+
+        timestamp = self._next_timestamp()
+        np.copyto(image, self.background)
+
+        # Blob travels between the bottom of the frame and the upper third
+        phase = 0.5 - 0.5 * np.cos(2 * np.pi * timestamp / self.period)
+        center_y = int(self.height * (0.9 - 0.6 * phase))
+        center_x = self.width // 2
+        axes = (self.width // 12, self.height // 8)
+        cv2.ellipse(image, (center_x, center_y), axes, 0, 0, 360, (140, 170, 220), -1)
+        return True, image, timestamp
+
+class LatestFrameReader:
+    """Reads frames on a dedicated thread and keeps only the newest one.
+
+    Capture, the latest-frame slot and the consumer each own preallocated
+    buffers, which are swapped under a lock instead of copied. A frame
+    returned by read() is recycled once `hold` more frames have been read,
+    so the consumer must be done with it by then (or copy it); it must not
+    pass it to other threads that keep it longer. A frame that is
+    overwritten before the consumer picks it up counts as dropped, so slow
+    inference never works through a backlog of stale frames.
+    """
+
+    def __init__(self, source: FrameSource, hold: int = 1):
+        self.source = source
+        self.hold = max(1, hold)
+        self.lock = threading.Lock()
+        self.frame_ready = threading.Condition(self.lock)
+        self.thread = None
+        self.running = False
+        self.failed = False
+
+        # Capture writes _back, _latest holds the newest complete frame and
+        # _held the frames the consumer may still be using, oldest first
+        self._back = None
+        self._latest = None
+        self._held = deque()
+        self._latest_timestamp = 0.0
+        self._latest_capture_time = 0.0
+        self._latest_seq = 0
+        self._consumed_seq = 0
+
+        # Counters
+        self.frames_captured = 0
+        self.frames_delivered = 0
+        self.frames_dropped = 0
+        self.last_frame_age = 0.0
+        self.avg_frame_age = 0.0
+
+    def start(self):
+        """Start the capture thread"""
+        self.running = True
+        self.failed = False
+        self.thread = threading.Thread(target=self._capture_loop, daemon=True)
+        self.thread.start()
+
+    def stop(self):
+        """Stop the capture thread and wake up any waiting consumer"""
+        with self.lock:
+            self.running = False
+            self.frame_ready.notify_all()
+        if self.thread and self.thread is not threading.current_thread():
+            self.thread.join(timeout=2.0)
+        self.thread = None
+
+    def _capture_loop(self):
+        """Continuously read frames into the back buffer (capture thread)"""
+        while self.running:
+            ret, frame, timestamp = self.source.read_frame(self._back)
+            if not ret:
+                with self.lock:
+                    self.failed = True
+                    self.running = False
+                    self.frame_ready.notify_all()
+                break
+
+            # Frame age is measured on the monotonic clock; offline sources
+            # carry replay timestamps, so use the time the frame arrived instead
+            capture_time = timestamp if self.source.timestamp_is_monotonic else time.monotonic()
+            with self.lock:
+                # The driver may hand back a new array if the frame size changed
+                self._back = self._latest
+                self._latest = frame
+                self._latest_timestamp = timestamp
+                self._latest_capture_time = capture_time
+                if self._latest_seq > self._consumed_seq:
+                    self.frames_dropped += 1
+                self._latest_seq += 1
+                self.frames_captured += 1
+                self.frame_ready.notify()
+
+    def read(self, timeout: float = 1.0) -> Tuple[bool, Optional[np.ndarray], float]:
+        """Return (ok, frame, timestamp) for the newest unseen frame.
+
+        The returned array stays valid until `hold` more frames have been read.
+        """
+        deadline = time.monotonic() + timeout
+        with self.lock:
+            while self._latest_seq == self._consumed_seq:
+                remaining = deadline - time.monotonic()
+                if not self.running or remaining <= 0:
+                    return False, None, 0.0
+                self.frame_ready.wait(remaining)
+
+            frame = self._latest
+            self._held.append(frame)
+            # Recycle the oldest held buffer; until hold frames have been
+            # delivered capture allocates fresh ones
+            self._latest = self._held.popleft() if len(self._held) > self.hold else None
+            self._consumed_seq = self._latest_seq
+            timestamp = self._latest_timestamp
+            capture_time = self._latest_capture_time
+            self.frames_delivered += 1
+
+        self.last_frame_age = time.monotonic() - capture_time
+        self.avg_frame_age = 0.9 * self.avg_frame_age + 0.1 * self.last_frame_age
+        return True, frame, timestamp
+
+    def stats(self) -> Dict:
+        """Return capture counters"""
+        return {
+            'captured': self.frames_captured,
+            'delivered': self.frames_delivered,
+            'dropped': self.frames_dropped,
+            'last_age_ms': self.last_frame_age * 1000.0,
+            'avg_age_ms': self.avg_frame_age * 1000.0,
+        }
+
+class MotionGate:
+    """Cheap motion check that decides whether hand inference is worth running.
+
+    Measures the fraction of changed pixels inside the danger-zone band on a
+    downscaled, blurred grayscale image (absdiff + threshold against the
+    previous frame). Inference is allowed when that motion energy crosses the
+    threshold, or while a hand was seen within the last hold_time seconds so a
+    hand that stops moving in the zone is still tracked.
+    """
+
+    def __init__(self, threshold: float = 0.01, pixel_threshold: int = 25,
+                 scale: float = 0.25, band_margin: float = 0.15, hold_time: float = 1.5):
+        self.threshold = threshold
+        self.pixel_threshold = pixel_threshold
+        self.scale = scale
+        self.band_margin = band_margin
+        self.hold_time = hold_time
+
+        # Preallocated working buffers, recreated only when the band size changes
+        self._small = None
+        self._gray = None
+        self._previous = None
+        self._diff = None
+
+        self.last_hand_time = None
+        self.motion_energy = 0.0
+        self.frames_checked = 0
+        self.frames_skipped = 0
+
+    @classmethod
+    def from_env(cls) -> Optional['MotionGate']:
+        """Build the gate from TRICHSHOT_MOTION_GATE / TRICHSHOT_MOTION_THRESHOLD"""
+        if os.environ.get('TRICHSHOT_MOTION_GATE', '1').lower() in ('0', 'off', 'false', 'no'):
+            return None
+        try:
+            threshold = float(os.environ.get('TRICHSHOT_MOTION_THRESHOLD', '0.01'))
+        except ValueError:
+            print("Ignoring invalid TRICHSHOT_MOTION_THRESHOLD")
+            threshold = 0.01
+        return cls(threshold=threshold)
+
+    @property
+    def skip_ratio(self) -> float:
+        return self.frames_skipped / self.frames_checked if self.frames_checked else 0.0
+
+    def reset(self):
+        self._previous = None
+        self.last_hand_time = None
+        self.motion_energy = 0.0
+        self.frames_checked = 0
+        self.frames_skipped = 0
+
+    def hand_seen(self, timestamp: float):
+        """Keep the gate open for hold_time after a detection"""
+        self.last_hand_time = timestamp
+
+    def should_infer(self, frame: np.ndarray, danger_top: float, danger_bottom: float,
+                     timestamp: float) -> bool:
+        """Update the motion estimate and return True if inference should run"""
+        h, w = frame.shape[:2]
+        top = int(h * max(0.0, min(danger_top, danger_bottom) - self.band_margin))
+        bottom = int(h * min(1.0, max(danger_top, danger_bottom) + self.band_margin))
+        band = frame[top:max(bottom, top + 1)]
+
+        small_size = (max(1, int(w * self.scale)), max(1, int(band.shape[0] * self.scale)))
+        if self._small is None or self._small.shape[1::-1] != small_size:
+            self._small = np.empty((small_size[1], small_size[0], 3), dtype=np.uint8)
+            self._gray = np.empty((small_size[1], small_size[0]), dtype=np.uint8)
+            self._diff = np.empty_like(self._gray)
+            self._previous = None
+
+        cv2.resize(band, small_size, dst=self._small, interpolation=cv2.INTER_AREA)
+        cv2.cvtColor(self._small, cv2.COLOR_BGR2GRAY, dst=self._gray)
+        cv2.GaussianBlur(self._gray, (5, 5), 0, dst=self._gray)
+
+        if self._previous is None:
+            self._previous = self._gray.copy()
+            self.motion_energy = 1.0  # No reference yet: treat as motion
+        else:
+            cv2.absdiff(self._gray, self._previous, dst=self._diff)
+            cv2.threshold(self._diff, self.pixel_threshold, 255, cv2.THRESH_BINARY, dst=self._diff)
+            self.motion_energy = cv2.countNonZero(self._diff) / self._diff.size
+            self._previous, self._gray = self._gray, self._previous
+
+        self.frames_checked += 1
+        recently_seen = (self.last_hand_time is not None
+                         and timestamp - self.last_hand_time < self.hold_time)
+        if self.motion_energy >= self.threshold or recently_seen:
+            return True
+
+        self.frames_skipped += 1
+        return False
+
+def landmarks_to_array(multi_hand_landmarks) -> np.ndarray:
+    """Pack MediaPipe hand landmark lists into a (num_hands, 21, 3) float32 array"""
+    if not multi_hand_landmarks:
+        return np.zeros((0, 21, 3), dtype=np.float32)
+    return np.array([[(lm.x, lm.y, lm.z) for lm in hand.landmark]
+                     for hand in multi_hand_landmarks], dtype=np.float32)
+
+NO_HANDS = np.zeros((0, 21, 3), dtype=np.float32)
+FINGERTIPS = np.array([4, 8, 12, 16, 20])  # Thumb, index, middle, ring and pinky tips
+
+class HandZoneEvaluation:
+    """Danger-zone rules evaluated for all hands of a frame in one go.
+
+    Takes the (num_hands, 21, 3) landmark array and the zone bounds
+    (top, bottom, left, right) snapshotted for the frame. Every attribute
+    has one row per hand: bbox (x1, y1, x2, y2), in_zone (the bounding box
+    overlaps the zone, which is what triggers a warning), fingertips_in_zone
+    (how many of the five fingertips are inside the zone) and distance
+    (vertical gap between the hand and the zone, 0 when they overlap).
+    """
+
+    def __init__(self, landmarks: np.ndarray, danger_top: float, danger_bottom: float,
+                 left: float = 0.0, right: float = 1.0):
+        xy = landmarks[:, :, :2]
+        self.bbox = np.concatenate([xy.min(axis=1), xy.max(axis=1)], axis=1)
+        min_x, min_y, max_x, max_y = self.bbox.T
+        self.in_zone = ((min_y < danger_bottom) & (max_y > danger_top) &
+                        (min_x < right) & (max_x > left))
+
+        zone_low, zone_high = min(danger_top, danger_bottom), max(danger_top, danger_bottom)
+        tips = landmarks[:, FINGERTIPS, :2]
+        self.fingertips_in_zone = ((tips[:, :, 1] > zone_low) & (tips[:, :, 1] < zone_high) &
+                                   (tips[:, :, 0] > left) & (tips[:, :, 0] < right)).sum(axis=1)
+        self.distance = np.maximum(np.maximum(zone_low - max_y, min_y - zone_high), 0.0)
+        self.risk = None  # Filled in by ProximityScorer while a face is known
+
+    @property
+    def centers(self) -> np.ndarray:
+        return (self.bbox[:, :2] + self.bbox[:, 2:]) / 2
+
+    @property
+    def scores(self) -> np.ndarray:
+        """Per-hand danger score: the proximity risk, or 1/0 for zone overlap"""
+        return self.risk if self.risk is not None else self.in_zone.astype(np.float32)
+
+    @property
+    def any_in_zone(self) -> bool:
+        return bool(self.in_zone.any())
+
+class ProximityScorer:
+    """Continuous risk score from the distance between fingertips and the face.
+
+    For every hand the minimum distance between its five fingertips and the
+    face reference points (eyes, brows, nose, mouth, ears, scalp) is found
+    with one broadcast pairwise distance, measured in face heights so the
+    score does not depend on how far the user sits from the camera. Risk is
+    1 within touch_distance, falls linearly to 0 at reach_distance, and a
+    warning is raised once any hand reaches threshold.
+    """
+
+    def __init__(self, touch_distance: float = 0.15, reach_distance: float = 1.0,
+                 threshold: float = 0.7):
+        self.touch_distance = touch_distance
+        self.reach_distance = reach_distance
+        self.threshold = threshold
+
+    @classmethod
+    def from_env(cls) -> Optional['ProximityScorer']:
+        """Build the scorer unless TRICHSHOT_PROXIMITY is off; TRICHSHOT_RISK_THRESHOLD sets the threshold"""
+        if os.environ.get('TRICHSHOT_PROXIMITY', '1').lower() in ('0', 'off', 'false', 'no'):
+            return None
+        try:
+            threshold = float(os.environ.get('TRICHSHOT_RISK_THRESHOLD', '0.7'))
+        except ValueError:
+            print("Ignoring invalid TRICHSHOT_RISK_THRESHOLD")
+            threshold = 0.7
+        return cls(threshold=threshold)
+
+    def score(self, landmarks: np.ndarray, face_points: np.ndarray, face_size: float,
+              aspect: float) -> Tuple[np.ndarray, np.ndarray]:
+        """Return (risk, distance in face heights) per hand.
+
+        face_points is (num_points, 2) in normalized coordinates and face_size
+        the face height as a fraction of the frame height; aspect (width /
+        height) makes x and y distances comparable.
+        """
+        units = np.float32((aspect, 1.0))
+        tips = landmarks[:, FINGERTIPS, :2] * units                  # (hands, 5, 2)
+        diff = tips[:, :, np.newaxis, :] - (face_points * units)     # (hands, 5, points, 2)
+        distance = np.sqrt((diff * diff).sum(axis=-1)).min(axis=(1, 2)) / max(face_size, 1e-6)
+        risk = (self.reach_distance - distance) / (self.reach_distance - self.touch_distance)
+        return np.clip(risk, 0.0, 1.0), distance
+
+def match_hands(centers: np.ndarray, slot_centers: np.ndarray) -> np.ndarray:
+    """Assign each hand centre (n, 2) to a slot, nearest first.
+
+    slot_centers holds the last known centre per slot, NaN for empty slots;
+    empty slots are only used when no occupied one is left. Returns the slot
+    index per hand, -1 once every slot is taken.
+    """
+    slots = np.full(len(centers), -1)
+    if not len(centers):
+        return slots
+    distance = np.linalg.norm(centers[:, np.newaxis] - slot_centers[np.newaxis], axis=-1)
+    distance = np.nan_to_num(distance, nan=1e6)
+    for hand in np.argsort(distance.min(axis=1)):
+        slot = int(distance[hand].argmin())
+        if np.isinf(distance[hand, slot]):
+            break  # Every slot is taken
+        slots[hand] = slot
+        distance[:, slot] = np.inf
+    return slots
+
+class AlertStateMachine:
+    """Debounces per-frame danger scores into a stable alert state.
+
+    Hands are matched to up to max_hands slots by nearest bounding-box
+    centre, and each slot votes once per frame: hot when its score reaches
+    enter_threshold, or only exit_threshold once the slot is alerting
+    (hysteresis). A slot starts alerting when `votes` of its last `window`
+    frames were hot, and stops once `votes` of them were cold and it has
+    been on for at least min_on_time. Only frame timestamps are used, so a
+    replayed recording raises exactly the same alerts.
+    """
+
+    def __init__(self, max_hands: int = 2, enter_threshold: float = 0.7, exit_threshold: float = 0.4,
+                 votes: int = 3, window: int = 5, min_on_time: float = 0.5):
+        self.max_hands = max_hands
+        self.enter_threshold = enter_threshold
+        self.exit_threshold = min(exit_threshold, enter_threshold)
+        self.window = max(1, window)
+        self.votes = min(max(1, votes), self.window)
+        self.min_on_time = min_on_time
+
+        self.history = np.zeros((max_hands, self.window), dtype=bool)
+        self.centers = np.full((max_hands, 2), np.nan, dtype=np.float32)
+        self.active = np.zeros(max_hands, dtype=bool)
+        self.active_since = np.zeros(max_hands)
+        self.position = 0
+        self.transitions = 0
+
+    @classmethod
+    def from_env(cls, max_hands: int, enter_threshold: float) -> 'AlertStateMachine':
+        """Build the state machine from TRICHSHOT_ALERT_VOTES (N/M),
+        TRICHSHOT_ALERT_MIN_ON (seconds) and TRICHSHOT_RISK_EXIT"""
+        votes, window, min_on_time, exit_threshold = 3, 5, 0.5, 0.4
+        try:
+            votes, window = (int(v) for v in os.environ.get('TRICHSHOT_ALERT_VOTES', '3/5').split('/'))
+        except ValueError:
+            print("Ignoring invalid TRICHSHOT_ALERT_VOTES (expected N/M)")
+        try:
+            min_on_time = float(os.environ.get('TRICHSHOT_ALERT_MIN_ON', '0.5'))
+            exit_threshold = float(os.environ.get('TRICHSHOT_RISK_EXIT', '0.4'))
+        except ValueError:
+            print("Ignoring invalid TRICHSHOT_ALERT_MIN_ON / TRICHSHOT_RISK_EXIT")
+        return cls(max_hands, enter_threshold, exit_threshold, votes, window, min_on_time)
+
+    @property
+    def alerting(self) -> bool:
+        return bool(self.active.any())
+
+    def reset(self):
+        self.history[:] = False
+        self.centers[:] = np.nan
+        self.active[:] = False
+        self.position = 0
+        self.transitions = 0
+
+    def update(self, centers: np.ndarray, scores: np.ndarray, timestamp: float) -> bool:
+        """Feed one frame's hand centres (n, 2) and scores (n,); return the alert state"""
+        hot = np.zeros(self.max_hands, dtype=bool)
+        present = np.zeros(self.max_hands, dtype=bool)
+        slots = match_hands(centers, self.centers)
+        seen = slots >= 0
+        slots, centers, scores = slots[seen], centers[seen], scores[seen]
+        thresholds = np.where(self.active[slots], self.exit_threshold, self.enter_threshold)
+        hot[slots] = scores >= thresholds
+        present[slots] = True
+        self.centers[slots] = centers
+
+        self.history[:, self.position] = hot
+        self.position = (self.position + 1) % self.window
+        hot_votes = self.history.sum(axis=1)
+
+        start = ~self.active & (hot_votes >= self.votes)
+        stop = (self.active & (self.window - hot_votes >= self.votes) &
+                (timestamp - self.active_since >= self.min_on_time))
+        was_alerting = self.alerting
+        self.active |= start
+        self.active_since[start] = timestamp
+        self.active &= ~stop
+        # Free the slot of a hand that left once it has gone fully cold
+        self.centers[(hot_votes == 0) & ~self.active & ~present] = np.nan
+        if self.alerting != was_alerting:
+            self.transitions += 1
+        return self.alerting
+
+class PullGestureClassifier:
+    """Second-stage filter that only lets hair-pulling motions through.
+
+    Keeps the landmarks of the last `window` frames per hand slot in a
+    preallocated (slots, window, 21, 3) ring buffer and looks for a pinch
+    (thumb tip close to index tip relative to the wrist-to-middle-knuckle
+    size) that moves upwards while inside or just below the zone. Scratching
+    a nose or adjusting glasses lacks the pinch or the upward pull, so those
+    hands score 0. All features are computed over the whole buffer at once.
+    """
+
+    def __init__(self, max_hands: int = 2, window: int = 15, pinch_ratio: float = 0.35,
+                 min_pinch_frames: int = 4, min_rise: float = 0.25, scalp_margin: float = 0.05):
+        self.max_hands = max_hands
+        self.window = max(2, window)
+        self.pinch_ratio = pinch_ratio
+        self.min_pinch_frames = min_pinch_frames
+        self.min_rise = min_rise  # Upward travel of the pinch, in hand sizes
+        self.scalp_margin = scalp_margin
+
+        self.landmarks = np.zeros((max_hands, self.window, 21, 3), dtype=np.float32)
+        self.valid = np.zeros((max_hands, self.window), dtype=bool)
+        self.centers = np.full((max_hands, 2), np.nan, dtype=np.float32)
+        self.position = 0
+        self.pulls_detected = 0
+        self.elapsed = 0.0
+        self.frames = 0
+
+    @classmethod
+    def from_env(cls, max_hands: int) -> Optional['PullGestureClassifier']:
+        """Build the classifier if TRICHSHOT_PULL_GESTURE is on (TRICHSHOT_PULL_WINDOW frames)"""
+        if os.environ.get('TRICHSHOT_PULL_GESTURE', '0').lower() not in ('1', 'on', 'true', 'yes'):
+            return None
+        try:
+            window = int(os.environ.get('TRICHSHOT_PULL_WINDOW', '15'))
+        except ValueError:
+            print("Ignoring invalid TRICHSHOT_PULL_WINDOW")
+            window = 15
+        return cls(max_hands, window)
+
+    @property
+    def mean_us(self) -> float:
+        return 1e6 * self.elapsed / self.frames if self.frames else 0.0
+
+    def reset(self):
+        self.valid[:] = False
+        self.centers[:] = np.nan
+        self.position = 0
+        self.pulls_detected = 0
+        self.elapsed = 0.0
+        self.frames = 0
+
+    def update(self, landmarks: np.ndarray, centers: np.ndarray,
+               zone: Tuple[float, ...]) -> np.ndarray:
+        """Add one frame of hands and return a (num_hands,) bool array: pulling or not"""
+        start = time.perf_counter()
+        slots = match_hands(centers, self.centers)
+        seen = slots >= 0
+
+        # Overwrite the oldest frame of every slot
+        self.valid[:, self.position] = False
+        self.landmarks[slots[seen], self.position] = landmarks[seen]
+        self.valid[slots[seen], self.position] = True
+        self.centers[slots[seen]] = centers[seen]
+        self.position = (self.position + 1) % self.window
+        self.centers[~self.valid.any(axis=1)] = np.nan
+
+        # Chronological view of the buffer: (slots, window, 21, 3)
+        order = (np.arange(self.window) + self.position) % self.window
+        history = self.landmarks[:, order]
+        valid = self.valid[:, order]
+
+        size = np.linalg.norm(history[:, :, 0, :2] - history[:, :, 9, :2], axis=-1)
+        gap = np.linalg.norm(history[:, :, 4, :2] - history[:, :, 8, :2], axis=-1)
+        pinched = valid & (gap < self.pinch_ratio * size)
+        pinch_y = (history[:, :, 4, 1] + history[:, :, 8, 1]) / 2
+
+        rows = np.arange(self.max_hands)
+        first = pinched.argmax(axis=1)
+        last = self.window - 1 - pinched[:, ::-1].argmax(axis=1)
+        mean_size = np.where(pinched, size, 0).sum(axis=1) / np.maximum(pinched.sum(axis=1), 1)
+        rise = (pinch_y[rows, first] - pinch_y[rows, last]) / np.maximum(mean_size, 1e-6)
+        near_scalp = pinch_y[rows, last] < max(zone[0], zone[1]) + self.scalp_margin
+
+        pulling = (pinched.sum(axis=1) >= self.min_pinch_frames) & (rise >= self.min_rise) & near_scalp
+        result = np.zeros(len(landmarks), dtype=bool)
+        result[seen] = pulling[slots[seen]]
+
+        self.pulls_detected += int(result.any())
+        self.elapsed += time.perf_counter() - start
+        self.frames += 1
+        return result
+
+class FaceZone:
+    """Danger zone anchored to the face instead of fixed screen fractions.
+
+    MediaPipe Face Detection only runs every `interval` frames, when the
+    scene has moved since the last detection, or when the cached face box
+    is older than `ttl` seconds; every other frame reuses the cached box.
+    The zone covers the scalp, brows and lashes: from well above the face
+    box down to just below the eyes, a little wider than the face. If
+    detection takes more than max_budget_share of the per-frame hands
+    budget once amortized over the interval, the interval is doubled; the
+    same check on min_interval bounds the cost while no face is in view
+    or the scene keeps moving.
+    """
+
+    SCALP_HEIGHT = 0.6   # Zone extends this many face heights above the face box
+    LASH_MARGIN = 0.08   # ... and this many below the eye keypoints
+    SIDE_MARGIN = 0.25   # ... and this many face widths either side
+    MAX_INTERVAL = 120
+
+    def __init__(self, budget_ms: float, interval: int = 15, ttl: float = 2.0,
+                 min_interval: int = 3, motion_threshold: float = 6.0,
+                 max_budget_share: float = 0.1):
+        self.face_detection = mp.solutions.face_detection.FaceDetection(
+            model_selection=0, min_detection_confidence=0.5)
+        self.budget_ms = budget_ms
+        self.interval = max(1, interval)
+        self.ttl = ttl
+        self.min_interval = min_interval  # Motion never triggers detection more often than this
+        self.motion_threshold = motion_threshold  # Mean absolute grey-level change
+        self.max_budget_share = max_budget_share
+        self.scaler = FrameScaler((320, 240))  # The short-range model runs at 128x128 anyway
+        self._rgb = BufferRing(1)
+
+        # Tiny thumbnail of the last detected frame, for the motion check
+        self._small = np.empty((48, 64, 3), dtype=np.uint8)
+        self._gray = np.empty((48, 64), dtype=np.uint8)
+        self._reference = None
+
+        self.zone = None  # (top, bottom, left, right) from the newest face
+        self.face_points = None  # (11, 2) reference points of the newest face
+        self.face_size = 0.0  # Its height, as a fraction of the frame height
+        self.detected_at = None
+        self.frames_since_detection = self.min_interval
+        self.lookups = 0
+        self.hits = 0
+        self.detections = 0
+        self.detection_time = 0.0
+
+    @classmethod
+    def from_env(cls, budget_ms: float) -> Optional['FaceZone']:
+        """Build the face zone from TRICHSHOT_FACE_ZONE / _INTERVAL / _TTL"""
+        if os.environ.get('TRICHSHOT_FACE_ZONE', '0').lower() not in ('1', 'on', 'true', 'yes'):
+            return None
+        try:
+            interval = int(os.environ.get('TRICHSHOT_FACE_INTERVAL', '15'))
+            ttl = float(os.environ.get('TRICHSHOT_FACE_TTL', '2.0'))
+        except ValueError:
+            print("Ignoring invalid TRICHSHOT_FACE_* settings")
+            interval, ttl = 15, 2.0
+        return cls(budget_ms, interval=interval, ttl=ttl)
+
+    @property
+    def hit_rate(self) -> float:
+        """Fraction of frames served from the cache without running detection"""
+        return self.hits / self.lookups if self.lookups else 0.0
+
+    @property
+    def amortized_ms(self) -> float:
+        """Face detection time per frame, averaged over all frames"""
+        return 1000.0 * self.detection_time / self.lookups if self.lookups else 0.0
+
+    def reset(self):
+        self._reference = None
+        self.zone = None
+        self.face_points = None
+        self.detected_at = None
+        self.frames_since_detection = self.min_interval
+        self.lookups = self.hits = self.detections = 0
+        self.detection_time = 0.0
+
+    def _moved(self, frame: np.ndarray) -> bool:
+        """Whether the scene changed noticeably since the last detection"""
+        cv2.resize(frame, (64, 48), dst=self._small, interpolation=cv2.INTER_AREA)
+        cv2.cvtColor(self._small, cv2.COLOR_BGR2GRAY, dst=self._gray)
+        if self._reference is None:
+            return True
+        return cv2.norm(self._gray, self._reference, cv2.NORM_L1) / self._gray.size > self.motion_threshold
+
+    def _detect(self, frame: np.ndarray, timestamp: float):
+        start = time.perf_counter()
+        small = self.scaler.scale(frame)
+        results = self.face_detection.process(
+            cv2.cvtColor(small, cv2.COLOR_BGR2RGB, dst=self._rgb.next(small.shape)))
+        elapsed_ms = 1000.0 * (time.perf_counter() - start)
+        self.detections += 1
+        self.detection_time += elapsed_ms / 1000.0
+        self.frames_since_detection = 0
+        self._reference = self._gray.copy()
+
+        # Keep the amortized cost a small share of the hands budget. With
+        # no face cached or a moving scene, detection runs every
+        # min_interval frames, so that worst case has to fit as well.
+        mean_ms = 1000.0 * self.detection_time / self.detections
+        limit_ms = self.max_budget_share * self.budget_ms
+        if mean_ms / self.min_interval > limit_ms:
+            self.min_interval = min(self.min_interval * 2, self.MAX_INTERVAL)
+        if mean_ms / self.interval > limit_ms:
+            self.interval = min(self.interval * 2, self.MAX_INTERVAL)
+        self.interval = max(self.interval, self.min_interval)
+
+        if not results.detections:
+            return  # Keep the last face until its TTL runs out
+        face = max(results.detections, key=lambda d: d.location_data.relative_bounding_box.width *
+                   d.location_data.relative_bounding_box.height)
+        box = face.location_data.relative_bounding_box
+        keypoints = face.location_data.relative_keypoints  # Right eye and left eye first
+        eyes_y = max(keypoints[0].y, keypoints[1].y)
+        scalp_y = box.ymin - self.SCALP_HEIGHT * box.height
+        self.zone = (
+            max(0.0, scalp_y),
+            min(1.0, eyes_y + self.LASH_MARGIN * box.height),
+            max(0.0, box.xmin - self.SIDE_MARGIN * box.width),
+            min(1.0, box.xmin + (1.0 + self.SIDE_MARGIN) * box.width),
+        )
+
+        # Keypoints (eyes, nose tip, mouth, ears), brows above each eye and
+        # three points along the scalp line
+        points = [(kp.x, kp.y) for kp in keypoints]
+        points += [(kp.x, kp.y - 0.1 * box.height) for kp in keypoints[:2]]
+        points += [(box.xmin + f * box.width, scalp_y) for f in (0.0, 0.5, 1.0)]
+        self.face_points = np.array(points, dtype=np.float32)
+        self.face_size = box.height
+        self.detected_at = timestamp
+
+    def update(self, frame: np.ndarray, timestamp: float) -> Optional[Tuple[float, float, float, float]]:
+        """Return the face-anchored zone for frame, or None if no face is cached.
+
+        The cached face's reference points stay in face_points as long as the
+        zone is returned.
+        """
+        self.lookups += 1
+        self.frames_since_detection += 1
+        expired = self.detected_at is None or timestamp - self.detected_at > self.ttl
+        moved = self._moved(frame)
+        if (self.frames_since_detection >= self.interval or
+                ((expired or moved) and self.frames_since_detection >= self.min_interval)):
+            self._detect(frame, timestamp)
+        else:
+            self.hits += 1
+
+        if self.detected_at is None or timestamp - self.detected_at > self.ttl:
+            return None
+        return self.zone
+
+    def close(self):
+        self.face_detection.close()
+
+class LandmarkTracker:
+    """Propagates hand landmarks between inference keyframes with optical flow.
+
+    On a keyframe the 21 landmarks per hand from MediaPipe are stored as
+    pixel positions on a small grayscale image. Intermediate frames move them
+    with pyramidal Lucas-Kanade (cv2.calcOpticalFlowPyrLK) and hand back a
+    (num_hands, 21, 3) array like the detectors', so the zone test and
+    drawing code do not need to know whether a frame was tracked. If too many
+    points are lost or the flow error is too high, the next frame is forced
+    to be a keyframe.
+    """
+
+    LK_PARAMS = dict(winSize=(15, 15), maxLevel=2,
+                     criteria=(cv2.TERM_CRITERIA_EPS | cv2.TERM_CRITERIA_COUNT, 10, 0.03))
+
+    def __init__(self, keyframe_interval: int = 3, scale: float = 0.5,
+                 max_error: float = 20.0, min_tracked: float = 0.8):
+        self.keyframe_interval = max(1, keyframe_interval)
+        self.scale = scale
+        self.max_error = max_error
+        self.min_tracked = min_tracked
+
+        self._small = None
+        self._gray_buffers = []  # Two grayscale buffers, alternated between frames
+        self._previous_gray = None
+        self._points = None   # (num_hands * 21, 1, 2) float32 in small-image pixels
+        self._depths = None   # (num_hands, 21) keyframe z values
+        self.num_hands = 0
+        self.force_keyframe = True
+
+        self.frames_tracked = 0
+        self.tracking_failures = 0
+
+    @classmethod
+    def from_env(cls) -> Optional['LandmarkTracker']:
+        """Build the tracker from TRICHSHOT_TRACKING / TRICHSHOT_TRACKING_INTERVAL"""
+        if os.environ.get('TRICHSHOT_TRACKING', '0').lower() not in ('1', 'on', 'true', 'yes'):
+            return None
+        try:
+            interval = int(os.environ.get('TRICHSHOT_TRACKING_INTERVAL', '3'))
+            max_error = float(os.environ.get('TRICHSHOT_TRACKING_MAX_ERROR', '20'))
+        except ValueError:
+            print("Ignoring invalid TRICHSHOT_TRACKING_* settings")
+            interval, max_error = 3, 20.0
+        return cls(keyframe_interval=interval, max_error=max_error)
+
+    def reset(self):
+        self._previous_gray = None
+        self._points = None
+        self.num_hands = 0
+        self.force_keyframe = True
+
+    def _to_gray(self, frame: np.ndarray) -> np.ndarray:
+        """Downscale and convert to grayscale into reused buffers"""
+        h, w = frame.shape[:2]
+        small_size = (max(1, int(w * self.scale)), max(1, int(h * self.scale)))
+        if self._small is None or self._small.shape[1::-1] != small_size:
+            self._small = np.empty((small_size[1], small_size[0], 3), dtype=np.uint8)
+            self._gray_buffers = [np.empty((small_size[1], small_size[0]), dtype=np.uint8)
+                                  for _ in range(2)]
+            self._previous_gray = None
+        gray = self._gray_buffers[0] if self._gray_buffers[1] is self._previous_gray else self._gray_buffers[1]
+        cv2.resize(frame, small_size, dst=self._small, interpolation=cv2.INTER_AREA)
+        cv2.cvtColor(self._small, cv2.COLOR_BGR2GRAY, dst=gray)
+        return gray
+
+    def needs_keyframe(self, frame_index: int) -> bool:
+        return self.force_keyframe or frame_index % self.keyframe_interval == 0
+
+    def update_keyframe(self, frame: np.ndarray, landmarks: np.ndarray):
+        """Store freshly inferred landmarks as the starting point for tracking"""
+        gray = self._to_gray(frame)
+        self.force_keyframe = False
+        self.num_hands = len(landmarks)
+        if not self.num_hands:
+            self._points = None
+            self._previous_gray = gray
+            return
+
+        small_h, small_w = gray.shape
+        self._depths = landmarks[:, :, 2].copy()
+        points = landmarks[:, :, :2].reshape(-1, 1, 2) * np.float32((small_w, small_h))
+        self._points = np.ascontiguousarray(points)
+        self._previous_gray = gray
+
+    def track(self, frame: np.ndarray) -> np.ndarray:
+        """Propagate the landmarks onto frame and return them as a (num_hands, 21, 3) array"""
+        if self._points is None or self._previous_gray is None:
+            return NO_HANDS
+
+        gray = self._to_gray(frame)
+        new_points, status, error = cv2.calcOpticalFlowPyrLK(
+            self._previous_gray, gray, self._points, None, **self.LK_PARAMS)
+        self.frames_tracked += 1
+
+        tracked = status.ravel() == 1
+        tracked_error = float(np.median(error.ravel()[tracked])) if tracked.any() else float('inf')
+        if tracked.mean() < self.min_tracked or tracked_error > self.max_error:
+            self.force_keyframe = True
+            self.tracking_failures += 1
+
+        # Points that were lost stay where they were
+        new_points[~tracked] = self._points[~tracked]
+        self._points = new_points
+        self._previous_gray = gray
+
+        small_h, small_w = gray.shape
+        landmarks = np.empty((self.num_hands, 21, 3), dtype=np.float32)
+        landmarks[:, :, :2] = new_points.reshape(self.num_hands, 21, 2) / np.float32((small_w, small_h))
+        landmarks[:, :, 2] = self._depths
+        np.clip(landmarks[:, :, :2], 0.0, 1.0, out=landmarks[:, :, :2])
+        return landmarks
+
+def handedness_scores(multi_handedness) -> np.ndarray:
+    """Convert MediaPipe handedness classifications to a (num_hands,) float32 array"""
+    if not multi_handedness:
+        return np.zeros(0, dtype=np.float32)
+    return np.array([h.classification[0].score for h in multi_handedness], dtype=np.float32)
+
+class HandDetector:
+    """Interface shared by the hand detection backends.
+
+    detect() takes a BGR frame (or crop) and returns (context, landmarks,
+    scores) for the newest finished frame, where landmarks is a
+    (num_hands, 21, 3) float32 array of normalized coordinates in MediaPipe
+    landmark order, scores a (num_hands,) float32 array and context whatever
+    the caller passed with that frame. Synchronous backends always answer
+    for the frame just passed; asynchronous ones may answer for an earlier
+    frame and return None when no frame has finished since the last call,
+    so each result is handed out exactly once.
+    """
+
+    name = 'base'
+    accuracy = 0  # Relative landmark quality; HandDetectorSelector prefers higher
+    is_async = False
+
+    @classmethod
+    def available(cls) -> bool:
+        """Whether the backend's models and dependencies are present"""
+        return True
+
+    def detect(self, frame: np.ndarray, timestamp: float,
+               context=None) -> Optional[Tuple[object, np.ndarray, np.ndarray]]:
+        raise NotImplementedError
+
+    def close(self):
+        pass
+
+class MediaPipeHandsDetector(HandDetector):
+    """MediaPipe Hands solution API, run in-process.
+
+    reconfigure() builds a graph with new options on a background thread;
+    the next detect() call swaps it in, so detection keeps running on the
+    old graph while the new one loads and no frame is skipped.
+    """
+
+    name = 'mediapipe'
+    accuracy = 3
+
+    def __init__(self, hands_options: Dict):
+        self.options = dict(hands_options)
+        self.hands = mp.solutions.hands.Hands(**self.options)
+        self._replacement = None  # (options, Hands) waiting to be swapped in
+        self._builder = None
+        self._rgb = BufferRing(1)  # process() is synchronous, so one buffer suffices
+        self.swaps = 0  # Rebuilt graphs swapped in so far
+
+    @property
+    def building(self) -> bool:
+        return self._builder is not None and self._builder.is_alive()
+
+    @property
+    def switching(self) -> bool:
+        """Whether a rebuilt graph is building or waiting to be swapped in"""
+        return self.building or self._replacement is not None
+
+    def reconfigure(self, **changes) -> bool:
+        """Start building a graph with changed options; False if one is already building"""
+        if self.switching:
+            return False
+        options = dict(self.options, **changes)
+
+        def build():
+            self._replacement = (options, mp.solutions.hands.Hands(**options))
+
+        self._builder = threading.Thread(target=build, daemon=True, name='hands-rebuild')
+        self._builder.start()
+        return True
+
+    def detect(self, frame: np.ndarray, timestamp: float,
+               context=None) -> Optional[Tuple[object, np.ndarray, np.ndarray]]:
+        if self._replacement is not None:
+            # Swap between frames on the calling thread; the old graph is
+            # closed in the background so this frame does not wait for it
+            (self.options, hands), self._replacement = self._replacement, None
+            old, self.hands = self.hands, hands
+            self.swaps += 1
+            threading.Thread(target=old.close, daemon=True).start()
+        rgb = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB, dst=self._rgb.next(frame.shape))
+        results = self.hands.process(rgb)
+        return (context, landmarks_to_array(results.multi_hand_landmarks),
+                handedness_scores(results.multi_handedness))
+
+    def close(self):
+        if self._builder:
+            self._builder.join()
+        if self._replacement is not None:
+            self._replacement[1].close()
+            self._replacement = None
+        self.hands.close()
+
+def _inference_worker_main(shm_name: str, slot_size: int, slots: int, hands_options: Dict, conn):
+    """Entry point of the inference process: runs Hands on frames from the shared ring"""
+    # The parent created the segment and unlinks it; spawned children share its
+    # resource tracker, so attaching here does not register a second owner
+    shm = shared_memory.SharedMemory(name=shm_name)
+    ring = np.ndarray((slots, slot_size), dtype=np.uint8, buffer=shm.buf)
+    rgb = None
+    hands = mp.solutions.hands.Hands(**hands_options)
+
+    try:
+        while True:
+            request = conn.recv()
+            if request is None:
+                break
+            seq, slot, height, width = request
+            rgb = ring[slot, :height * width * 3].reshape(height, width, 3)
+            results = hands.process(rgb)
+            landmarks = landmarks_to_array(results.multi_hand_landmarks)
+            scores = handedness_scores(results.multi_handedness)
+            header = np.array([seq, len(landmarks)], dtype=np.int64)
+            conn.send_bytes(header.tobytes() + landmarks.tobytes() + scores.tobytes())
+    except (EOFError, KeyboardInterrupt):
+        pass
+    finally:
+        hands.close()
+        del rgb, ring
+        shm.close()
+
+class InferenceWorker(HandDetector):
+    """Runs MediaPipe Hands in a separate process so it never holds the GUI's GIL.
+
+    RGB frames are written straight into a ring of preallocated slots in a
+    multiprocessing.shared_memory segment; only (sequence, slot, height,
+    width) goes over the pipe, and landmarks come back as raw float32 bytes.
+    Up to max_in_flight frames can be queued: with 1 every call waits for its
+    own result, with more the worker overlaps with capture at the cost of
+    returning results that are max_in_flight - 1 frames old.
+    """
+
+    name = 'process'
+    accuracy = 3
+
+    def __init__(self, hands_options: Dict, max_in_flight: Optional[int] = None):
+        if max_in_flight is None:
+            try:
+                max_in_flight = int(os.environ.get('TRICHSHOT_INFERENCE_DEPTH', '1'))
+            except ValueError:
+                print("Ignoring invalid TRICHSHOT_INFERENCE_DEPTH")
+                max_in_flight = 1
+        self.hands_options = dict(hands_options)
+        self.max_in_flight = max(1, max_in_flight)
+        self.is_async = self.max_in_flight > 1
+        self.slots = self.max_in_flight + 1  # Never write into a slot still being read
+        self.slot_size = 0
+        self.shm = None
+        self.ring = None
+        self.process = None
+        self.conn = None
+        self.seq = 0
+        self.pending = {}  # seq -> caller context, in submission order
+        self.latest = None  # (context, landmarks, scores) of the newest completed frame
+
+    def start(self, slot_size: int):
+        """Allocate the shared ring and spawn the worker process"""
+        self.close()
+        self.slot_size = slot_size
+        self.shm = shared_memory.SharedMemory(create=True, size=self.slots * slot_size)
+        self.ring = np.ndarray((self.slots, slot_size), dtype=np.uint8, buffer=self.shm.buf)
+
+        # spawn keeps MediaPipe's threads and the Tk state out of the child
+        context = multiprocessing.get_context('spawn')
+        self.conn, child_conn = context.Pipe()
+        self.process = context.Process(
+            target=_inference_worker_main,
+            args=(self.shm.name, slot_size, self.slots, self.hands_options, child_conn),
+            daemon=True
+        )
+        self.process.start()
+        child_conn.close()
+
+    def slot_view(self, height: int, width: int) -> np.ndarray:
+        """Return the (height, width, 3) view of the next free ring slot"""
+        needed = height * width * 3
+        if self.shm is None or needed > self.slot_size:
+            self.start(needed)
+        slot = self.seq % self.slots
+        return self.ring[slot, :needed].reshape(height, width, 3)
+
+    def submit(self, height: int, width: int, context=None):
+        """Hand the slot returned by slot_view() to the worker"""
+        slot = self.seq % self.slots
+        self.conn.send((self.seq, slot, height, width))
+        self.pending[self.seq] = context
+        self.seq += 1
+
+    def _receive(self):
+        data = self.conn.recv_bytes()
+        seq, num_hands = np.frombuffer(data, dtype=np.int64, count=2)
+        num_hands = int(num_hands)
+        landmarks = np.frombuffer(data, dtype=np.float32, count=num_hands * 63, offset=16)
+        scores = np.frombuffer(data, dtype=np.float32, count=num_hands, offset=16 + landmarks.nbytes)
+        self.latest = (self.pending.pop(int(seq)), landmarks.reshape(num_hands, 21, 3), scores)
+
+    def collect(self) -> Optional[Tuple[object, np.ndarray, np.ndarray]]:
+        """Return (context, landmarks, scores) of the newest frame finished
+        since the last call, or None if none has.
+
+        Blocks until the number of frames in flight is below max_in_flight.
+        """
+        while len(self.pending) >= self.max_in_flight:
+            self._receive()
+        while self.pending and self.conn.poll():
+            self._receive()
+        result, self.latest = self.latest, None
+        return result
+
+    def detect(self, frame: np.ndarray, timestamp: float,
+               context=None) -> Optional[Tuple[object, np.ndarray, np.ndarray]]:
+        # Convert straight into the shared slot; the frame itself never crosses the pipe
+        height, width = frame.shape[:2]
+        cv2.cvtColor(frame, cv2.COLOR_BGR2RGB, dst=self.slot_view(height, width))
+        self.submit(height, width, context)
+        return self.collect()
+
+    def close(self):
+        """Stop the worker process and free the shared ring"""
+        if self.process:
+            try:
+                self.conn.send(None)
+            except (OSError, ValueError):
+                pass
+            self.process.join(timeout=2.0)
+            if self.process.is_alive():
+                self.process.terminate()
+            self.conn.close()
+            self.process = None
+        if self.shm:
+            self.ring = None
+            self.shm.close()
+            self.shm.unlink()
+            self.shm = None
+        self.pending.clear()
+        self.latest = None
+        self.seq = 0
+
+class TasksHandDetector(HandDetector):
+    """MediaPipe Tasks HandLandmarker in LIVE_STREAM mode.
+
+    detect_async() returns immediately and results arrive on MediaPipe's
+    callback thread, so the caller never waits for inference: each call to
+    detect() submits the current frame and returns the newest result that
+    has completed so far. Frames submitted while the graph is busy are
+    dropped by MediaPipe.
+    """
+
+    name = 'tasks'
+    accuracy = 4
+    is_async = True
+
+    DEFAULT_MODEL = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'hand_landmarker.task')
+    MODEL_URL = ('https://storage.googleapis.com/mediapipe-models/hand_landmarker/'
+                 'hand_landmarker/float16/latest/hand_landmarker.task')
+
+    def __init__(self, hands_options: Dict, model_path: Optional[str] = None):
+        from mediapipe.tasks import python as mp_tasks
+        from mediapipe.tasks.python import vision
+
+        options = vision.HandLandmarkerOptions(
+            base_options=mp_tasks.BaseOptions(model_asset_path=model_path or self.model_path()),
+            running_mode=vision.RunningMode.LIVE_STREAM,
+            num_hands=hands_options['max_num_hands'],
+            min_hand_detection_confidence=hands_options['min_detection_confidence'],
+            min_hand_presence_confidence=hands_options['min_tracking_confidence'],
+            min_tracking_confidence=hands_options['min_tracking_confidence'],
+            result_callback=self._on_result
+        )
+        self.landmarker = vision.HandLandmarker.create_from_options(options)
+        self.lock = threading.Lock()
+        self.last_timestamp_ms = -1
+        self.pending = {}  # timestamp_ms -> (submit time, caller context)
+        self.latest = None  # (context, landmarks, scores) of the newest completed frame
+        # mp.Image copies the pixels before detect_async() returns, so the
+        # conversion buffer is free again by the next call
+        self._rgb = BufferRing(1)
+
+        self.frames_submitted = 0
+        self.frames_completed = 0
+        self.latencies = deque(maxlen=1000)  # Submit-to-callback seconds
+
+    @classmethod
+    def model_path(cls) -> str:
+        return os.environ.get('TRICHSHOT_HAND_MODEL', cls.DEFAULT_MODEL)
+
+    @classmethod
+    def available(cls) -> bool:
+        if not os.path.exists(cls.model_path()):
+            print(f"Hand landmarker model not found at {cls.model_path()}; download it from "
+                  f"{cls.MODEL_URL} or set TRICHSHOT_HAND_MODEL.")
+            return False
+        return True
+
+    def _on_result(self, result, output_image, timestamp_ms: int):
+        """MediaPipe callback thread: store the result as the newest one"""
+        now = time.perf_counter()
+        landmarks = np.array([[(lm.x, lm.y, lm.z) for lm in hand] for hand in result.hand_landmarks],
+                             dtype=np.float32).reshape(-1, 21, 3)
+        scores = np.array([hand[0].score for hand in result.handedness], dtype=np.float32)
+        with self.lock:
+            # Frames MediaPipe dropped never get a callback; forget anything older
+            for stale in [ts for ts in self.pending if ts < timestamp_ms]:
+                del self.pending[stale]
+            submitted, context = self.pending.pop(timestamp_ms, (now, None))
+            self.latest = (context, landmarks, scores)
+            self.frames_completed += 1
+            self.latencies.append(now - submitted)
+
+    def submit(self, rgb: np.ndarray, timestamp: float, context=None):
+        """Queue rgb for asynchronous detection"""
+        # LIVE_STREAM needs strictly increasing millisecond timestamps
+        timestamp_ms = max(int(timestamp * 1000), self.last_timestamp_ms + 1)
+        self.last_timestamp_ms = timestamp_ms
+        image = mp.Image(image_format=mp.ImageFormat.SRGB, data=rgb)
+        with self.lock:
+            self.pending[timestamp_ms] = (time.perf_counter(), context)
+        self.frames_submitted += 1
+        self.landmarker.detect_async(image, timestamp_ms)
+
+    def collect(self) -> Optional[Tuple[object, np.ndarray, np.ndarray]]:
+        """Return (context, landmarks, scores) of the newest frame completed
+        since the last call, or None if none has"""
+        with self.lock:
+            result, self.latest = self.latest, None
+            return result
+
+    def detect(self, frame: np.ndarray, timestamp: float,
+               context=None) -> Optional[Tuple[object, np.ndarray, np.ndarray]]:
+        # Submit and move on; use whatever result has completed since the last call
+        self.submit(cv2.cvtColor(frame, cv2.COLOR_BGR2RGB, dst=self._rgb.next(frame.shape)),
+                    timestamp, context)
+        return self.collect()
+
+    def stats(self) -> Dict:
+        with self.lock:
+            latencies_ms = 1000.0 * np.array(self.latencies) if self.latencies else np.zeros(1)
+            in_flight = len(self.pending)
+        return {
+            'submitted': self.frames_submitted,
+            'completed': self.frames_completed,
+            'dropped': self.frames_submitted - self.frames_completed - in_flight,
+            'mean_latency_ms': float(latencies_ms.mean()),
+            'p95_latency_ms': float(np.percentile(latencies_ms, 95)),
+        }
+
+    def close(self):
+        self.landmarker.close()
+
+class OpenCVDnnHandDetector(HandDetector):
+    """Two-stage ONNX hand model run through cv2.dnn, without MediaPipe.
+
+    Uses the MediaPipe palm detector and hand pose networks as exported to
+    the OpenCV model zoo (palm_detection_mediapipe_2023feb.onnx and
+    handpose_estimation_mediapipe_2023feb.onnx). Palms are found on a padded
+    square copy of the frame, then each palm is cropped (axis-aligned,
+    enlarged to cover the fingers) and passed to the landmark network.
+    """
+
+    name = 'dnn'
+    accuracy = 2
+
+    MODEL_DIR = os.path.dirname(os.path.abspath(__file__))
+    PALM_INPUT = 192
+    LANDMARK_INPUT = 224
+    PALM_NMS_THRESHOLD = 0.3
+    CROP_SCALE = 2.6  # Palm box to hand crop, as in MediaPipe's hand landmark graph
+
+    def __init__(self, hands_options: Dict):
+        self.palm_net = cv2.dnn.readNet(self.palm_model_path())
+        self.landmark_net = cv2.dnn.readNet(self.landmark_model_path())
+        self.palm_outputs = self.palm_net.getUnconnectedOutLayersNames()
+        self.landmark_outputs = self.landmark_net.getUnconnectedOutLayersNames()
+        self.max_hands = hands_options['max_num_hands']
+        self.palm_threshold = hands_options['min_detection_confidence']
+        self.landmark_threshold = hands_options['min_tracking_confidence']
+        self.anchors = self._generate_anchors()
+
+        # Network inputs are rebuilt in place every frame; forward() is
+        # synchronous, so one buffer of each suffices
+        self._padded = BufferRing(1)
+        self._palm_resized = np.empty((self.PALM_INPUT, self.PALM_INPUT, 3), dtype=np.uint8)
+        self._palm_rgb = np.empty_like(self._palm_resized)
+        self._palm_blob = np.empty((1, self.PALM_INPUT, self.PALM_INPUT, 3), dtype=np.float32)
+        self._crop = np.empty((self.LANDMARK_INPUT, self.LANDMARK_INPUT, 3), dtype=np.uint8)
+        self._crop_rgb = np.empty_like(self._crop)
+        self._crop_blob = np.empty((1, self.LANDMARK_INPUT, self.LANDMARK_INPUT, 3), dtype=np.float32)
+
+    @classmethod
+    def palm_model_path(cls) -> str:
+        return os.environ.get('TRICHSHOT_PALM_MODEL',
+                              os.path.join(cls.MODEL_DIR, 'palm_detection_mediapipe_2023feb.onnx'))
+
+    @classmethod
+    def landmark_model_path(cls) -> str:
+        return os.environ.get('TRICHSHOT_HANDPOSE_MODEL',
+                              os.path.join(cls.MODEL_DIR, 'handpose_estimation_mediapipe_2023feb.onnx'))
+
+    @classmethod
+    def available(cls) -> bool:
+        missing = [p for p in (cls.palm_model_path(), cls.landmark_model_path()) if not os.path.exists(p)]
+        if missing:
+            print(f"OpenCV DNN hand models not found ({', '.join(missing)}); set "
+                  f"TRICHSHOT_PALM_MODEL and TRICHSHOT_HANDPOSE_MODEL to use this backend.")
+            return False
+        return True
+
+    @classmethod
+    def _generate_anchors(cls) -> np.ndarray:
+        """Anchor centres of the palm detector, in normalized input coordinates.
+
+        2 anchors per cell on the stride-8 grid and 6 per cell on the stride-16
+        grid (the three stride-16 layers share one grid), 2016 in total.
+        """
+        anchors = []
+        for stride, per_cell in ((8, 2), (16, 6)):
+            cells = cls.PALM_INPUT // stride
+            ys, xs = np.mgrid[0:cells, 0:cells]
+            centers = np.stack([(xs + 0.5) / cells, (ys + 0.5) / cells], axis=-1).reshape(-1, 2)
+            anchors.append(np.repeat(centers, per_cell, axis=0))
+        return np.concatenate(anchors).astype(np.float32)
+
+    def _detect_palms(self, frame: np.ndarray) -> List[Tuple[np.ndarray, np.ndarray]]:
+        """Return (box x1, y1, x2, y2; keypoints (7, 2)) per palm, in frame pixels"""
+        h, w = frame.shape[:2]
+        side = max(h, w)
+        padded = cv2.copyMakeBorder(frame, 0, side - h, 0, side - w, cv2.BORDER_CONSTANT,
+                                    dst=self._padded.next((side, side) + frame.shape[2:]))
+        cv2.resize(padded, (self.PALM_INPUT, self.PALM_INPUT), dst=self._palm_resized)
+        cv2.cvtColor(self._palm_resized, cv2.COLOR_BGR2RGB, dst=self._palm_rgb)
+        np.multiply(self._palm_rgb, 1.0 / 255.0, out=self._palm_blob[0], casting='unsafe')
+        self.palm_net.setInput(self._palm_blob)  # NHWC
+
+        # One output holds box + 7 keypoint regressions per anchor, the other the raw score
+        outputs = self.palm_net.forward(self.palm_outputs)
+        regressors = next(o for o in outputs if o.shape[-1] == 18)[0]
+        raw_scores = next(o for o in outputs if o.shape[-1] == 1)[0, :, 0]
+        scores = 1.0 / (1.0 + np.exp(-np.clip(raw_scores, -100, 100)))
+
+        keep = np.flatnonzero(scores > self.palm_threshold)
+        if not len(keep):
+            return []
+        anchors = self.anchors[keep]
+        deltas = regressors[keep] / self.PALM_INPUT
+        centers = anchors + deltas[:, 0:2]
+        half_sizes = deltas[:, 2:4] / 2
+        boxes = np.concatenate([centers - half_sizes, centers + half_sizes], axis=1) * side
+        keypoints = (deltas[:, 4:].reshape(-1, 7, 2) + anchors[:, np.newaxis]) * side
+
+        rects = [(float(x1), float(y1), float(x2 - x1), float(y2 - y1)) for x1, y1, x2, y2 in boxes]
+        picked = cv2.dnn.NMSBoxes(rects, scores[keep].tolist(), self.palm_threshold, self.PALM_NMS_THRESHOLD)
+        return [(boxes[i], keypoints[i]) for i in np.array(picked).flatten()[:self.max_hands]]
+
+    def detect(self, frame: np.ndarray, timestamp: float,
+               context=None) -> Optional[Tuple[object, np.ndarray, np.ndarray]]:
+        h, w = frame.shape[:2]
+        hands = []
+        scores = []
+        for box, keypoints in self._detect_palms(frame):
+            # Square crop around the palm, shifted from the wrist towards the
+            # middle finger so the fingers fit (keypoints 0 and 2)
+            palm_size = max(box[2] - box[0], box[3] - box[1])
+            direction = keypoints[2] - keypoints[0]
+            direction /= max(np.linalg.norm(direction), 1e-6)
+            center = (box[:2] + box[2:]) / 2 + direction * 0.5 * palm_size
+            crop_size = palm_size * self.CROP_SCALE
+            origin = center - crop_size / 2
+            scale = self.LANDMARK_INPUT / crop_size
+            transform = np.float32([[scale, 0, -origin[0] * scale], [0, scale, -origin[1] * scale]])
+            cv2.warpAffine(frame, transform, (self.LANDMARK_INPUT, self.LANDMARK_INPUT), dst=self._crop)
+
+            cv2.cvtColor(self._crop, cv2.COLOR_BGR2RGB, dst=self._crop_rgb)
+            np.multiply(self._crop_rgb, 1.0 / 255.0, out=self._crop_blob[0], casting='unsafe')
+            self.landmark_net.setInput(self._crop_blob)
+            # Outputs follow the model zoo export: screen landmarks (1, 63), hand
+            # presence (1, 1), handedness (1, 1) and world landmarks (1, 63)
+            outputs = self.landmark_net.forward(self.landmark_outputs)
+            presence = float(outputs[1].flatten()[0])
+            if presence < self.landmark_threshold:
+                continue
+
+            landmarks = outputs[0].reshape(21, 3) / scale
+            landmarks[:, 0] = (landmarks[:, 0] + origin[0]) / w
+            landmarks[:, 1] = (landmarks[:, 1] + origin[1]) / h
+            landmarks[:, 2] /= w  # MediaPipe scales z like x
+            hands.append(landmarks)
+            scores.append(presence)
+
+        return (context, np.array(hands, dtype=np.float32).reshape(-1, 21, 3),
+                np.array(scores, dtype=np.float32))
+
+class MotionSkinHandDetector(HandDetector):
+    """Classical fallback for hosts too slow for a neural network.
+
+    Moving skin-coloured blobs (YCrCb skin range intersected with a dilated
+    frame difference) are taken as hands, and a fixed open-hand template is
+    stretched over each blob's bounding box so the result has the same 21
+    landmarks as the other backends. Only the landmark envelope is
+    meaningful, which is all the danger-zone test needs; a still hand is not
+    seen at all.
+    """
+
+    name = 'heuristic'
+    accuracy = 1
+
+    # Open right hand in a unit box (x right, y down), MediaPipe landmark order
+    HAND_TEMPLATE = np.array([
+        (0.50, 1.00),
+        (0.32, 0.88), (0.20, 0.75), (0.10, 0.63), (0.00, 0.52),
+        (0.35, 0.50), (0.33, 0.30), (0.32, 0.15), (0.31, 0.02),
+        (0.50, 0.48), (0.50, 0.26), (0.50, 0.11), (0.50, 0.00),
+        (0.64, 0.50), (0.66, 0.30), (0.67, 0.16), (0.68, 0.05),
+        (0.78, 0.56), (0.85, 0.42), (0.90, 0.31), (1.00, 0.20),
+    ], dtype=np.float32)
+    SKIN_LOWER = np.array([0, 133, 77], dtype=np.uint8)
+    SKIN_UPPER = np.array([255, 173, 127], dtype=np.uint8)
+
+    def __init__(self, hands_options: Dict, scale: float = 0.25, min_area: float = 0.005,
+                 pixel_threshold: int = 20):
+        self.max_hands = hands_options['max_num_hands']
+        self.scale = scale
+        self.min_area = min_area  # Fraction of the frame
+        self.pixel_threshold = pixel_threshold
+        self.kernel = cv2.getStructuringElement(cv2.MORPH_ELLIPSE, (5, 5))
+        self.previous = None
+
+        # Reused downscaled buffers
+        self._small = None
+        self._ycrcb = None
+        self._gray = None
+        self._skin = None
+        self._motion = None
+
+    def detect(self, frame: np.ndarray, timestamp: float,
+               context=None) -> Optional[Tuple[object, np.ndarray, np.ndarray]]:
+        h, w = frame.shape[:2]
+        size = (max(1, int(w * self.scale)), max(1, int(h * self.scale)))
+        if self._small is None or self._small.shape[:2] != (size[1], size[0]):
+            self._small = np.empty((size[1], size[0], 3), dtype=np.uint8)
+            self._ycrcb = np.empty_like(self._small)
+            self._gray = np.empty((size[1], size[0]), dtype=np.uint8)
+            self._skin = np.empty_like(self._gray)
+            self._motion = np.empty_like(self._gray)
+            self.previous = None
+
+        cv2.resize(frame, size, dst=self._small, interpolation=cv2.INTER_AREA)
+        cv2.cvtColor(self._small, cv2.COLOR_BGR2YCrCb, dst=self._ycrcb)
+        cv2.inRange(self._ycrcb, self.SKIN_LOWER, self.SKIN_UPPER, dst=self._skin)
+        cv2.cvtColor(self._small, cv2.COLOR_BGR2GRAY, dst=self._gray)
+
+        if self.previous is None:
+            self.previous = self._gray.copy()
+            return context, np.zeros((0, 21, 3), dtype=np.float32), np.zeros(0, dtype=np.float32)
+
+        cv2.absdiff(self._gray, self.previous, dst=self._motion)
+        self.previous[:] = self._gray
+        cv2.threshold(self._motion, self.pixel_threshold, 255, cv2.THRESH_BINARY, dst=self._motion)
+        cv2.dilate(self._motion, self.kernel, dst=self._motion, iterations=3)
+        cv2.bitwise_and(self._skin, self._motion, dst=self._motion)
+        cv2.morphologyEx(self._motion, cv2.MORPH_CLOSE, self.kernel, dst=self._motion)
+
+        contours, _ = cv2.findContours(self._motion, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
+        min_pixels = self.min_area * self._motion.size
+        blobs = sorted((c for c in contours if cv2.contourArea(c) >= min_pixels),
+                       key=cv2.contourArea, reverse=True)[:self.max_hands]
+
+        landmarks = np.zeros((len(blobs), 21, 3), dtype=np.float32)
+        scores = np.empty(len(blobs), dtype=np.float32)
+        for i, contour in enumerate(blobs):
+            x, y, bw, bh = cv2.boundingRect(contour)
+            landmarks[i, :, :2] = (self.HAND_TEMPLATE * (bw, bh) + (x, y)) / size
+            scores[i] = cv2.contourArea(contour) / (bw * bh)  # Fill ratio as a crude confidence
+        return context, landmarks, scores
+
+class ComplexityTuner:
+    """Picks model_complexity and max_num_hands at runtime from measured latency.
+
+    Keeps a rolling window of inference latencies. When the p95 exceeds the
+    frame budget it steps down one level; when it stays under `headroom`
+    of the budget it steps up, but never back into a level that was too
+    slow within the last retry_after seconds. The detector builds the new
+    graph in the background and swaps it in between frames; the window
+    restarts at the swap, so each level is judged on its own latencies.
+    """
+
+    LEVELS = ((0, 1), (0, 2), (1, 2))  # (model_complexity, max_num_hands), cheapest first
+
+    def __init__(self, detector: 'MediaPipeHandsDetector', budget_ms: float, window: int = 60,
+                 headroom: float = 0.5, retry_after: float = 30.0):
+        self.detector = detector
+        self.budget_ms = budget_ms
+        self.window = window
+        self.headroom = headroom
+        self.retry_after = retry_after
+        max_hands = detector.options['max_num_hands']
+        self.levels = [level for level in self.LEVELS if level[1] <= max_hands]
+        current = (detector.options['model_complexity'], max_hands)
+        self.level = self.levels.index(current) if current in self.levels else 0
+
+        self.latencies = deque(maxlen=window)
+        self.blocked_until = {}  # level -> timestamp
+        self.switches = 0
+        self.swaps_seen = detector.swaps
+
+    @classmethod
+    def from_env(cls, detector: HandDetector, budget_ms: float) -> Optional['ComplexityTuner']:
+        """Tune in-process MediaPipe Hands unless TRICHSHOT_AUTOTUNE is off"""
+        if os.environ.get('TRICHSHOT_AUTOTUNE', '1').lower() in ('0', 'off', 'false', 'no'):
+            return None
+        if not isinstance(detector, MediaPipeHandsDetector):
+            return None
+        return cls(detector, budget_ms)
+
+    @property
+    def p95_ms(self) -> float:
+        return float(np.percentile(self.latencies, 95)) if self.latencies else 0.0
+
+    def describe(self) -> str:
+        complexity, max_hands = self.levels[self.level]
+        return (f"complexity {complexity}, {max_hands} hand(s), p95 {self.p95_ms:.1f} ms "
+                f"of {self.budget_ms:.1f} ms ({self.switches} switches)")
+
+    def record(self, latency_ms: float, timestamp: float):
+        """Add one inference latency and switch level if the window calls for it"""
+        if self.detector.swaps != self.swaps_seen:
+            # This inference ran on the new graph: drop the old level's samples
+            self.swaps_seen = self.detector.swaps
+            self.latencies.clear()
+        self.latencies.append(latency_ms)
+        if len(self.latencies) < self.window or self.detector.switching:
+            return
+        p95 = self.p95_ms
+        if p95 > self.budget_ms and self.level > 0:
+            self.blocked_until[self.level] = timestamp + self.retry_after
+            self._switch(self.level - 1)
+        elif (p95 < self.headroom * self.budget_ms and self.level + 1 < len(self.levels) and
+              self.blocked_until.get(self.level + 1, float('-inf')) <= timestamp):
+            self._switch(self.level + 1)
+
+    def _switch(self, level: int):
+        complexity, max_hands = self.levels[level]
+        if self.detector.reconfigure(model_complexity=complexity, max_num_hands=max_hands):
+            print(f"Hand model: switching to complexity {complexity}, {max_hands} hand(s) "
+                  f"(p95 {self.p95_ms:.1f} ms, budget {self.budget_ms:.1f} ms)")
+            self.level = level
+            self.switches += 1
+
+class HandDetectorSelector:
+    """Creates hand detection backends and picks one for this host.
+
+    select() benchmarks each available backend on synthetic frames, most
+    accurate first, and keeps the first whose p95 per-frame cost fits the
+    CPU budget; if none does, the cheapest one is used.
+    """
+
+    BACKENDS = {
+        'mediapipe': MediaPipeHandsDetector,
+        'inline': MediaPipeHandsDetector,
+        'process': InferenceWorker,
+        'tasks': TasksHandDetector,
+        'dnn': OpenCVDnnHandDetector,
+        'heuristic': MotionSkinHandDetector,
+    }
+    # 'process' only moves MediaPipe Hands out of the GUI process, so auto
+    # selection leaves it to explicit configuration
+    AUTO_CANDIDATES = ('tasks', 'mediapipe', 'dnn', 'heuristic')
+    BENCHMARK_FRAMES = 20
+    WARMUP_FRAMES = 3
+
+    @staticmethod
+    def create(name: str, hands_options: Dict) -> Optional[HandDetector]:
+        """Build the named backend, or None if it is unknown or unavailable"""
+        backend = HandDetectorSelector.BACKENDS.get(name)
+        if backend is None:
+            print(f"Unknown hand detector '{name}'")
+            return None
+        if not backend.available():
+            return None
+        try:
+            return backend(hands_options)
+        except (ImportError, RuntimeError, ValueError, OSError, cv2.error) as e:
+            print(f"Could not start the '{name}' hand detector ({e})")
+            return None
+
+    @staticmethod
+    def benchmark(detector: HandDetector, frame_size: Tuple[int, int]) -> float:
+        """Return the detector's p95 per-frame cost in ms on synthetic frames"""
+        width, height = frame_size
+        frames = HandDetectorSelector.WARMUP_FRAMES + HandDetectorSelector.BENCHMARK_FRAMES
+        source = SyntheticFrameSource(width, height, frame_count=frames, max_speed=True)
+        timings = []
+        frame = None
+        while True:
+            ret, frame, timestamp = source.read_frame(frame)
+            if not ret:
+                break
+            start = time.perf_counter()
+            detector.detect(frame, timestamp)
+            timings.append(time.perf_counter() - start)
+        timings = timings[HandDetectorSelector.WARMUP_FRAMES:]
+
+        if detector.is_async and hasattr(detector, 'stats'):
+            # detect() returns at once; the cost is the work done in the background
+            time.sleep(0.2)
+            return detector.stats()['p95_latency_ms']
+        return float(np.percentile(1000.0 * np.array(timings), 95))
+
+    @staticmethod
+    def select(hands_options: Dict, budget_ms: float,
+               frame_size: Tuple[int, int] = (640, 480)) -> HandDetector:
+        """Benchmark the candidates and return the best one within budget_ms"""
+        candidates = sorted((HandDetectorSelector.BACKENDS[name] for name in HandDetectorSelector.AUTO_CANDIDATES),
+                            key=lambda backend: backend.accuracy, reverse=True)
+        chosen = None
+        cheapest = None  # (cost, detector) of the fastest backend over budget
+        for backend in candidates:
+            detector = HandDetectorSelector.create(backend.name, hands_options)
+            if detector is None:
+                continue
+            cost = HandDetectorSelector.benchmark(detector, frame_size)
+            print(f"Hand detector '{backend.name}': p95 {cost:.1f} ms per frame (budget {budget_ms:.1f} ms)")
+            if cost <= budget_ms:
+                chosen = detector
+                break
+            if cheapest is None or cost < cheapest[0]:
+                if cheapest:
+                    cheapest[1].close()
+                cheapest = (cost, detector)
+            else:
+                detector.close()
+
+        if chosen is None and cheapest is not None:
+            print(f"No hand detector fits the budget; using the fastest ('{cheapest[1].name}')")
+            chosen = cheapest[1]
+        elif chosen is not None and cheapest is not None:
+            cheapest[1].close()
+        if chosen is None:
+            chosen = MediaPipeHandsDetector(hands_options)
+        print(f"Using hand detector '{chosen.name}'")
+        return chosen
+
+class StageQueue:
+    """Bounded hand-off queue between pipeline stages.
+
+    When the queue is full, put() follows the queue's policy: 'block' waits
+    for room (backpressure), 'drop_oldest' evicts the oldest item so the
+    consumer always gets the newest data, 'drop_newest' discards the new item.
+    Every discarded item (evicted, rejected, or refused by a closed queue) is
+    passed to on_drop, so a producer can reclaim buffers it handed over.
+    """
+
+    POLICIES = ('block', 'drop_oldest', 'drop_newest')
+
+    def __init__(self, name: str, maxsize: int = 1, policy: str = 'drop_oldest', on_drop=None):
+        if policy not in self.POLICIES:
+            raise ValueError(f"Unknown queue policy '{policy}' (use one of {', '.join(self.POLICIES)})")
+        self.name = name
+        self.maxsize = max(1, maxsize)
+        self.policy = policy
+        self.on_drop = on_drop
+        self.items = deque()
+        self.condition = threading.Condition()
+        self.closed = False
+
+        self.puts = 0
+        self.dropped = 0
+        self.max_depth = 0
+
+    @classmethod
+    def from_env(cls, name: str, maxsize: int, policy: str, on_drop=None) -> 'StageQueue':
+        """Override size/policy with TRICHSHOT_<NAME>_QUEUE=policy[:size]"""
+        variable = f'TRICHSHOT_{name.upper()}_QUEUE'
+        setting = os.environ.get(variable)
+        if setting:
+            setting_policy, _, size = setting.partition(':')
+            if setting_policy in cls.POLICIES and (not size or (size.isdigit() and int(size) > 0)):
+                policy = setting_policy
+                maxsize = int(size) if size else maxsize
+            else:
+                print(f"Ignoring invalid {variable} '{setting}' "
+                      f"(expected {'|'.join(cls.POLICIES)}[:size])")
+        return cls(name, maxsize, policy, on_drop)
+
+    def put(self, item, timeout: float = 0.1) -> bool:
+        """Enqueue item; returns False if it was dropped or the queue closed"""
+        evicted = None
+        with self.condition:
+            accepted = not self.closed
+            if accepted and len(self.items) >= self.maxsize:
+                if self.policy == 'drop_newest':
+                    accepted = False
+                    self.dropped += 1
+                elif self.policy == 'drop_oldest':
+                    evicted = self.items.popleft()
+                    self.dropped += 1
+                else:
+                    while len(self.items) >= self.maxsize and not self.closed:
+                        self.condition.wait(timeout)
+                    accepted = not self.closed
+            if accepted:
+                self.items.append(item)
+                self.puts += 1
+                self.max_depth = max(self.max_depth, len(self.items))
+                self.condition.notify_all()
+        # Outside the lock: the callback may take locks of its own
+        if self.on_drop is not None:
+            if evicted is not None:
+                self.on_drop(evicted)
+            if not accepted:
+                self.on_drop(item)
+        return accepted
+
+    def get(self, timeout: float = 0.1):
+        """Dequeue the next item, or None on timeout/close"""
+        with self.condition:
+            if not self.items and not self.closed:
+                self.condition.wait(timeout)
+            if not self.items:
+                return None
+            item = self.items.popleft()
+            self.condition.notify_all()
+            return item
+
+    def close(self):
+        with self.condition:
+            self.closed = True
+            self.condition.notify_all()
+
+    def depth(self) -> int:
+        return len(self.items)
+
+class PipelineStage:
+    """One pipeline stage running on its own thread.
+
+    Pulls items with get_input(), hands them to process() and pushes non-None
+    results to the output queue, keeping throughput and blocking counters:
+    wait_time is time spent starved for input, blocked_time is time spent
+    pushing into a full (blocking) output queue. A positive niceness lowers
+    the thread's scheduling priority where the OS allows per-thread nice
+    values (Linux). An exception is logged and skips the item; after
+    max_errors consecutive failures the stage stops and calls on_failure().
+    """
+
+    def __init__(self, name: str, process, get_input, output: Optional[StageQueue] = None,
+                 niceness: int = 0, max_errors: int = 5, on_failure=None):
+        self.name = name
+        self.process = process
+        self.get_input = get_input
+        self.output = output
+        self.niceness = niceness
+        self.max_errors = max_errors
+        self.on_failure = on_failure
+        self.running = False
+        self.thread = None
+
+        self.items_processed = 0
+        self.busy_time = 0.0
+        self.wait_time = 0.0
+        self.blocked_time = 0.0
+        self.start_time = None
+        self.errors = 0
+
+    def start(self):
+        self.running = True
+        self.start_time = time.perf_counter()
+        self.thread = threading.Thread(target=self._run, name=f"trichshot-{self.name}", daemon=True)
+        self.thread.start()
+
+    def stop(self):
+        self.running = False
+
+    def join(self, timeout: float = 2.0):
+        if self.thread and self.thread is not threading.current_thread():
+            self.thread.join(timeout)
+
+    def alive(self) -> bool:
+        return self.thread is not None and self.thread.is_alive()
+
+    def _run(self):
+        if self.niceness:
+            try:
+                os.setpriority(os.PRIO_PROCESS, threading.get_native_id(), self.niceness)
+            except (AttributeError, OSError):
+                pass  # Not supported here; the stage runs at normal priority
+        consecutive_errors = 0
+        while self.running:
+            try:
+                started = time.perf_counter()
+                item = self.get_input()
+                fetched = time.perf_counter()
+                self.wait_time += fetched - started
+                if item is None:
+                    continue
+
+                result = self.process(item)
+                finished = time.perf_counter()
+                self.busy_time += finished - fetched
+                self.items_processed += 1
+                consecutive_errors = 0
+
+                if result is not None and self.output is not None:
+                    self.output.put(result)
+                    self.blocked_time += time.perf_counter() - finished
+            except Exception:
+                self.errors += 1
+                consecutive_errors += 1
+                print(f"Error in {self.name} stage:")
+                traceback.print_exc()
+                if consecutive_errors >= self.max_errors:
+                    print(f"Stopping: the {self.name} stage failed {consecutive_errors} times in a row")
+                    self.running = False
+                    if self.on_failure:
+                        self.on_failure()
+
+    def stats(self) -> Dict:
+        elapsed = max(time.perf_counter() - self.start_time, 1e-6) if self.start_time else 1e-6
+        processed = max(self.items_processed, 1)
+        return {
+            'name': self.name,
+            'processed': self.items_processed,
+            'fps': self.items_processed / elapsed,
+            'busy_ms': 1000.0 * self.busy_time / processed,
+            'wait_percent': 100.0 * self.wait_time / elapsed,
+            'blocked_percent': 100.0 * self.blocked_time / elapsed,
         }
+
+class FramePipeline:
+    """Chain of PipelineStages connected by StageQueues; on_failure is called
+    when a stage gives up after repeated errors"""
+
+    def __init__(self, on_failure=None):
+        self.stages = []
+        self.queues = []
+        self.on_failure = on_failure
+
+    def add_stage(self, name: str, process, input_queue: Optional[StageQueue] = None,
+                  get_input=None, niceness: int = 0) -> 'FramePipeline':
+        """Append a stage fed by input_queue (or by get_input for the first stage)"""
+        if input_queue is not None:
+            self.stages[-1].output = input_queue
+            self.queues.append(input_queue)
+            get_input = input_queue.get
+        self.stages.append(PipelineStage(name, process, get_input, niceness=niceness,
+                                         on_failure=self.on_failure))
+        return self
+
+    def start(self):
+        for stage in self.stages:
+            stage.start()
+
+    def stop(self, wait: bool = True):
+        for stage in self.stages:
+            stage.stop()
+        for queue in self.queues:
+            queue.close()
+        if wait:
+            for stage in self.stages:
+                stage.join()
+
+    def alive(self) -> bool:
+        """Whether any stage thread is still running (e.g. finishing an item)"""
+        return any(stage.alive() for stage in self.stages)
+
+    def stats(self) -> List[Dict]:
+        """Per-stage counters plus the depth of each stage's input queue"""
+        stats = []
+        for index, stage in enumerate(self.stages):
+            stage_stats = stage.stats()
+            if index > 0:
+                queue = self.queues[index - 1]
+                stage_stats.update(queue=queue.name, depth=queue.depth(),
+                                   capacity=queue.maxsize, dropped=queue.dropped)
+            stats.append(stage_stats)
+        return stats
+
+class SettingVar:
+    """Minimal stand-in for tk variables when running without the GUI"""
+    
+    def __init__(self, value=None):
+        self.value = value
         
-        try:
-            # Try to get camera name from v4l2
-            if os.path.exists(f'/dev/video{camera_index}'):
-                try:
-                    result = subprocess.run(
-                        ['v4l2-ctl', '--device', f'/dev/video{camera_index}', '--info'],
-                        capture_output=True, text=True, timeout=5
-                    )
-                    if result.returncode == 0:
-                        for line in result.stdout.split('\n'):
-                            if 'Card type' in line:
-                                info['name'] = line.split(':')[1].strip()
-                                break
-                except (subprocess.TimeoutExpired, FileNotFoundError):
-                    pass
-            
-            # Test camera functionality
-            cap = cv2.VideoCapture(camera_index)
-            if cap.isOpened():
-                ret, frame = cap.read()
-                if ret and frame is not None:
-                    info['working'] = True
-                    info['resolution'] = (int(cap.get(cv2.CAP_PROP_FRAME_WIDTH)), 
-                                        int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT)))
-                cap.release()
-                
-        except Exception as e:
-            print(f"Error checking camera {camera_index}: {e}")
-            
-        # Heuristics to determine if camera is external
-        name_lower = info['name'].lower()
-        external_indicators = [
-            'usb', 'logitech', 'microsoft', 'creative', 'webcam', 
-            'external', 'hd pro', 'c920', 'c922', 'c930', 'c270'
-        ]
-        integrated_indicators = [
-            'integrated', 'built-in', 'internal', 'laptop', 'chicony', 
-            'realtek', 'asus', 'hp truevision', 'lenovo', 'dell'
-        ]
-        
-        if any(indicator in name_lower for indicator in external_indicators):
-            info['is_external'] = True
-        elif any(indicator in name_lower for indicator in integrated_indicators):
-            info['is_external'] = False
-        else:
-            # If we can't determine from name, higher indices are more likely external
-            info['is_external'] = camera_index > 0
-            
-        return info
+    def get(self):
+        return self.value
     
+    def set(self, value):
+        self.value = value
+
+class ProfileCalibrator:
+    """Picks the capture mode, frame skip and model complexity for this host.
+
+    Replays a short clip through process_frame for every combination of
+    MODES, SKIPS and COMPLEXITIES, and measures sustained fps, p95
+    inference latency and the CPU share the configuration needs at its
+    capture rate. Alert latency is estimated as the wait for the next
+    inferred frame, plus the remaining alert votes, plus p95 inference.
+    The best configuration that keeps up with its capture rate within the
+    alert latency and CPU targets wins: highest complexity, then
+    resolution, then lowest skip. It is cached per host, and later runs load
+    it from CaptureProfile.from_env().
+    """
+
+    MODES = ((320, 240, 10.0), (640, 480, 15.0), (800, 600, 20.0))  # The run_trichshot.sh performance modes
+    SKIPS = (1, 2, 3)
+    COMPLEXITIES = (0, 1)
+    OVERRIDES = ('TRICHSHOT_DEFAULT_RESOLUTION', 'TRICHSHOT_DEFAULT_FPS', 'TRICHSHOT_DEFAULT_SKIP')
+
+    def __init__(self, target_latency_ms: float = 300.0, max_cpu_percent: float = 50.0,
+                 frames: int = 90, warmup_frames: int = 10):
+        self.target_latency_ms = target_latency_ms
+        self.max_cpu_percent = max_cpu_percent
+        self.frames = frames
+        self.warmup_frames = warmup_frames
+
+    @classmethod
+    def from_env(cls) -> 'ProfileCalibrator':
+        """Targets from TRICHSHOT_CALIBRATION_TARGET_MS (alert latency) and
+        TRICHSHOT_CALIBRATION_MAX_CPU (percent of one core)"""
+        calibrator = cls()
+        for variable, attribute in (('TRICHSHOT_CALIBRATION_TARGET_MS', 'target_latency_ms'),
+                                    ('TRICHSHOT_CALIBRATION_MAX_CPU', 'max_cpu_percent')):
+            value = os.environ.get(variable)
+            if value:
+                try:
+                    setattr(calibrator, attribute, float(value))
+                except ValueError:
+                    print(f"Ignoring invalid {variable} '{value}'")
+        return calibrator
+
     @staticmethod
-    def find_available_cameras() -> List[Dict]:
-        """Find all available cameras and return sorted by preference"""
-        cameras = []
+    def cache_path() -> str:
+        """TRICHSHOT_CALIBRATION_FILE, or a per-host file in the user cache directory"""
+        path = os.environ.get('TRICHSHOT_CALIBRATION_FILE')
+        if path:
+            return path
+        cache_dir = os.environ.get('XDG_CACHE_HOME') or os.path.join(os.path.expanduser('~'), '.cache')
+        return os.path.join(cache_dir, 'trichshot', f"profile-{socket.gethostname()}.json")
+
+    @classmethod
+    def overridden(cls) -> bool:
+        """True if TRICHSHOT_CALIBRATE is off or TRICHSHOT_DEFAULT_* pick the profile"""
+        if os.environ.get('TRICHSHOT_CALIBRATE', '1').lower() in ('0', 'off', 'false', 'no'):
+            return True
+        return any(os.environ.get(variable) for variable in cls.OVERRIDES)
+
+    @classmethod
+    def needed(cls) -> bool:
+        """First run: no cached profile and nothing overriding it"""
+        return not cls.overridden() and not os.path.isfile(cls.cache_path())
+
+    @classmethod
+    def load(cls) -> Optional[Dict]:
+        path = cls.cache_path()
+        if not os.path.isfile(path):
+            return None
+        try:
+            with open(path) as f:
+                profile = json.load(f)
+            profile['width'], profile['height'] = int(profile['width']), int(profile['height'])
+            profile['fps'] = float(profile['fps'])
+            profile['frame_skip'] = int(profile['frame_skip'])
+            profile['model_complexity'] = int(profile['model_complexity'])
+        except (OSError, ValueError, KeyError, TypeError) as e:
+            print(f"Ignoring unreadable calibration cache {path}: {e}")
+            return None
+        return profile
+
+    def save(self, profile: Dict):
+        path = self.cache_path()
+        try:
+            os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+            with open(path, 'w') as f:
+                json.dump(dict(profile, host=socket.gethostname(),
+                               calibrated=time.strftime('%Y-%m-%d %H:%M:%S'),
+                               target_latency_ms=self.target_latency_ms,
+                               max_cpu_percent=self.max_cpu_percent), f, indent=2)
+            print(f"Saved calibrated profile to {path}")
+        except OSError as e:
+            print(f"Could not save the calibrated profile to {path}: {e}")
+
+    @staticmethod
+    def read_clip(source: FrameSource, count: int = 60) -> List[np.ndarray]:
+        """Up to count frames from source (recorded or live) to replay per configuration"""
+        clip = []
+        while len(clip) < count:
+            ret, frame, _ = source.read_frame()
+            if not ret:
+                break
+            clip.append(frame.copy())  # Sources may reuse their buffers
+        return clip
+
+    def measure(self, app: 'TrichShotApp', clip: List[np.ndarray], width: int, height: int,
+                fps: float, frame_skip: int, model_complexity: int) -> Dict:
+        """Run process_frame over the clip at one configuration"""
+        frames = [cv2.resize(frame, (width, height), interpolation=cv2.INTER_AREA) for frame in clip]
+        buffer = np.empty_like(frames[0])  # process_frame draws on the frame it is given
+        app.capture_profile.fps = fps
+        app.capture_profile.frame_skip = frame_skip
+        detector = app.detector
+        if isinstance(detector, MediaPipeHandsDetector) and detector.options['model_complexity'] != model_complexity:
+            # The rebuilt graph is swapped in by the first detect() of the warm-up
+            while not detector.reconfigure(model_complexity=model_complexity):
+                time.sleep(0.05)
+            while detector.building:
+                time.sleep(0.05)
+        app.reset_detection_state()
         
-        # Check common camera indices
-        for i in range(10):  # Check /dev/video0 through /dev/video9
-            if os.path.exists(f'/dev/video{i}'):
-                camera_info = CameraDetector.get_camera_info(i)
-                if camera_info['working']:
-                    cameras.append(camera_info)
+        latencies = []
+        for i in range(self.warmup_frames + self.frames):
+            if i == self.warmup_frames:
+                started, cpu_started = time.perf_counter(), time.process_time()
+            np.copyto(buffer, frames[i % len(frames)])
+            inferences = app.inference_count
+            frame_started = time.perf_counter()
+            app.process_frame(buffer, i / fps)
+            if i >= self.warmup_frames and app.inference_count > inferences:
+                latencies.append(1000 * (time.perf_counter() - frame_started))
+        elapsed = time.perf_counter() - started
+        cpu = time.process_time() - cpu_started
         
-        # Sort cameras: external cameras first, then by index
-        cameras.sort(key=lambda x: (not x['is_external'], x['index']))
+        p95_ms = float(np.percentile(latencies, 95)) if latencies else 0.0
+        return {
+            'width': width, 'height': height, 'fps': fps,
+            'frame_skip': frame_skip, 'model_complexity': model_complexity,
+            'sustained_fps': self.frames / elapsed,
+            'p95_ms': p95_ms,
+            'cpu_percent': 100 * cpu / self.frames * fps,
+            'alert_latency_ms': 1000 * (frame_skip + app.alert_state.votes - 1) / fps + p95_ms,
+        }
+
+    def acceptable(self, result: Dict) -> bool:
+        return (result['sustained_fps'] >= result['fps']
+                and result['cpu_percent'] <= self.max_cpu_percent
+                and result['alert_latency_ms'] <= self.target_latency_ms)
+
+    def run(self, app: 'TrichShotApp', clip: List[np.ndarray]) -> Tuple[Dict, List[Dict]]:
+        """Measure the whole grid on app and return (best, all results)"""
+        # Fixed settings per configuration: no runtime tuning, no alerts sent out
+        app.tuner = None
+        app.alert_sinks = []
+        # A calibration clip is usually a still user: the motion gate would
+        # skip nearly every inference and the face zone would serve its
+        # cache, so measure every scheduled inference and the face zone's
+        # uncached detection rate instead
+        app.motion_gate = None
+        if app.face_zone:
+            app.face_zone.interval = app.face_zone.min_interval
+        if isinstance(app.detector, MediaPipeHandsDetector):
+            complexities = self.COMPLEXITIES
+        else:
+            complexities = (app.hands_options['model_complexity'],)  # Other backends ignore it
         
-        return cameras
+        results = []
+        print(f"Calibrating on {len(clip)} frames: alert latency <= {self.target_latency_ms:.0f} ms, "
+              f"CPU <= {self.max_cpu_percent:.0f}% of a core")
+        for model_complexity in complexities:
+            for width, height, fps in self.MODES:
+                for frame_skip in self.SKIPS:
+                    result = self.measure(app, clip, width, height, fps, frame_skip, model_complexity)
+                    results.append(result)
+                    print(f"  {width}x{height}@{fps:g} skip {frame_skip} complexity {model_complexity}: "
+                          f"{result['sustained_fps']:.0f} fps sustained, p95 {result['p95_ms']:.1f} ms, "
+                          f"CPU {result['cpu_percent']:.0f}%, alert ~{result['alert_latency_ms']:.0f} ms"
+                          f"{'' if self.acceptable(result) else ' (rejected)'}")
+        
+        acceptable = [result for result in results if self.acceptable(result)]
+        if acceptable:
+            best = max(acceptable, key=lambda r: (r['model_complexity'], r['width'] * r['height'],
+                                                  -r['frame_skip'], -r['cpu_percent']))
+        else:
+            best = min(results, key=lambda r: r['cpu_percent'])
+            print("No configuration met the targets; using the cheapest one")
+        print(f"Calibrated profile: {best['width']}x{best['height']}@{best['fps']:g}, frame skip "
+              f"{best['frame_skip']}, complexity {best['model_complexity']}")
+        return best, results
+
+def run_calibration(source_spec: Optional[str] = None) -> Optional[Dict]:
+    """Calibrate on a clip from source_spec (default: the preferred camera)
+    and cache the best profile for this host"""
+    if source_spec is None:
+        camera = CameraDetector.get_preferred_camera()
+        if camera is None:
+            print("No camera found to calibrate with; use --calibrate --source <recording>")
+            return None
+        source_spec = f"camera:{camera}"
+    source = FrameSource.from_spec(source_spec, max_speed=True)
+    if not source.isOpened():
+        print(f"Could not open calibration source '{source_spec}'")
+        return None
+    calibrator = ProfileCalibrator.from_env()
+    print(f"Recording calibration frames from {source.describe()}...")
+    clip = calibrator.read_clip(source)
+    source.release()
+    if not clip:
+        print(f"No frames from calibration source '{source_spec}'")
+        return None
     
+    app = TrichShotApp(gui=False)
+    try:
+        best, _ = calibrator.run(app, clip)
+    finally:
+        app.close_detectors()
+    calibrator.save(best)
+    return best
+
+class AlertSink:
+    """Receives alert start/end events (headless mode's replacement for the overlay)"""
+
+    def notify(self, event: str, count: int):
+        raise NotImplementedError
+
     @staticmethod
-    def get_preferred_camera() -> Optional[int]:
-        """Get the most preferred camera index"""
-        cameras = CameraDetector.find_available_cameras()
-        return cameras[0]['index'] if cameras else None
+    def describe_event(event: str, count: int) -> str:
+        return f"{time.strftime('%Y-%m-%d %H:%M:%S')} alert {event} (warnings: {count})"
+
+    @staticmethod
+    def from_env(default: str = '') -> List['AlertSink']:
+        """Sinks from TRICHSHOT_ALERT_SINKS ('log', 'file:PATH', comma
+        separated) plus TRICHSHOT_ALERT_COMMAND, a shell command run per event"""
+        sinks = []
+        for entry in os.environ.get('TRICHSHOT_ALERT_SINKS', default).split(','):
+            kind, _, argument = entry.strip().partition(':')
+            if kind == 'log':
+                sinks.append(LogAlertSink())
+            elif kind == 'file' and argument:
+                sinks.append(FileAlertSink(argument))
+            elif kind:
+                print(f"Ignoring invalid alert sink '{entry.strip()}'")
+        command = os.environ.get('TRICHSHOT_ALERT_COMMAND')
+        if command:
+            sinks.append(CommandAlertSink(command))
+        return sinks
+
+class LogAlertSink(AlertSink):
+    """One line per event on stdout (the journal under systemd, docker logs)"""
+
+    def notify(self, event: str, count: int):
+        print(self.describe_event(event, count), flush=True)
+
+class FileAlertSink(AlertSink):
+    """Appends one line per event to a file (reopened each time, so log rotation works)"""
+
+    def __init__(self, path: str):
+        self.path = path
+
+    def notify(self, event: str, count: int):
+        try:
+            with open(self.path, 'a') as f:
+                f.write(self.describe_event(event, count) + "\n")
+        except OSError as e:
+            print(f"Could not write alert to {self.path}: {e}")
+
+class CommandAlertSink(AlertSink):
+    """Runs a shell command per event with TRICHSHOT_ALERT_EVENT (start/end)
+    and TRICHSHOT_ALERT_COUNT set; never waits for it to finish"""
+
+    def __init__(self, command: str):
+        self.command = command
+        self.processes = []
+
+    def notify(self, event: str, count: int):
+        self.processes = [p for p in self.processes if p.poll() is None]  # Reap finished ones
+        env = dict(os.environ, TRICHSHOT_ALERT_EVENT=event, TRICHSHOT_ALERT_COUNT=str(count))
+        try:
+            self.processes.append(subprocess.Popen(self.command, shell=True, env=env))
+        except OSError as e:
+            print(f"Alert command failed: {e}")
 
 class TrichShotApp:
-    def __init__(self):
+    STAGE_EXIT_TIMEOUT = 3.0  # Seconds to wait for stage threads on stop/close
+    
+    def __init__(self, gui: bool = True, source_spec: Optional[str] = None):
         # MediaPipe setup (CPU-only mode for Docker)
         self.mp_hands = mp.solutions.hands
-        self.hands = self.mp_hands.Hands(
+        self.hands_options = dict(
             static_image_mode=False,
             max_num_hands=2,
             min_detection_confidence=0.7,
             min_tracking_confidence=0.5,
-            model_complexity=0  # Use simpler model for better Docker compatibility
+            model_complexity=0  # Starting point; ComplexityTuner raises it when the host can afford it
         )
-        self.mp_draw = mp.solutions.drawing_utils
+        self.hand_connections = np.array(sorted(self.mp_hands.HAND_CONNECTIONS), dtype=np.int32)
         
         # Video capture
-        self.cap = None
+        self.source_spec = source_spec  # None: live camera picked in the GUI
+        self.frame_source = None
+        self.source_name = None
+        self.frame_reader = None
+        self.pipeline = None
+        self.stop_requested = False
+        self.capture_profile = CaptureProfile.from_env()
+        if self.capture_profile.model_complexity is not None:
+            self.hands_options['model_complexity'] = self.capture_profile.model_complexity
+        
+        # Inference and the preview each work on their own downscaled copy
+        self.inference_scaler = FrameScaler(self.capture_profile.inference_size)
+        self.preview_scaler = FrameScaler(self.capture_profile.preview_size)
+        self.inference_times = deque(maxlen=120)  # When detect_hands last ran
+        
+        # Preview throttling: frames arriving before the next preview slot
+        # are dropped before they are scaled or drawn
+        self.next_preview_time = 0.0
+        self.previews_shown = 0
+        self.previews_throttled = 0
+        self.previews_skipped = 0  # No free buffer: the display still held them all
+        self.preview_pool = None
+        
+        # Hand detection backend (TRICHSHOT_INFERENCE): auto benchmarks the
+        # available backends against the per-frame CPU budget
+        self.detector = self.create_detector(os.environ.get('TRICHSHOT_INFERENCE', 'auto').lower())
+        self.tuner = ComplexityTuner.from_env(self.detector, self.frame_budget_ms())
         self.running = False
         self.current_camera_index = None
         
-        # Warning system
+        # Warning system (the overlay in the GUI; sinks get every start/end)
         self.warning_active = False
-        self.warning_window = None
+        self.warning_window = None  # Built once by setup_gui, then only shown/hidden
+        self.warning_label = None
+        self.alert_raised_at = None  # perf_counter() of the newest activation
+        self.overlay_latencies = deque(maxlen=50)  # Detection -> overlay mapped, ms
+        self.alert_sinks = AlertSink.from_env()
         
         # Configuration
+        # The sliders copy their values here, so worker threads never touch Tk
         self.danger_zone_top = 0.75    # Top 75% of screen (adjust as needed)
         self.danger_zone_bottom = 0.75  # Bottom 75% of screen
-        self.warning_cooldown = 0.5    # Minimum time in seconds between warning updates
-        self.last_warning_update = 0
         
-        # Setup GUI
-        self.setup_gui()
+        # ROI mode: run inference only on the danger-zone band plus a margin
+        self.roi_enabled = os.environ.get('TRICHSHOT_ROI', '0').lower() in ('1', 'on', 'true', 'yes')
+        self.roi_margin = 0.2  # Fraction of frame height
+        margin = os.environ.get('TRICHSHOT_ROI_MARGIN')
+        if margin:
+            try:
+                self.roi_margin = float(margin)
+            except ValueError:
+                print(f"Ignoring invalid TRICHSHOT_ROI_MARGIN '{margin}'")
         
-        # Detect cameras on startup
-        self.detect_cameras()
+        # Frame skipping: inference runs on every Nth frame, others reuse the last result
+        self.frame_index = 0
+        self.last_hands = NO_HANDS
+        self.last_pulling = np.zeros(0, dtype=bool)  # Pull gesture flags of last_hands
+        self.last_evaluation = None  # HandZoneEvaluation of the newest frame
+        self.last_frame_shape = None
+        self.inference_count = 0
+        
+        # Face-anchored zone (TRICHSHOT_FACE_ZONE): replaces the slider band
+        # while a face is cached
+        self.face_zone = FaceZone.from_env(self.frame_budget_ms())
+        self.last_zone = self.danger_zone()
+        
+        # Fingertip-to-face risk replaces the zone overlap test while a face is cached
+        self.proximity = ProximityScorer.from_env() if self.face_zone else None
+        
+        # Optional second stage: only hair-pulling gestures in the zone count
+        self.pull_gesture = PullGestureClassifier.from_env(self.hands_options['max_num_hands'])
+        
+        # Debounces per-frame results so noisy detections do not flicker the overlay
+        self.alert_state = AlertStateMachine.from_env(
+            self.hands_options['max_num_hands'], self.proximity.threshold if self.proximity else 0.7)
+        
+        # Motion pre-gate: skip inference while the danger zone is static
+        self.motion_gate = MotionGate.from_env()
+        
+        # Optical-flow tracking: propagate landmarks between inference keyframes
+        # (the keyframe interval never drops below the profile's frame skip)
+        self.tracker = LandmarkTracker.from_env()
+        if self.tracker:
+            self.tracker.keyframe_interval = max(self.tracker.keyframe_interval,
+                                                 self.capture_profile.frame_skip)
+        
+        # Stats
+        self.warnings_count = 0
+        self.session_start_time = None
+        self.session_cpu_start = 0.0
+        
+        if gui:
+            # Setup GUI
+            load_tk()
+            self.setup_gui()
+            
+            # Detect cameras on startup
+            self.detect_cameras()
+        else:
+            # Offline/benchmark use: plain values instead of Tk variables
+            self.root = None
+            self.danger_top_var = SettingVar(self.danger_zone_top)
+            self.danger_bottom_var = SettingVar(self.danger_zone_bottom)
+            self.warnings_count_var = SettingVar("Warnings triggered: 0")
         
+        self.startup_seconds = time.perf_counter() - STARTED_AT
+        
+    def frame_budget_ms(self) -> float:
+        """CPU time one inference may take: TRICHSHOT_FRAME_BUDGET_MS, or the
+        time between inferred frames at the capture profile's rate and skip"""
+        budget = os.environ.get('TRICHSHOT_FRAME_BUDGET_MS')
+        if budget:
+            try:
+                return float(budget)
+            except ValueError:
+                print("Ignoring invalid TRICHSHOT_FRAME_BUDGET_MS")
+        fps = self.capture_profile.fps or 30
+        return 1000.0 * self.capture_profile.frame_skip / fps
+    
+    def create_detector(self, name: str) -> HandDetector:
+        """Build the configured hand detector, falling back to MediaPipe Hands"""
+        if name == 'auto':
+            frame_size = self.inference_scaler.output_size(self.capture_profile.width or 640,
+                                                           self.capture_profile.height or 480)
+            return HandDetectorSelector.select(self.hands_options, self.frame_budget_ms(), frame_size)
+        detector = HandDetectorSelector.create(name, self.hands_options)
+        if detector is None:
+            print("Using the MediaPipe Hands solution instead")
+            detector = MediaPipeHandsDetector(self.hands_options)
+        return detector
+    
     def detect_cameras(self):
         """Detect available cameras and update UI"""
-        self.cameras = CameraDetector.find_available_cameras()
+        self.cameras = CameraDetector.find_available_cameras(self.capture_profile)
         
         if self.cameras:
             camera_info = []
             for cam in self.cameras:
                 status = "External" if cam['is_external'] else "Integrated"
                 resolution = f"{cam['resolution'][0]}x{cam['resolution'][1]}" if cam['resolution'] else "Unknown"
-                camera_info.append(f"Camera {cam['index']}: {cam['name']} ({status}) - {resolution}")
+                fourcc = f" {cam['fourcc']}" if cam['fourcc'] else ""
+                backend = " [v4l2]" if cam['backend'] == 'v4l2' else ""
+                camera_info.append(f"Camera {cam['index']}: {cam['name']} ({status}) - {resolution}{fourcc}{backend}")
             
             self.camera_info_text.set("\n".join(camera_info))
             self.selected_camera_var.set(self.cameras[0]['index'])  # Select preferred camera
@@ -157,7 +3276,7 @@ class TrichShotApp:
         """Setup the main control GUI"""
         self.root = tk.Tk()
         self.root.title("TrichShot -")
-        self.root.geometry("500x450")
+        self.root.geometry("560x600")
         
         # Status frame
         status_frame = ttk.Frame(self.root, padding="10")
@@ -213,6 +3332,9 @@ class TrichShotApp:
                                       variable=self.danger_bottom_var, orient=tk.HORIZONTAL)
         danger_bottom_scale.grid(row=1, column=1, sticky=(tk.W, tk.E))
         
+        self.danger_top_var.trace_add('write', self.on_danger_zone_changed)
+        self.danger_bottom_var.trace_add('write', self.on_danger_zone_changed)
+        
         # Stats frame
         stats_frame = ttk.LabelFrame(status_frame, text="Session Stats", padding="5")
         stats_frame.grid(row=4, column=0, columnspan=2, pady=10, sticky=(tk.W, tk.E))
@@ -226,9 +3348,10 @@ class TrichShotApp:
         self.camera_status_var = tk.StringVar(value="Camera: Not active")
         ttk.Label(stats_frame, textvariable=self.camera_status_var).grid(row=2, column=0)
         
-        # Initialize stats
-        self.warnings_count = 0
-        self.session_start_time = None
+        self.capture_stats_var = tk.StringVar(value="Frames: -")
+        ttk.Label(stats_frame, textvariable=self.capture_stats_var).grid(row=3, column=0)
+        
+        self.build_warning_window()
         
     def refresh_cameras(self):
         """Refresh camera detection"""
@@ -237,99 +3360,260 @@ class TrichShotApp:
         if self.cameras:
             self.camera_combo['values'] = [cam['index'] for cam in self.cameras]
         
-    def create_warning_window(self):
-        """Create a full-screen warning overlay"""
-        if self.warning_window:
-            return
-            
+    def build_warning_window(self):
+        """Build the full-screen warning overlay once, hidden until an alert"""
         self.warning_window = tk.Toplevel()
+        self.warning_window.withdraw()
         self.warning_window.attributes('-fullscreen', True)
         self.warning_window.attributes('-topmost', True)
         self.warning_window.configure(bg='black')
         
         # Add warning text
-        warning_label = tk.Label(
+        self.warning_label = tk.Label(
             self.warning_window,
-            text=str(self.warnings_count),
+            text="0",
             font=("Arial", 144, "bold"),
             bg='black',
             fg='white'
         )
-        warning_label.place(relx=0.5, rely=0.5, anchor='center')
+        self.warning_label.place(relx=0.5, rely=0.5, anchor='center')
         
         # Make window click-through (doesn't block other applications)
         self.warning_window.overrideredirect(False)
         
-    def destroy_warning_window(self):
-        """Remove the warning overlay"""
+        # Closing it from the window manager hides it instead of destroying it
+        self.warning_window.protocol("WM_DELETE_WINDOW", self.hide_warning_window)
+        self.warning_window.bind('<Map>', self.on_warning_mapped)
+        
+    def show_warning_window(self):
+        """Show the overlay with the current warning count"""
+        if not self.warning_window or not self.warning_active:
+            return  # The alert ended before the Tk thread got here
+        self.warning_label.config(text=str(self.warnings_count))
+        self.warning_window.deiconify()
+        self.warning_window.lift()
+        self.warning_window.update_idletasks()  # Send the map request now, not at the next idle
+        
+    def hide_warning_window(self):
+        """Hide the warning overlay"""
         if self.warning_window:
-            self.warning_window.destroy()
-            self.warning_window = None
+            self.warning_window.withdraw()
+    
+    def on_warning_mapped(self, event):
+        """Record detection-to-visible latency when the overlay is mapped"""
+        # The label's own <Map> events also reach the toplevel's binding
+        if event.widget is self.warning_window and self.alert_raised_at is not None:
+            self.overlay_latencies.append(1000 * (time.perf_counter() - self.alert_raised_at))
+            self.alert_raised_at = None
+    
+    def frame_interval_ms(self) -> float:
+        """Time between captured frames at the granted (or requested) rate"""
+        fps = self.capture_profile.granted.get('fps') or self.capture_profile.fps or 30
+        return 1000.0 / fps
             
-    def is_hand_in_danger_zone(self, hand_landmarks, frame_shape) -> bool:
-        """Check if hand is in the danger zone (near face area)"""
-        h, w = frame_shape[:2]
-        
-        # Get hand bounding box
-        x_coords = [lm.x for lm in hand_landmarks.landmark]
-        y_coords = [lm.y for lm in hand_landmarks.landmark]
+    def on_danger_zone_changed(self, *args):
+        """Slider callback (Tk thread): publish the new zone to the pipeline"""
+        self.danger_zone_top = self.danger_top_var.get()
+        self.danger_zone_bottom = self.danger_bottom_var.get()
+    
+    def danger_zone(self) -> Tuple[float, float, float, float]:
+        """Snapshot of the slider zone (top, bottom, left, right), read once per frame"""
+        return self.danger_zone_top, self.danger_zone_bottom, 0.0, 1.0
+    
+    def reset_detection_state(self):
+        """Clear per-session detection state before a new run"""
+        self.frame_index = 0
+        self.last_hands = NO_HANDS
+        self.last_pulling = np.zeros(0, dtype=bool)
+        self.last_evaluation = None
+        self.last_frame_shape = None
+        self.inference_count = 0
+        self.inference_times.clear()
+        self.alert_state.reset()
+        if self.pull_gesture:
+            self.pull_gesture.reset()
+        if self.face_zone:
+            self.face_zone.reset()
+        if self.motion_gate:
+            self.motion_gate.reset()
+        if self.tracker:
+            self.tracker.reset()
+    
+    def get_inference_roi(self, frame_height: int, zone: Tuple[float, ...]) -> Tuple[int, int]:
+        """Row range (top, bottom) of the danger-zone band plus margin"""
+        danger_top, danger_bottom = zone[:2]
+        top = max(0.0, min(danger_top, danger_bottom) - self.roi_margin)
+        bottom = min(1.0, max(danger_top, danger_bottom) + self.roi_margin)
+        # At least one row, even for a zone on the bottom edge
+        top_row = min(int(frame_height * top), frame_height - 1)
+        return top_row, max(int(frame_height * bottom), top_row + 1)
+    
+    def detect_hands(self, frame, timestamp: float, zone: Tuple[float, ...]) -> Optional[np.ndarray]:
+        """Run hand inference on the frame, or on the danger-zone band in ROI mode.
         
-        min_y = min(y_coords)
-        max_y = max(y_coords)
+        Returns None when an asynchronous backend has no new result yet.
+        """
+        # Crop before the colour conversion so both only touch the band's pixels
+        h = frame.shape[0]
+        top_row, bottom_row = self.get_inference_roi(h, zone) if self.roi_enabled else (0, h)
+        crop = frame[top_row:bottom_row]
+        roi = (top_row, bottom_row - top_row, h)
         
-        # Check if hand intersects with danger zone
-        danger_top = self.danger_top_var.get()
-        danger_bottom = self.danger_bottom_var.get()
+        try:
+            start = time.perf_counter()
+            result = self.detector.detect(crop, timestamp, context=roi)
+            if self.tuner:
+                self.tuner.record(1000.0 * (time.perf_counter() - start), timestamp)
+        except (EOFError, OSError, cv2.error) as e:
+            if isinstance(self.detector, MediaPipeHandsDetector):
+                raise  # Nothing left to fall back to; the stage logs it and skips the frame
+            print(f"Hand detector '{self.detector.name}' failed ({e}), falling back to MediaPipe Hands")
+            self.detector.close()
+            self.detector = MediaPipeHandsDetector(self.hands_options)
+            self.tuner = ComplexityTuner.from_env(self.detector, self.frame_budget_ms())
+            return self.detect_hands(frame, timestamp, zone)
+        if result is None:
+            return None
+        # Asynchronous backends may answer for an earlier frame and ROI
+        result_roi, landmarks, _ = result
         
-        return (min_y < danger_bottom) and (max_y > danger_top)
+        # Map landmarks back to full-frame coordinates. The crop spans the full
+        # width, so x (and z, which is scaled by width) are unchanged.
+        top_row, crop_h, frame_h = result_roi or roi
+        if crop_h != frame_h and len(landmarks):
+            landmarks = landmarks * np.float32((1.0, crop_h / frame_h, 1.0))
+            landmarks[:, :, 1] += top_row / frame_h
+        return landmarks
     
-    def process_frame(self, frame):
-        """Process a single frame for hand detection"""
-        rgb_frame = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-        results = self.hands.process(rgb_frame)
+    def analyze_frame(self, frame, timestamp: Optional[float] = None) -> Tuple[np.ndarray, bool]:
+        """Detect hands, test the danger zone and update the warning state"""
+        if timestamp is None:
+            timestamp = time.monotonic()
+        zone = self.danger_zone()
+        face_zone = self.face_zone.update(frame, timestamp) if self.face_zone else None
+        # Falls back to the slider band while no face is cached
+        zone = face_zone or zone
+        self.last_zone = zone
         
-        hands_in_danger = False
+        if self.tracker:
+            run_inference = self.tracker.needs_keyframe(self.frame_index)
+        else:
+            run_inference = self.frame_index % self.capture_profile.frame_skip == 0
+        self.frame_index += 1
         
-        if results.multi_hand_landmarks:
-            for hand_landmarks in results.multi_hand_landmarks:
-                # Draw hand landmarks on frame
-                self.mp_draw.draw_landmarks(frame, hand_landmarks, self.mp_hands.HAND_CONNECTIONS)
-                
-                # Check if hand is in danger zone
-                if self.is_hand_in_danger_zone(hand_landmarks, frame.shape):
-                    hands_in_danger = True
-                    
-                    # Draw danger zone indicator
-                    h, w = frame.shape[:2]
-                    cv2.rectangle(frame, 
-                                (0, int(h * self.danger_top_var.get())), 
-                                (w, int(h * self.danger_bottom_var.get())), 
-                                (0, 0, 255), 3)
-        
-        # Update warning state
-        current_time = time.time()
-        if current_time - self.last_warning_update > self.warning_cooldown:
-            if hands_in_danger and not self.warning_active:
-                self.activate_warning()
-            elif not hands_in_danger and self.warning_active:
-                self.deactivate_warning()
-            self.last_warning_update = current_time
+        hands = None
+        if run_inference:
+            if self.motion_gate is None or self.motion_gate.should_infer(frame, zone[0], zone[1], timestamp):
+                # Landmarks are normalized, so results on the scaled copy fit frame as-is
+                hands = self.detect_hands(self.inference_scaler.scale(frame), timestamp, zone)
+                self.inference_times.append(time.monotonic())
+                self.inference_count += 1
+                if hands is not None and len(hands) and self.motion_gate:
+                    self.motion_gate.hand_seen(timestamp)
+            else:
+                hands = NO_HANDS  # Static scene: no hand can have entered the zone
+            if hands is not None and self.tracker:
+                self.tracker.update_keyframe(frame, hands)
+        
+        # Only a new observation votes: a repeated result (skipped frame, or
+        # an asynchronous backend still working) must not count again
+        fresh = True
+        if hands is not None:
+            self.last_hands = hands
+        elif self.tracker:
+            # Between keyframes: move the last landmarks with optical flow
+            hands = self.last_hands = self.tracker.track(frame)
+        else:
+            hands = self.last_hands
+            fresh = False
+        
+        # Check if any hand is in the danger zone
+        self.last_evaluation = HandZoneEvaluation(hands, *zone)
+        if self.proximity and face_zone and len(hands):
+            h, w = frame.shape[:2]
+            self.last_evaluation.risk, _ = self.proximity.score(
+                hands, self.face_zone.face_points, self.face_zone.face_size, w / h)
+            hands_in_danger = bool(self.last_evaluation.risk.max() >= self.proximity.threshold)
+        else:
+            hands_in_danger = self.last_evaluation.any_in_zone
+        
+        # Update warning state from the debounced per-hand votes
+        evaluation = self.last_evaluation
+        scores = evaluation.scores
+        if self.pull_gesture:
+            if fresh:
+                self.last_pulling = self.pull_gesture.update(hands, evaluation.centers, zone)
+            scores = scores * self.last_pulling
+            hands_in_danger = bool((scores > 0).any())
+        if fresh:
+            alerting = self.alert_state.update(evaluation.centers, scores, timestamp)
+        else:
+            alerting = self.alert_state.alerting
+        if alerting and not self.warning_active:
+            self.activate_warning()
+        elif not alerting and self.warning_active:
+            self.deactivate_warning()
             
+        return hands, hands_in_danger
+    
+    def draw_detections(self, frame, hands: np.ndarray, hands_in_danger: bool,
+                        zone: Optional[Tuple[float, ...]] = None, mirrored: bool = False):
+        """Draw hand landmarks and, when triggered, the danger zone onto frame.
+        
+        Detection runs on the camera image; with mirrored, frame is its
+        horizontal flip and x coordinates are flipped to match.
+        """
+        h, w = frame.shape[:2]
+        if len(hands):
+            # Same colours as mediapipe.solutions.drawing_utils, one call per primitive type
+            xy = hands[:, :, :2]
+            if mirrored:
+                xy = xy * np.float32((-1, 1)) + np.float32((1, 0))
+            points = (xy * np.float32((w, h))).astype(np.int32)
+            segments = points[:, self.hand_connections].reshape(-1, 2, 2)
+            cv2.polylines(frame, list(segments), False, (224, 224, 224), 2)
+            for x, y in points.reshape(-1, 2).tolist():
+                cv2.circle(frame, (x, y), 2, (0, 0, 255), -1)
+        
+        if hands_in_danger:
+            # Draw danger zone indicator
+            danger_top, danger_bottom, left, right = zone or self.danger_zone()
+            if mirrored:
+                left, right = 1.0 - right, 1.0 - left
+            cv2.rectangle(frame, 
+                        (int(w * left), int(h * danger_top)), 
+                        (int(w * right), int(h * danger_bottom)), 
+                        (0, 0, 255), 3)
         return frame
     
+    def process_frame(self, frame, timestamp: Optional[float] = None):
+        """Process a single frame for hand detection"""
+        hands, hands_in_danger = self.analyze_frame(frame, timestamp)
+        return self.draw_detections(frame, hands, hands_in_danger)
+    
     def activate_warning(self):
         """Activate the warning system"""
         if not self.warning_active:
             self.warning_active = True
             self.warnings_count += 1
             self.warnings_count_var.set(f"Warnings triggered: {self.warnings_count}")
-            self.root.after(0, self.create_warning_window)
+            self.alert_raised_at = time.perf_counter()
+            self.call_in_gui(self.show_warning_window)
+            for sink in self.alert_sinks:
+                sink.notify('start', self.warnings_count)
             
     def deactivate_warning(self):
         """Deactivate the warning system"""
         if self.warning_active:
             self.warning_active = False
-            self.root.after(0, self.destroy_warning_window)
+            self.call_in_gui(self.hide_warning_window)
+            for sink in self.alert_sinks:
+                sink.notify('end', self.warnings_count)
+    
+    def call_in_gui(self, callback):
+        """Schedule callback on the Tk thread (no-op without a GUI)"""
+        if self.root:
+            self.root.after(0, callback)
     
     def update_session_time(self):
         """Update the session time display"""
@@ -343,12 +3627,75 @@ class TrichShotApp:
         if self.running:
             self.root.after(1000, self.update_session_time)
     
-    def start_monitoring(self):
-        """Start the hand monitoring system"""
-        try:
-            # Get selected camera index
-            selected_camera = self.selected_camera_var.get()
+    def inference_fps(self) -> float:
+        """Effective hand inference rate over the last few seconds"""
+        if len(self.inference_times) < 2:
+            return 0.0
+        window = time.monotonic() - self.inference_times[0]
+        return (len(self.inference_times) - 1) / window if window > 0 else 0.0
+    
+    def describe_sizes(self, frame_shape) -> str:
+        """Capture / inference / preview sizes for a frame of frame_shape"""
+        h, w = frame_shape[:2]
+        sizes = [(w, h), self.inference_scaler.output_size(w, h), self.preview_scaler.output_size(w, h)]
+        return " / ".join(f"{sw}x{sh}" for sw, sh in sizes)
+    
+    def update_capture_stats(self):
+        """Update the frame drop / frame age display"""
+        if self.frame_reader and self.running:
+            stats = self.frame_reader.stats()
+            text = (f"Frames: {stats['delivered']} processed, {stats['dropped']} dropped, "
+                    f"age {stats['avg_age_ms']:.0f} ms")
+            if self.last_frame_shape:
+                text += (f"\nCapture / inference / preview: {self.describe_sizes(self.last_frame_shape)}, "
+                         f"inference {self.inference_fps():.1f} fps")
+            if self.motion_gate:
+                text += f"\nIdle inference skipped: {100 * self.motion_gate.skip_ratio:.0f}%"
+            if self.face_zone:
+                text += (f"\nFace zone: cache hit rate {100 * self.face_zone.hit_rate:.0f}%, "
+                         f"{self.face_zone.amortized_ms:.2f} ms/frame")
+            evaluation = self.last_evaluation
+            if evaluation is not None and evaluation.risk is not None:
+                text += f", risk {evaluation.risk.max():.2f}"
+            if self.tuner:
+                text += f"\nHand model: {self.tuner.describe()}"
+            if self.tracker:
+                text += (f"\nTracked frames: {self.tracker.frames_tracked} "
+                         f"({self.tracker.tracking_failures} forced keyframes)")
+            if self.overlay_latencies:
+                latencies = np.array(self.overlay_latencies)
+                text += (f"\nAlert overlay: {latencies[-1]:.0f} ms detection to visible "
+                         f"(p95 {np.percentile(latencies, 95):.0f} ms, frame interval "
+                         f"{self.frame_interval_ms():.0f} ms)")
+            if self.previews_shown:
+                limit = f"max {self.capture_profile.preview_fps:g} fps" if self.capture_profile.preview_fps else "no fps cap"
+                text += (f"\nPreview: {self.previews_shown} shown ({limit}), "
+                         f"{self.previews_throttled} throttled, {self.previews_skipped} skipped (display busy)")
+            if self.pipeline:
+                for stage in self.pipeline.stats():
+                    text += (f"\n{stage['name']}: {stage['fps']:.1f} fps, {stage['busy_ms']:.1f} ms/frame, "
+                             f"blocked {stage['blocked_percent']:.0f}%")
+                    if 'queue' in stage:
+                        text += f", queue {stage['depth']}/{stage['capacity']} ({stage['dropped']} dropped)"
+            self.capture_stats_var.set(text)
             
+        if self.running:
+            self.root.after(1000, self.update_capture_stats)
+    
+    def start_session(self, selected_camera: Optional[int] = None) -> Optional[Dict]:
+        """Open the source and start the capture thread and processing stages.
+        
+        Uses the configured source spec if there is one, otherwise the
+        detected camera selected_camera. Returns that camera's info (None
+        for a configured source); raises if the source cannot be read.
+        """
+        if self.source_spec:
+            # Configured source (recording, image sequence, synthetic) instead of the picker
+            self.frame_source = FrameSource.from_spec(self.source_spec, profile=self.capture_profile)
+            self.source_name = self.frame_source.describe()
+            camera_info = None
+            selected_camera = None
+        else:
             if not self.cameras:
                 raise Exception("No cameras available. Please refresh and try again.")
             
@@ -357,37 +3704,64 @@ class TrichShotApp:
             if not camera_info:
                 raise Exception(f"Selected camera {selected_camera} is not available.")
             
-            # Try to open the selected camera
-            self.cap = cv2.VideoCapture(selected_camera)
-            if not self.cap.isOpened():
-                raise Exception(f"Could not open camera {selected_camera}")
-            
-            # Test if we can read a frame
-            ret, test_frame = self.cap.read()
-            if not ret or test_frame is None:
-                self.cap.release()
-                raise Exception(f"Camera {selected_camera} opened but cannot read frames")
-            
-            self.current_camera_index = selected_camera
-            self.running = True
-            self.session_start_time = time.time()
-            self.warnings_count = 0
-            self.warnings_count_var.set("Warnings triggered: 0")
-            
-            camera_type = "External" if camera_info['is_external'] else "Integrated"
-            self.status_label.config(text=f"Status: Monitoring Active (Camera {selected_camera})")
-            self.camera_status_var.set(f"Camera: {camera_info['name']} ({camera_type})")
+            # Open the selected camera with the capture profile (pixel format/resolution/FPS)
+            self.capture_profile.fourcc = camera_info['fourcc']
+            self.frame_source = CameraFrameSource(selected_camera, camera_info['backend'],
+                                                  self.capture_profile)
+            self.source_name = f"Camera {selected_camera}"
+            
+        if not self.frame_source.isOpened():
+            raise Exception(f"Could not open {self.source_name}")
+        
+        # Test if we can read a frame
+        ret, test_frame, _ = self.frame_source.read_frame()
+        if not ret:
+            self.frame_source.release()
+            raise Exception(f"{self.source_name} opened but cannot read frames")
+        
+        self.current_camera_index = selected_camera
+        self.running = True
+        self.session_start_time = time.time()
+        self.session_cpu_start = time.process_time()
+        self.reset_detection_state()
+        self.warnings_count = 0
+        self.warnings_count_var.set("Warnings triggered: 0")
+        
+        # Start the capture thread, then the processing stages. The infer
+        # stage is the reader's only consumer and is done with a captured
+        # frame before it reads the next one, so the reader holds just one.
+        self.stop_requested = False
+        self.pipeline = self.build_pipeline(preview=self.root is not None)
+        self.frame_reader = LatestFrameReader(self.frame_source, hold=1)
+        self.frame_reader.start()
+        self.pipeline.start()
+        return camera_info
+    
+    def start_monitoring(self):
+        """Start the hand monitoring system"""
+        try:
+            camera_info = self.start_session(self.selected_camera_var.get())
+            
+            self.status_label.config(text=f"Status: Monitoring Active ({self.source_name})")
+            if camera_info:
+                camera_type = "External" if camera_info['is_external'] else "Integrated"
+                self.camera_status_var.set(
+                    f"Camera: {camera_info['name']} ({camera_type}) - {self.capture_profile.describe()}"
+                )
+            else:
+                self.camera_status_var.set(f"Source: {self.source_name}")
             self.start_button.config(state=tk.DISABLED)
             self.stop_button.config(state=tk.NORMAL)
             
-            # Start the monitoring thread
-            self.monitor_thread = threading.Thread(target=self.monitor_loop, daemon=True)
-            self.monitor_thread.start()
-            
-            # Start session time updates
+            # Start session time and capture stats updates
             self.update_session_time()
+            self.update_capture_stats()
             
-            print(f"Started monitoring with {camera_type.lower()} camera: {camera_info['name']}")
+            if camera_info:
+                print(f"Started monitoring with {camera_type.lower()} camera: {camera_info['name']}")
+                print(f"Capture profile: {self.capture_profile.describe()} ({camera_info['backend']} backend)")
+            else:
+                print(f"Started monitoring with source: {self.source_name}")
             
         except Exception as e:
             self.status_label.config(text=f"Error: {str(e)}")
@@ -395,42 +3769,347 @@ class TrichShotApp:
     
     def stop_monitoring(self):
         """Stop the hand monitoring system"""
+        was_running = self.running
         self.running = False
         
-        if self.cap:
-            self.cap.release()
+        # Stages exit on their own; joining here could deadlock on root.after(),
+        # so the GUI polls for them in after_pipeline_exits() instead
+        if self.pipeline:
+            self.pipeline.stop(wait=self.root is None)
+            
+        if self.frame_reader:
+            self.frame_reader.stop()
+            
+        if self.frame_source:
+            self.frame_source.release()
+            self.frame_source = None
             
-        cv2.destroyAllWindows()
         self.deactivate_warning()
-        
-        self.status_label.config(text="Status: Stopped")
-        self.camera_status_var.set("Camera: Not active")
-        self.start_button.config(state=tk.NORMAL)
-        self.stop_button.config(state=tk.DISABLED)
         self.current_camera_index = None
+        if was_running:
+            print(self.describe_usage())
+        
+        if self.root:
+            cv2.destroyAllWindows()
+            self.status_label.config(text="Status: Stopped")
+            self.camera_status_var.set("Camera: Not active")
+            self.stop_button.config(state=tk.DISABLED)
+            # Start again only once the old stages are gone, so two infer
+            # threads never share the tracker and alert state
+            self.after_pipeline_exits(lambda: self.start_button.config(state=tk.NORMAL))
     
-    def monitor_loop(self):
-        """Main monitoring loop (runs in separate thread)"""
-        while self.running:
-            ret, frame = self.cap.read()
+    def after_pipeline_exits(self, callback, deadline: Optional[float] = None):
+        """Run callback on the Tk thread once every stage thread has exited
+        (or after STAGE_EXIT_TIMEOUT seconds)"""
+        if deadline is None:
+            deadline = time.monotonic() + self.STAGE_EXIT_TIMEOUT
+        if self.pipeline and self.pipeline.alive():
+            if time.monotonic() < deadline:
+                self.root.after(20, self.after_pipeline_exits, callback, deadline)
+                return
+            print("Pipeline stages did not exit in time; continuing anyway")
+        callback()
+    
+    def session_usage(self) -> Dict:
+        """Startup time, memory and CPU per analysed frame of the current session"""
+        usage = resource_usage()
+        elapsed = time.time() - self.session_start_time if self.session_start_time else 0.0
+        cpu = time.process_time() - self.session_cpu_start
+        usage.update(startup_s=self.startup_seconds, frames=self.frame_index, cpu_s=cpu,
+                     cpu_ms_per_frame=1000 * cpu / self.frame_index if self.frame_index else 0.0,
+                     cpu_percent=100 * cpu / elapsed if elapsed else 0.0,
+                     tk_loaded='tkinter' in sys.modules)
+        return usage
+    
+    def describe_usage(self) -> str:
+        usage = self.session_usage()
+        return (f"Session: {usage['frames']} frames, startup {usage['startup_s']:.2f} s, "
+                f"CPU {usage['cpu_ms_per_frame']:.1f} ms/frame ({usage['cpu_percent']:.0f}% of a core), "
+                f"RSS {usage['rss_mb']:.0f} MB (peak {usage['peak_rss_mb']:.0f} MB), "
+                f"Tk {'loaded' if usage['tk_loaded'] else 'not loaded'}")
+    
+    def run_headless(self, max_frames: Optional[int] = None) -> Dict:
+        """Monitor without Tk or a preview window, e.g. as a systemd or container service.
+        
+        Nothing is drawn; alerts go to the alert sinks (log lines by
+        default). Runs until SIGINT/SIGTERM, the end of the source or
+        max_frames analysed frames, then reports startup time, memory and
+        CPU per frame.
+        """
+        if not self.alert_sinks:
+            self.alert_sinks = AlertSink.from_env('log')
+        for signum in (signal.SIGINT, signal.SIGTERM):
+            signal.signal(signum, lambda *args: self.request_stop())
+        
+        selected_camera = None
+        if not self.source_spec:
+            self.cameras = CameraDetector.find_available_cameras(self.capture_profile)
+            selected_camera = self.cameras[0]['index'] if self.cameras else None
+        self.start_session(selected_camera)
+        print(f"Headless monitoring started with {self.source_name} "
+              f"({self.detector.name} backend, startup {self.startup_seconds:.2f} s)", flush=True)
+        
+        while not self.stop_requested:
+            if max_frames and self.frame_index >= max_frames:
+                break
+            time.sleep(0.1)
+        
+        usage = self.session_usage()
+        self.stop_monitoring()
+        return usage
+    
+    def build_pipeline(self, preview: bool = True) -> FramePipeline:
+        """Capture -> infer -> render stages with a bounded render queue.
+        
+        Capture is the LatestFrameReader thread; infer reads the newest
+        frame from it whenever it is ready, so stale frames are dropped by
+        the reader. The captured frame never leaves the infer stage: frames
+        for the preview are copied into a BufferPool, throttled to the
+        profile's preview fps, and skipped while the display still holds
+        every pooled buffer. The alert path therefore never waits for the
+        preview, and render runs at a lower priority. Without preview
+        (headless) there is no render stage and nothing is drawn.
+        """
+        pipeline = (FramePipeline(on_failure=self.request_stop)
+                    .add_stage('infer', self.infer_stage, get_input=self.read_next_frame))
+        self.preview_pool = None
+        if preview:
+            # Previews the queue evicts or rejects go straight back to the
+            # pool; one buffer more than the queue holds covers the one the
+            # display is drawing
+            render_queue = StageQueue.from_env('render', 1, 'drop_oldest',
+                                               on_drop=self.release_preview)
+            self.preview_pool = BufferPool(render_queue.maxsize + 1)
+            self.next_preview_time = 0.0
+            self.previews_shown = 0
+            self.previews_throttled = 0
+            self.previews_skipped = 0
+            pipeline.add_stage('render', self.render_stage, render_queue, niceness=5)
+        return pipeline
+    
+    def release_preview(self, item):
+        """Return a render item's preview buffer to the pool (render queue on_drop)"""
+        self.preview_pool.release(item[0])
+    
+    def request_stop(self):
+        """Ask the Tk thread to stop monitoring (safe to call from any stage)"""
+        if not self.stop_requested:
+            self.stop_requested = True
+            self.call_in_gui(self.stop_monitoring)
+    
+    def read_next_frame(self):
+        """Pipeline input: the freshest captured frame, or None if none arrived yet"""
+        # Always work on the freshest frame; stale ones are dropped by the reader
+        ret, frame, timestamp = self.frame_reader.read(timeout=0.1)
+        if not ret:
+            if not self.frame_reader.running and self.running:
+                print(f"Failed to read frame from {self.source_name}")
+                self.request_stop()
+            return None
+        return frame, timestamp
+    
+    def infer_stage(self, item):
+        """Hand detection, zone test and warning updates (the alert path)"""
+        frame, timestamp = item
+        self.last_frame_shape = frame.shape
+        hands, hands_in_danger = self.analyze_frame(frame, timestamp)
+        if self.preview_pool is None:
+            return None
+        preview = self.mirror_preview(frame)
+        if preview is None:
+            return None
+        return preview, hands, hands_in_danger, self.last_zone
+    
+    def mirror_preview(self, frame) -> Optional[np.ndarray]:
+        """Scaled, mirrored copy of frame for the render stage, or None if
+        the preview is throttled or the display still holds every buffer"""
+        # Throttle before any per-frame work, so frames that will not be
+        # shown are never scaled or drawn
+        now = time.perf_counter()
+        preview_fps = self.capture_profile.preview_fps
+        if preview_fps:
+            if now < self.next_preview_time:
+                self.previews_throttled += 1
+                return None
+            # Keep a fixed schedule, restarting it after a display stall
+            interval = 1.0 / preview_fps
+            self.next_preview_time = max(self.next_preview_time, now - interval) + interval
+        
+        # Scale before mirroring so the copy only touches preview pixels;
+        # the captured frame itself is never modified
+        preview = self.preview_scaler.scale(frame)
+        buffer = self.preview_pool.acquire(preview.shape)
+        if buffer is None:
+            self.previews_skipped += 1  # The display has stalled; detection carries on
+            return None
+        return cv2.flip(preview, 1, dst=buffer)
+    
+    def render_stage(self, item):
+        """Draw detections and show the preview (optional - for debugging)"""
+        frame, hands, hands_in_danger, zone = item
+        try:
+            if not self.running:
+                return None
+            self.previews_shown += 1
+            self.draw_detections(frame, hands, hands_in_danger, zone, mirrored=True)
+            cv2.imshow(f'Hand Detection - {self.source_name} (Press Q to close)', frame)
+            
+            # Stop on 'q' key press
+            if cv2.waitKey(1) & 0xFF == ord('q'):
+                self.request_stop()
+        finally:
+            self.preview_pool.release(frame)
+        return None
+    
+    def run_benchmark(self, source: FrameSource, max_frames: Optional[int] = None,
+                      trace_allocations: bool = False, warmup_frames: int = 30,
+                      mirror_frames: bool = False) -> Dict:
+        """Drive process_frame over every frame of source and report throughput.
+        
+        With trace_allocations, tracemalloc records the peak Python/NumPy
+        allocation of every frame after warmup_frames, to check that the
+        steady-state frame path does not allocate frame-sized buffers.
+        mirror_frames flips every frame before inference, as the pipeline
+        used to, to measure what mirror-free inference saves.
+        """
+        frame_times = []
+        frame_allocations = []
+        frame = None
+        mirrored = BufferRing(1)
+        self.reset_detection_state()
+        
+        wall_start = time.perf_counter()
+        cpu_start = time.process_time()
+        while max_frames is None or len(frame_times) < max_frames:
+            ret, frame, timestamp = source.read_frame(frame)
             if not ret:
-                print("Failed to read frame from camera")
                 break
-                
-            # Flip frame horizontally for mirror effect
-            frame = cv2.flip(frame, 1)
             
-            # Process frame for hand detection
-            processed_frame = self.process_frame(frame)
+            if trace_allocations and len(frame_times) == warmup_frames:
+                tracemalloc.start()
+            tracing = tracemalloc.is_tracing()
+            if tracing:
+                allocated_before = tracemalloc.get_traced_memory()[0]
+                tracemalloc.reset_peak()
+            
+            start = time.perf_counter()
+            self.last_frame_shape = frame.shape
+            if mirror_frames:
+                self.process_frame(cv2.flip(frame, 1, dst=mirrored.next(frame.shape)), timestamp)
+            else:
+                self.process_frame(frame, timestamp)
+            frame_times.append(time.perf_counter() - start)
+            if tracing:
+                frame_allocations.append(tracemalloc.get_traced_memory()[1] - allocated_before)
+        if tracemalloc.is_tracing():
+            tracemalloc.stop()
+        wall = time.perf_counter() - wall_start
+        cpu = time.process_time() - cpu_start
+        
+        if not frame_times:
+            print(f"No frames read from {source.describe()}")
+            return {}
+        
+        frame_ms = np.array(frame_times) * 1000.0
+        report = {
+            'source': source.describe(),
+            'frames': len(frame_times),
+            'fps': len(frame_times) / wall,
+            'mean_ms': float(frame_ms.mean()),
+            'p95_ms': float(np.percentile(frame_ms, 95)),
+            'cpu_percent': 100.0 * cpu / wall,
+            'warnings': self.warnings_count,
+            'inference_skip_ratio': self.motion_gate.skip_ratio if self.motion_gate else 0.0,
+            'sizes': self.describe_sizes(self.last_frame_shape),
+            'inference_fps': self.inference_count / wall,
+        }
+        print(f"Benchmark: {report['source']}")
+        print(f"  Frames: {report['frames']}  Throughput: {report['fps']:.1f} fps  CPU: {report['cpu_percent']:.0f}%")
+        print(f"  process_frame: mean {report['mean_ms']:.2f} ms, p95 {report['p95_ms']:.2f} ms")
+        print(f"  Capture / inference / preview: {report['sizes']}, "
+              f"inference {report['inference_fps']:.1f} fps")
+        if self.motion_gate:
+            print(f"  Inference skipped by motion gate: {100 * report['inference_skip_ratio']:.0f}%")
+        if self.tuner:
+            print(f"  Hand model: {self.tuner.describe()}")
+        if self.pull_gesture:
+            print(f"  Pull gesture: {self.pull_gesture.pulls_detected} frames with a pull, "
+                  f"{self.pull_gesture.mean_us:.0f} us/frame")
+        if self.face_zone:
+            print(f"  Face zone: {self.face_zone.detections} detections, cache hit rate "
+                  f"{100 * self.face_zone.hit_rate:.0f}%, {self.face_zone.amortized_ms:.2f} ms/frame amortized, "
+                  f"interval {self.face_zone.interval} frames")
+        if self.tracker:
+            print(f"  Tracked frames: {self.tracker.frames_tracked} "
+                  f"({self.tracker.tracking_failures} forced keyframes)")
+        print(f"  Warnings triggered: {report['warnings']} "
+              f"({self.alert_state.transitions} overlay show/hide transitions)")
+        
+        if frame_allocations:
+            # Anything a quarter of a frame or larger means a frame buffer was allocated
+            frame_bytes = int(np.prod(self.last_frame_shape))
+            report['max_frame_allocation_kb'] = max(frame_allocations) / 1024
+            report['frames_allocating_buffers'] = sum(a >= frame_bytes // 4 for a in frame_allocations)
+            # Name the backend measured: a missing model silently falls back to another one
+            print(f"  Steady-state allocations ({len(frame_allocations)} traced frames, "
+                  f"{self.detector.name} backend, timings inflated): "
+                  f"peak {report['max_frame_allocation_kb']:.1f} KB per frame (frame is {frame_bytes / 1024:.0f} KB), "
+                  f"{report['frames_allocating_buffers']} frame(s) allocated a frame-sized buffer")
+        return report
+    
+    def compare_hand_backends(self, source_spec: str, max_frames: int = 300) -> List[Dict]:
+        """Replay a source in real time through every available hand detector
+        and compare latency and result throughput"""
+        rows = []
+        for name in HandDetectorSelector.AUTO_CANDIDATES:
+            detector = HandDetectorSelector.create(name, self.hands_options)
+            if detector is None:
+                print(f"Skipping the '{name}' backend")
+                continue
             
-            # Show the frame (optional - for debugging)
-            cv2.imshow(f'Hand Detection - Camera {self.current_camera_index} (Press Q to close)', processed_frame)
+            source = FrameSource.from_spec(source_spec)
+            latencies = []
+            results = 0
+            last_result = None
+            frame = None
+            start = time.perf_counter()
+            while len(latencies) < max_frames:
+                ret, frame, timestamp = source.read_frame(frame)
+                if not ret:
+                    break
+                submitted = time.perf_counter()
+                result = detector.detect(frame, timestamp, context=len(latencies))
+                latencies.append(time.perf_counter() - submitted)
+                if result is not None and result[0] != last_result:
+                    results += 1
+                    last_result = result[0]
+            if detector.is_async:
+                time.sleep(0.5)  # Let in-flight results arrive
+            wall = time.perf_counter() - start - (0.5 if detector.is_async else 0.0)
+            source.release()
+            if not latencies:
+                detector.close()
+                continue
             
-            # Break on 'q' key press
-            if cv2.waitKey(1) & 0xFF == ord('q'):
-                break
-                
-        self.root.after(0, self.stop_monitoring)
+            latencies_ms = 1000.0 * np.array(latencies)
+            row = {'backend': name, 'frames': len(latencies), 'results': results,
+                   'results_per_s': results / wall,
+                   'mean_latency_ms': float(latencies_ms.mean()),
+                   'p95_latency_ms': float(np.percentile(latencies_ms, 95))}
+            if detector.is_async and hasattr(detector, 'stats'):
+                # detect() returns at once; report submit-to-result latency instead
+                stats = detector.stats()
+                row.update(results=stats['completed'], results_per_s=stats['completed'] / wall,
+                           mean_latency_ms=stats['mean_latency_ms'], p95_latency_ms=stats['p95_latency_ms'])
+            detector.close()
+            rows.append(row)
+        
+        print(f"Backend comparison on {source_spec} (real-time replay):")
+        print(f"  {'backend':<10} {'frames':>7} {'results':>8} {'results/s':>10} {'mean ms':>8} {'p95 ms':>8}")
+        for row in rows:
+            print(f"  {row['backend']:<10} {row['frames']:>7} {row['results']:>8} {row['results_per_s']:>10.1f} "
+                  f"{row['mean_latency_ms']:>8.1f} {row['p95_latency_ms']:>8.1f}")
+        return rows
     
     def run(self):
         """Start the application"""
@@ -443,9 +4122,53 @@ class TrichShotApp:
     def on_closing(self):
         """Handle application closing"""
         self.stop_monitoring()
+        # The infer stage may still be inside detect(); close the detectors
+        # only once it has finished
+        self.after_pipeline_exits(self.finish_closing)
+    
+    def finish_closing(self):
+        self.close_detectors()
         self.root.destroy()
+    
+    def close_detectors(self):
+        """Shut down the hand detector (worker processes, async graphs)"""
+        if self.detector:
+            self.detector.close()
+            self.detector = None
+        if self.face_zone:
+            self.face_zone.close()
+            self.face_zone = None
 
 if __name__ == "__main__":
+    import argparse
+    
+    parser = argparse.ArgumentParser(description="TrichShot - warns when your hands get near your face")
+    parser.add_argument('--source', default=os.environ.get('TRICHSHOT_SOURCE'),
+                        help="Frame source: camera:N, synthetic[:WxH[@FPS]], an image directory "
+                             "or a video file (default: pick a camera in the GUI)")
+    parser.add_argument('--headless', action='store_true',
+                        help="Monitor without the GUI or preview window (for a systemd or container "
+                             "service); alerts go to TRICHSHOT_ALERT_SINKS / TRICHSHOT_ALERT_COMMAND")
+    parser.add_argument('--benchmark', action='store_true',
+                        help="Run the detection pipeline over --source as fast as possible, "
+                             "without the GUI, and print throughput")
+    parser.add_argument('--compare-backends', action='store_true',
+                        help="Compare the available hand detection backends on --source, "
+                             "replayed in real time")
+    parser.add_argument('--calibrate', action='store_true',
+                        help="Measure resolution / frame skip / model complexity combinations on "
+                             "--source (default: the preferred camera) and cache the best profile "
+                             "for this host; also runs automatically on first start")
+    parser.add_argument('--max-frames', type=int, default=None,
+                        help="Stop the benchmark (or headless run) after this many frames")
+    parser.add_argument('--mirror-frames', action='store_true',
+                        help="With --benchmark, flip every frame before inference (the old "
+                             "behaviour) to measure the cost of the full-frame pass")
+    parser.add_argument('--trace-allocations', action='store_true',
+                        help="With --benchmark, trace per-frame allocations with tracemalloc "
+                             "after a warm-up and report frame-sized ones")
+    args = parser.parse_args()
+    
     # Check if required packages are available
     try:
         import cv2
@@ -463,11 +4186,52 @@ if __name__ == "__main__":
     # Disable MediaPipe GPU acceleration (fixes OpenGL errors in Docker)
     os.environ['MEDIAPIPE_DISABLE_GPU'] = '1'
     
+    if args.compare_backends:
+        app = TrichShotApp(gui=False)
+        app.compare_hand_backends(args.source or 'synthetic', args.max_frames or 300)
+        app.close_detectors()
+        exit(0)
+    
+    if args.benchmark:
+        source_spec = args.source or 'synthetic'
+        max_frames = args.max_frames
+        if max_frames is None and source_spec.startswith('synthetic'):
+            max_frames = 300  # The synthetic source never ends on its own
+        source = FrameSource.from_spec(source_spec, max_speed=True)
+        if not source.isOpened():
+            print(f"Could not open source '{source_spec}'")
+            exit(1)
+        app = TrichShotApp(gui=False)
+        app.run_benchmark(source, max_frames, trace_allocations=args.trace_allocations,
+                          mirror_frames=args.mirror_frames)
+        app.close_detectors()
+        source.release()
+        exit(0)
+    
+    if args.calibrate:
+        exit(0 if run_calibration(args.source) else 1)
+    
+    if ProfileCalibrator.needed():
+        # First run on this host: later runs load the cached profile
+        print("No calibrated profile for this host yet (set TRICHSHOT_CALIBRATE=0 to skip)")
+        run_calibration(args.source)
+    
+    if args.headless:
+        app = TrichShotApp(gui=False, source_spec=args.source)
+        try:
+            app.run_headless(args.max_frames)
+        except Exception as e:
+            print(f"Headless monitoring failed: {e}")
+            exit(1)
+        finally:
+            app.close_detectors()
+        exit(0)
+    
     print("TrichShot")
     print("This app will monitor your hands and warn when they get near your face.")
     print("External cameras are automatically prioritized over integrated cameras.")
     print("Press 'Start Monitoring' to begin, and 'q' in the video window to stop.")
     print("Adjust the danger zone sliders to customize the detection area.\n")
     
-    app = TrichShotApp()
+    app = TrichShotApp(source_spec=args.source)
     app.run()
\ No newline at end of file